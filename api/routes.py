@@ -1,53 +1,364 @@
 """
 Flask API路由模块
 """
-from flask import Flask, render_template, jsonify, request
+import hashlib
+import json
+import random
+import time
+import zlib
+from flask import Flask, Response, g, render_template, jsonify, request, make_response, stream_with_context
+from config.settings import (
+    METRICS_ENABLED, PROFILING_ENABLED, PROFILING_HEADER, STATIC_ASSET_MAX_AGE, BOOTSTRAP_MAX_WAIT_SECONDS,
+    IMPORT_MAX_LINE_BYTES
+)
+from core import metrics, profiling
+from core.assets import CONTENT_TYPES, CompressedBody, get_static_assets
 from services.config_service import ConfigService
 from services.env_service import EnvService
+from services.capability_service import CapabilityService
+from services.job_service import JobService, env_vars_result, env_access_result, apply_result
+from services.bootstrap_service import BootstrapService, privilege_result
 from core.permissions import is_admin, request_admin_privilege
+from core.startup import startup_timer
+from models.namespaces import DEFAULT_NAMESPACE, current_namespace, is_valid_namespace, set_current_namespace
+
+
+# 流式读写请求/响应体的块大小
+STREAM_CHUNK_SIZE = 64 * 1024
+
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+# 读写配置的路由（按前缀匹配），同时以 /api/ns/<namespace>/... 提供，读写该命名空间的配置
+NAMESPACED_ROUTES = ('/api/bootstrap', '/api/configs', '/api/export', '/api/import', '/api/cache-stats')
+
+
+def _gzip_chunks(chunks):
+    """把文本块流式压缩为 gzip 字节块"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    buffered = 0
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        buffered += len(chunk)
+        # 攒够一块再刷新，避免每条配置都产生一个很小的 gzip 块
+        if data or buffered >= STREAM_CHUNK_SIZE:
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+            buffered = 0
+            if data:
+                yield data
+    yield compressor.flush()
+
+
+def _iter_request_chunks(stream, gzipped=False):
+    """按块读取请求体，gzip 压缩时每次最多解压出 STREAM_CHUNK_SIZE 字节"""
+    decompressor = zlib.decompressobj(31) if gzipped else None
+    while True:
+        chunk = stream.read(STREAM_CHUNK_SIZE)
+        if not chunk:
+            break
+        if decompressor is None:
+            yield chunk
+            continue
+        # 限制每次解压的输出，未解压的输入留在 unconsumed_tail 中，压缩炸弹不会一次展开到内存
+        while chunk:
+            data = decompressor.decompress(chunk, STREAM_CHUNK_SIZE)
+            if data:
+                yield data
+            chunk = decompressor.unconsumed_tail
+    if decompressor:
+        data = decompressor.flush()
+        if data:
+            yield data
+
+
+def _iter_request_lines(stream, gzipped=False, max_line_bytes=IMPORT_MAX_LINE_BYTES):
+    """
+    按块读取请求体并逐行产出（bytes），不把整个请求体读入内存
+
+    Raises:
+        ValueError: 某一行超过 max_line_bytes 字节
+    """
+    pending = b''
+    line_number = 0
+    for chunk in _iter_request_chunks(stream, gzipped):
+        pending += chunk
+        lines = pending.split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            line_number += 1
+            if len(line) > max_line_bytes:
+                raise ValueError(f'第 {line_number} 行超过 {max_line_bytes} 字节')
+            yield line
+        if len(pending) > max_line_bytes:
+            raise ValueError(f'第 {line_number + 1} 行超过 {max_line_bytes} 字节')
+    if pending:
+        yield pending
+
+
+def _sse_event(event, data):
+    """编码一个 Server-Sent Events 事件"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _sse_response(events):
+    """以 text/event-stream 流式返回 (事件名, 数据) 序列"""
+    chunks = (_sse_event(event, data) for event, data in events)
+    response = Response(stream_with_context(chunks), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # 避免反向代理缓冲事件
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _wants_async():
+    """客户端是否要求以后台任务方式执行（Prefer: respond-async 或 ?async=1）"""
+    return request.args.get('async') == '1' or 'respond-async' in request.headers.get('Prefer', '')
+
+
+def _job_response(submission):
+    """提交后台任务的响应：202 + Location，队列已满时 503"""
+    response = jsonify(submission)
+    if not submission['success']:
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        return response
+    response.status_code = 202
+    response.headers['Location'] = f"/api/jobs/{submission['job']['id']}"
+    return response
+
+
+def _parse_json_line(line):
+    """解析一行 JSON，无效时返回 None"""
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def install_metrics(app: Flask):
+    """按路由规则统计请求数、状态码和耗时（流式响应只统计到视图返回为止）"""
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+            metrics.HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, request.method, route)
+            metrics.HTTP_REQUESTS.inc(request.method, route, str(response.status_code))
+        return response
+
+
+def install_profiling(app: Flask):
+    """按请求头或采样率剖析请求，剖析持续到响应（包括流式响应）结束"""
+    profiler = profiling.get_profiler()
+
+    @app.before_request
+    def start_profile():
+        header = request.headers.get(PROFILING_HEADER)
+        mode = profiler.choose_mode(header, random.random())
+        if mode is None:
+            return
+        route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+        session = profiler.start(mode, request.method, route)
+        if session is not None:
+            g.profile_session = session
+            g.profile_sampled = not header
+
+    @app.after_request
+    def tag_profile(response):
+        session = g.get('profile_session')
+        if session is not None:
+            session.status = response.status_code
+            response.headers['X-Profile-Id'] = session.id
+        return response
+
+    @app.teardown_request
+    def finish_profile(exc):
+        session = g.pop('profile_session', None)
+        if session is not None:
+            if session.status is None:
+                session.status = 500
+            profiler.finish(session, sampled=g.pop('profile_sampled', False))
+
+
+def install_namespaces(app: Flask):
+    """
+    为读写配置的路由注册 /api/ns/<namespace>/... 别名（页面为 /ns/<namespace>/），
+    视图不变，命名空间在请求开始时写入上下文，ConfigModel 据此选择分片存储
+    """
+    for rule in list(app.url_map.iter_rules()):
+        if rule.rule.startswith(NAMESPACED_ROUTES):
+            app.add_url_rule('/api/ns/<namespace>' + rule.rule[len('/api'):],
+                             endpoint=rule.endpoint, methods=rule.methods)
+    app.add_url_rule('/ns/<namespace>/', endpoint='index')
+
+    @app.url_value_preprocessor
+    def pull_namespace(endpoint, values):
+        namespace = values.pop('namespace', DEFAULT_NAMESPACE) if values else DEFAULT_NAMESPACE
+        if is_valid_namespace(namespace):
+            set_current_namespace(namespace)
+        else:
+            set_current_namespace(DEFAULT_NAMESPACE)
+            g.invalid_namespace = namespace
+
+    @app.before_request
+    def reject_invalid_namespace():
+        namespace = g.pop('invalid_namespace', None)
+        if namespace is not None:
+            return jsonify({
+                'success': False,
+                'message': '命名空间只能包含字母、数字、下划线和连字符（最长 64 个字符）'
+            }), 400
+
+
+def _compressed_response(body, cache_control):
+    """按 Accept-Encoding 返回预先压缩的内容，If-None-Match 命中时返回 304"""
+    encoding = body.choose_encoding(request.accept_encodings)
+    etag = body.etag(encoding)
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+    else:
+        response = Response(body.bodies[encoding], content_type=body.content_type)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+# 渲染并压缩后的页面外壳，按静态资源版本缓存
+_page_cache = {}
 
 
 def create_routes(app: Flask):
     """创建所有API路由"""
 
+    # 模板中用 asset_url('css/app.css') 引用带指纹的静态资源
+    app.jinja_env.globals['asset_url'] = lambda name: get_static_assets().url_for(name)
+
+    if PROFILING_ENABLED:
+        install_profiling(app)
+
+    if METRICS_ENABLED:
+        install_metrics(app)
+
+        @app.route('/api/metrics', methods=['GET'])
+        def get_metrics():
+            """Prometheus 文本格式的运行指标"""
+            return Response(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
+
     @app.route('/')
     def index():
-        """主页面"""
-        return render_template('index.html')
+        """
+        主页面
+
+        页面只引用带指纹的 CSS/JS，渲染结果在静态资源不变时不变：渲染和压缩一次后缓存，
+        以内容摘要作为 ETag，浏览器每次重新验证，未变化时返回 304
+        """
+        assets = get_static_assets()
+        if app.debug:
+            # 开发模式下模板和静态资源随时可能修改，每次重新渲染
+            assets.reload_if_changed()
+            page = CompressedBody(render_template('index.html').encode('utf-8'), CONTENT_TYPES['.html'])
+        else:
+            page = _page_cache.get(assets.version)
+            if page is None:
+                page = CompressedBody(render_template('index.html').encode('utf-8'), CONTENT_TYPES['.html'])
+                _page_cache.clear()
+                _page_cache[assets.version] = page
+        return _compressed_response(page, 'no-cache')
+
+    @app.route('/assets/<path:name>')
+    def static_asset(name):
+        """带指纹的静态资源，内容变化时 URL 随之变化，可以长期缓存"""
+        asset = get_static_assets().get(name)
+        if asset is None:
+            return jsonify({'success': False, 'message': '资源不存在'}), 404
+        return _compressed_response(asset, f'public, max-age={STATIC_ASSET_MAX_AGE}, immutable')
 
     @app.route('/api/check-admin', methods=['GET'])
     def check_admin():
-        """检查管理员权限"""
-        from core.permissions import check_runtime_privilege
-        privilege_info = check_runtime_privilege()
-        return jsonify({
-            'isAdmin': privilege_info['is_admin'],
-            'canModifyEnv': privilege_info['can_modify_env'],
-            'level': privilege_info['level'],
-            'recommendations': privilege_info['recommendations']
-        })
+        """检查管理员权限（使用启动时的探测结果，?refresh=1 重新探测）"""
+        return jsonify(privilege_result(refresh=request.args.get('refresh') == '1'))
+
+    @app.route('/api/bootstrap', methods=['GET'])
+    def get_bootstrap():
+        """
+        页面初始化：并发获取权限信息、环境变量访问测试、配置列表和当前环境变量
+
+        在等待时间（?wait=秒，默认 BOOTSTRAP_WAIT_SECONDS）内完成的部分直接返回，
+        其余部分标记为 pending，前端随后请求该部分的 url
+        """
+        wait_seconds = None
+        if request.args.get('wait') not in (None, ''):
+            try:
+                wait_seconds = min(max(float(request.args['wait']), 0.0), BOOTSTRAP_MAX_WAIT_SECONDS)
+            except ValueError:
+                return jsonify({'success': False, 'message': 'wait 必须是数字'}), 400
+        return jsonify(BootstrapService.get_bootstrap(wait_seconds, current_namespace()))
 
     @app.route('/api/test-env-access', methods=['GET'])
     def test_env_access():
-        """测试环境变量访问权限"""
-        from services.env_service import EnvService
-
-        try:
-            test_result = EnvService.test_environment_variable_access()
-            return jsonify({
-                'success': True,
-                'test_result': test_result
-            })
-        except Exception as e:
-            return jsonify({
-                'success': False,
-                'message': f'Environment variable access test failed: {str(e)}'
-            })
+        """测试环境变量访问权限（使用缓存的测试结果，?refresh=1 重新测试；可作为后台任务执行）"""
+        refresh = request.args.get('refresh') == '1'
+        if _wants_async():
+            return _job_response(JobService.submit_env_access_test(refresh))
+        return jsonify(env_access_result(refresh))
 
     @app.route('/api/configs', methods=['GET'])
     def get_configs():
-        """获取所有配置"""
-        return jsonify(ConfigService.get_all_configs())
+        """
+        获取配置列表
+
+        查询参数（均可选，都不提供时返回全部配置）：
+            name    名称包含的子串
+            model   AI_model 精确匹配
+            sort    createdAt / -createdAt / name / -name
+            offset  跳过的条数
+            limit   每页条数
+            fields  逗号分隔的返回字段，例如 fields=name,AI_model
+
+        响应带有由存储版本和查询参数生成的强 ETag，If-None-Match 命中时直接返回 304
+        """
+        query = sorted(request.args.items(multi=True))
+        etag = hashlib.sha1(
+            f'{current_namespace()}:{ConfigService.get_version()}?{query}'.encode('utf-8')
+        ).hexdigest()
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        if not request.args:
+            result = ConfigService.get_all_configs()
+        else:
+            try:
+                offset = int(request.args.get('offset', 0))
+                limit = request.args.get('limit')
+                limit = int(limit) if limit not in (None, '') else None
+            except ValueError:
+                return jsonify({'success': False, 'message': 'offset 和 limit 必须是整数'}), 400
+            fields = request.args.get('fields')
+            result = ConfigService.query_configs(
+                name=request.args.get('name') or None,
+                model=request.args.get('model') or None,
+                sort=request.args.get('sort') or None,
+                offset=offset,
+                limit=limit,
+                fields=[field.strip() for field in fields.split(',') if field.strip()] if fields else None
+            )
+            if not result['success']:
+                return jsonify(result), 400
+
+        response = jsonify(result)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
 
     @app.route('/api/configs', methods=['POST'])
     def create_config():
@@ -73,39 +384,65 @@ def create_routes(app: Flask):
 
     @app.route('/api/configs/<config_id>/apply', methods=['POST'])
     def apply_config(config_id):
-        """应用配置到系统环境变量"""
-        from core.permissions import check_runtime_privilege
+        """
+        应用配置到系统环境变量
+
+        请求头 Accept: text/event-stream 时以 SSE 流式返回：每个变量完成时发送一个 variable 事件，
+        最后发送 summary 事件（内容与普通响应相同）；?stop_on_failure=1 时第一个变量失败后跳过剩余变量
+
+        与当前环境变量快照相同的变量不写入，汇总的 unchanged 列出这些变量；?force=1 时写入全部变量
+        """
+        stream = request.accept_mimetypes.best == 'text/event-stream'
+        force = request.args.get('force') == '1'
 
         # 检查权限
-        privilege_info = check_runtime_privilege()
+        privilege_info = CapabilityService.get_privilege_info()
         if not privilege_info['can_modify_env']:
+            # 权限可能在之后被修复，下次应用时重新探测
+            CapabilityService.invalidate()
             recommendations = privilege_info['recommendations']
             error_message = recommendations[0]['message'] if recommendations else 'Insufficient privileges'
 
-            return jsonify({
+            result = {
                 'needsAdmin': not privilege_info['is_admin'],
                 'success': False,
                 'message': error_message,
                 'canModifyUserEnv': privilege_info['can_modify_env']
-            })
+            }
+            return _sse_response([('summary', result)]) if stream else jsonify(result)
 
         # 获取配置数据
-        configs_result = ConfigService.get_all_configs()
-        if not configs_result['success']:
-            return jsonify({'success': False, 'message': '获取配置失败'})
+        config_result = ConfigService.get_config(config_id)
+        if not config_result['success']:
+            return _sse_response([('summary', config_result)]) if stream else jsonify(config_result)
 
-        config = None
-        for c in configs_result['configs']:
-            if c['id'] == config_id:
-                config = c
-                break
+        if _wants_async():
+            return _job_response(JobService.submit_apply(config_result['config'], request.args.get('mode'), force))
 
-        if not config:
-            return jsonify({'success': False, 'message': '配置不存在'})
+        if stream:
+            def events():
+                for event, data in EnvService.iter_apply_config(
+                        config_result['config'],
+                        request.args.get('mode'),
+                        stop_on_failure=request.args.get('stop_on_failure') == '1',
+                        force=force):
+                    if event == 'summary' and not data['success']:
+                        CapabilityService.invalidate()
+                    yield event, data
+            return _sse_response(events())
 
-        # 应用配置
-        result = EnvService.apply_config(config)
-        return jsonify(result)
+        # 应用配置（可通过 ?mode=batch|sequential|parallel 指定执行方式）
+        return jsonify(apply_result(config_result['config'], request.args.get('mode'), force=force))
+
+    @app.route('/api/capabilities', methods=['GET'])
+    def get_capabilities():
+        """获取缓存的能力探测结果及探测时间（?refresh=1 重新探测）"""
+        return jsonify(CapabilityService.get_status(refresh=request.args.get('refresh') == '1'))
+
+    @app.route('/api/startup', methods=['GET'])
+    def get_startup_report():
+        """启动耗时报告（绑定端口、导入、创建应用、第一个请求、后台探测）"""
+        return jsonify({'success': True, 'startup': startup_timer.report()})
 
     @app.route('/api/validate', methods=['POST'])
     def validate_config():
@@ -113,28 +450,118 @@ def create_routes(app: Flask):
         data = request.json
         return jsonify(ConfigService.validate_config_data(data))
 
+    @app.route('/api/validate/batch', methods=['POST'])
+    def validate_configs_batch():
+        """
+        批量验证配置参数
+
+        请求体为 {"configs": [...]}，或 Content-Type 为 application/x-ndjson 时每行一个配置。
+        响应以 NDJSON 流式返回，每个配置一行结果，最后一行为汇总
+        """
+        if request.mimetype in NDJSON_MIMETYPES:
+            gzipped = request.headers.get('Content-Encoding', '').lower() == 'gzip'
+            configs = (
+                _parse_json_line(line)
+                for line in _iter_request_lines(request.stream, gzipped) if line.strip()
+            )
+        else:
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict) or not isinstance(data.get('configs'), list):
+                return jsonify({'success': False, 'message': '请求体应为 {"configs": [...]}'}), 400
+            configs = data['configs']
+
+        def lines():
+            try:
+                for item in ConfigService.validate_configs(configs):
+                    yield json.dumps(item, ensure_ascii=False) + '\n'
+            except ValueError as e:
+                # 请求体中的行过长
+                yield json.dumps({'success': False, 'message': str(e)}, ensure_ascii=False) + '\n'
+        return Response(stream_with_context(lines()), mimetype='application/x-ndjson')
+
     @app.route('/api/env-vars', methods=['GET'])
     def get_env_vars():
-        """获取当前系统环境变量"""
-        vars_data = EnvService.get_current_env_vars()
-        return jsonify({
-            'success': True,
-            'vars': vars_data
-        })
+        """获取当前系统环境变量（?refresh=1 跳过缓存；可作为后台任务执行）"""
+        refresh = request.args.get('refresh') == '1'
+        if _wants_async():
+            return _job_response(JobService.submit_env_vars(refresh))
+        return jsonify(env_vars_result(refresh))
+
+    @app.route('/api/jobs', methods=['GET'])
+    def list_jobs():
+        """最近的后台任务和队列统计"""
+        return jsonify(JobService.list_jobs())
+
+    @app.route('/api/jobs/<job_id>', methods=['GET'])
+    def get_job(job_id):
+        """后台任务的状态和结果"""
+        result = JobService.get_job(job_id)
+        return jsonify(result), (200 if result['success'] else 404)
+
+    @app.route('/api/jobs/<job_id>', methods=['DELETE'])
+    def cancel_job(job_id):
+        """取消后台任务"""
+        result = JobService.cancel_job(job_id)
+        return jsonify(result), (200 if result['success'] else 404)
+
+    @app.route('/api/cache-stats', methods=['GET'])
+    def get_cache_stats():
+        """获取配置缓存命中统计"""
+        return jsonify(ConfigService.get_cache_stats())
 
     @app.route('/api/export', methods=['GET'])
     def export_configs():
-        """导出配置"""
-        result = ConfigService.export_configs()
-        if result['success']:
-            return jsonify(result['data'])
-        else:
-            return jsonify({'success': False, 'message': result['message']})
+        """
+        流式导出配置
+
+        查询参数：
+            format  json（默认，configs.json 格式）或 ndjson（每行一个配置）
+            gzip    为 1 时输出 gzip 压缩文件
+        """
+        export_format = request.args.get('format', 'json')
+        if export_format not in ('json', 'ndjson'):
+            return jsonify({'success': False, 'message': f'不支持的导出格式: {export_format}'}), 400
+
+        chunks = ConfigService.export_stream(export_format)
+        mimetype = 'application/x-ndjson' if export_format == 'ndjson' else 'application/json'
+        filename = f'configs.{export_format}'
+        if request.args.get('gzip') == '1':
+            chunks = _gzip_chunks(chunks)
+            mimetype = 'application/gzip'
+            filename += '.gz'
+
+        response = Response(stream_with_context(chunks), mimetype=mimetype)
+        if request.args:
+            response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+        return response
 
     @app.route('/api/import', methods=['POST'])
     def import_configs():
-        """导入配置"""
-        data = request.json
-        return jsonify(ConfigService.import_configs(data))
+        """
+        导入配置
+
+        Content-Type 为 application/x-ndjson（或 ?format=ndjson）时按行流式解析请求体，
+        每 IMPORT_BATCH_SIZE 条提交一次；请求体可用 Content-Encoding: gzip 压缩。
+        ?progress=1 时以 NDJSON 逐批返回进度，最后一行为最终结果。
+        ?policy=skip|overwrite|rename|keep-newest 指定 id 冲突时的合并策略
+        """
+        policy = request.args.get('policy')
+        if request.mimetype not in NDJSON_MIMETYPES and request.args.get('format') != 'ndjson':
+            data = request.json
+            return jsonify(ConfigService.import_configs(data, policy))
+
+        gzipped = request.headers.get('Content-Encoding', '').lower() == 'gzip'
+        progress = ConfigService.import_ndjson(_iter_request_lines(request.stream, gzipped), policy=policy)
+
+        if request.args.get('progress') == '1':
+            lines = (json.dumps(item, ensure_ascii=False) + '\n' for item in progress)
+            return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+
+        result = None
+        for result in progress:
+            pass
+        return jsonify(result)
+
+    install_namespaces(app)
 
     return app
\ No newline at end of file
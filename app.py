@@ -1,61 +1,145 @@
 """
 Main application entry point
 """
-import sys
-from flask import Flask
-from core.permissions import check_runtime_privilege
-from config.settings import FLASK_HOST, FLASK_PORT, FLASK_DEBUG
-from api.routes import create_routes
+import argparse
+import importlib
+import os
+from core.startup import startup_timer, bind_socket
+from config.settings import (
+    FLASK_HOST, FLASK_PORT, FLASK_DEBUG, CONFIG_STORAGE_BACKEND,
+    SERVER_MODE, SERVER_THREADS, SERVER_WORKERS, SERVER_MAX_QUEUE, SERVER_BACKLOG,
+    SERVER_KEEPALIVE_TIMEOUT, SERVER_SHUTDOWN_TIMEOUT
+)
 
 
 def create_app():
     """Create Flask application"""
+    # Flask and the route modules are imported here rather than at module level,
+    # so main() can bind the port before paying for them
+    from flask import Flask
+    from api.routes import create_routes
+
     app = Flask(__name__)
 
     # Register routes
     create_routes(app)
 
+    @app.after_request
+    def record_first_request(response):
+        if not startup_timer.has('first_request') and startup_timer.mark('first_request'):
+            if app.config.get('STARTUP_REPORT'):
+                print(f"  Startup: {startup_timer.format()}")
+        return response
+
     return app
 
 
-def main():
-    """Main function"""
-    # Check runtime permissions
-    privilege_info = check_runtime_privilege()
+def parse_args(argv=None):
+    """Parse command line options (defaults come from config/settings.py)"""
+    parser = argparse.ArgumentParser(description='Multi-AI Environment Config Manager')
+    parser.add_argument('--mode', choices=('development', 'production'),
+                        default=os.environ.get('SERVER_MODE', SERVER_MODE),
+                        help='server mode (env: SERVER_MODE)')
+    parser.add_argument('--host', default=FLASK_HOST, help='listen address')
+    parser.add_argument('--port', type=int, default=FLASK_PORT, help='listen port')
+    parser.add_argument('--threads', type=int, default=SERVER_THREADS,
+                        help='request threads per worker (production mode)')
+    parser.add_argument('--workers', type=int, default=SERVER_WORKERS,
+                        help='worker processes (production mode, sqlite backend only)')
+    parser.add_argument('--max-queue', type=int, default=SERVER_MAX_QUEUE,
+                        help='connections queued per worker before returning 503 (production mode)')
+    return parser.parse_args(argv)
 
-    # Display privilege information
-    print("=" * 50)
-    print("  Multi-AI Environment Config Manager")
-    print("=" * 50)
-    print(f"  Server: http://localhost:{FLASK_PORT}")
-    print(f"  Mode: {'Development' if FLASK_DEBUG else 'Production'}")
-    print(f"  Privilege Level: {privilege_info['level']}")
-    print(f"  Can Modify Environment: {'Yes' if privilege_info['can_modify_env'] else 'No'}")
-    print("=" * 50)
+
+def print_probe_result(name, result):
+    """Print capability probe results as they finish in the background"""
+    startup_timer.mark(f'probe:{name}')
+    if name != 'privilege':
+        return
+
+    print(f"  Privilege Level: {result['level']}")
+    print(f"  Can Modify Environment: {'Yes' if result['can_modify_env'] else 'No'}")
 
     # Display recommendations
-    for recommendation in privilege_info['recommendations']:
+    for recommendation in result['recommendations']:
         if recommendation['type'] == 'error':
             print(f"  ERROR: {recommendation['message']}")
         elif recommendation['type'] == 'warning':
             print(f"  WARNING: {recommendation['message']}")
         elif recommendation['type'] == 'success':
             print(f"  SUCCESS: {recommendation['message']}")
-    print("=" * 50)
-    print("  Press Ctrl+C to stop service")
-    print()
+
+
+def main(argv=None):
+    """Main function"""
+    args = parse_args(argv)
+    production = args.mode == 'production'
+
+    workers = args.workers
+    if production and workers > 1 and (CONFIG_STORAGE_BACKEND != 'sqlite' or not hasattr(os, 'fork')):
+        print(f"  WARNING: --workers {workers} needs os.fork and the sqlite storage backend, using 1 worker")
+        workers = 1
+
+    # Bind the port first; connections that arrive while the app loads wait in the listen queue
+    # (the development server binds its own socket, and its reloader restarts the process anyway)
+    sock = None
+    if production:
+        sock = bind_socket(args.host, args.port, SERVER_BACKLOG)
+        startup_timer.mark('bind')
+
+    # Import the heavy modules explicitly so the startup report separates import time from app construction
+    for module in ('flask', 'api.routes'):
+        importlib.import_module(module)
+    from services.capability_service import CapabilityService
+    startup_timer.mark('import')
 
     # Create Flask application
     app = create_app()
+    app.config['STARTUP_REPORT'] = True
+    startup_timer.mark('create_app')
 
-    # Add privilege info to app context for API access
-    app.config['PRIVILEGE_INFO'] = privilege_info
+    print("=" * 50)
+    print("  Multi-AI Environment Config Manager")
+    print("=" * 50)
+    print(f"  Server: http://localhost:{args.port}")
+    if production:
+        from core.server import describe_server
+        print(f"  Mode: Production ({describe_server()}, {workers} worker(s) x {args.threads} threads)")
+    else:
+        print(f"  Mode: {'Development' if FLASK_DEBUG else 'Development (debug off)'}")
+    print("  Press Ctrl+C to stop service")
+    print("=" * 50)
+
+    # Probe runtime permissions in the background; results are cached for the life of the process
+    # and requests that need them wait for the probe in progress.
+    # Forked workers probe on first use instead: a probe thread (and its lock) would not survive the fork
+    if not (production and workers > 1):
+        CapabilityService.probe_all(background=True, on_probe=print_probe_result)
+
+    if production:
+        from core.server import serve
+        startup_timer.mark('serve')
+        serve(
+            app,
+            args.host,
+            args.port,
+            threads=args.threads,
+            workers=workers,
+            max_queue=args.max_queue,
+            backlog=SERVER_BACKLOG,
+            keepalive_timeout=SERVER_KEEPALIVE_TIMEOUT,
+            shutdown_timeout=SERVER_SHUTDOWN_TIMEOUT,
+            sock=sock
+        )
+        print("\nService stopped")
+        return
 
-    # Start Flask application
+    # Start Flask development server
+    startup_timer.mark('serve')
     try:
         app.run(
-            host=FLASK_HOST,
-            port=FLASK_PORT,
+            host=args.host,
+            port=args.port,
             debug=FLASK_DEBUG
         )
     except KeyboardInterrupt:
@@ -63,4 +147,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1 @@
+# 基准测试模块
\ No newline at end of file
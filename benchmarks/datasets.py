@@ -0,0 +1,57 @@
+"""
+基准测试数据集
+生成与 configs.json 格式相同的合成配置文件
+"""
+import json
+import random
+from datetime import datetime, timedelta
+
+
+MODELS = ['GLM-4.6', 'anthropic/claude-haiku-4.5', 'Qwen3-Coder-480B', 'gpt-4o-mini', 'deepseek-coder']
+BASE_URLS = [
+    'https://open.bigmodel.cn/api/anthropic',
+    'https://openrouter.ai/api/v1/',
+    'https://api-inference.modelscope.cn',
+    'https://api.openai.com/v1',
+    'https://api.deepseek.com/anthropic'
+]
+
+
+def make_config(rng, index, created_at):
+    """生成一条合成配置"""
+    return {
+        'id': f'{rng.getrandbits(32):08x}',
+        'name': f'Profile {index:06d}',
+        'isDefault': index == 0,
+        'ANTHROPIC_AUTH_TOKEN': f'sk-bench-{rng.getrandbits(64):016x}',
+        'ANTHROPIC_BASE_URL': rng.choice(BASE_URLS),
+        'CLAUDE_CODE_DISABLE_NONESSENTIAL_TRAFFIC': rng.choice(['1', 'true', 'false', '']),
+        'AI_model': rng.choice(MODELS),
+        'createdAt': (created_at + timedelta(seconds=index)).isoformat()
+    }
+
+
+def make_document(count, seed=0):
+    """生成包含 count 条配置的文档（id 唯一）"""
+    rng = random.Random(seed)
+    created_at = datetime(2025, 1, 1)
+    configs = []
+    seen = set()
+    for index in range(count):
+        config = make_config(rng, index, created_at)
+        while config['id'] in seen:
+            config['id'] = f'{rng.getrandbits(32):08x}'
+        seen.add(config['id'])
+        configs.append(config)
+    return {
+        'defaultConfigId': configs[0]['id'] if configs else None,
+        'configs': configs
+    }
+
+
+def write_dataset(path, count, seed=0):
+    """把合成文档写入 path（configs.json 格式），返回文档"""
+    document = make_document(count, seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, ensure_ascii=False, indent=2)
+    return document
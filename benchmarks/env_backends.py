@@ -0,0 +1,147 @@
+"""
+环境变量后端基准测试
+用 EnvService.iter_apply_config 对每个可用的环境变量后端和每种应用方式重复应用配置，比较单次应用的延迟
+
+- file：FileEnvBackend，写入临时目录中的 JSON 文件
+- script-host：ScriptExecutor + 常驻宿主进程；没有 PowerShell 时使用 scripts/stub_script_host.py
+- script-process：ScriptExecutor 每次调用启动 PowerShell（需要 PowerShell）
+- registry：RegistryEnvBackend（仅 Windows）
+
+写入的是 CCSWITCH_BENCH_* 占位变量，结束后删除，不会改动真实的 ANTHROPIC_* 变量
+
+用法：
+    python -m benchmarks.env_backends
+    python -m benchmarks.env_backends --backends file,script-host --modes batch,sequential --applies 50
+    python -m benchmarks.env_backends --stub-latency 0.05
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.run import summarize
+from core import env_backend as env_backends
+from core.script_executor import ScriptExecutor
+import services.env_service as env_service
+from services.env_service import APPLY_MODES, EnvService
+
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DEFAULT_OUTPUT = Path(__file__).parent / 'results' / 'env_backends.json'
+BACKENDS = ('file', 'script-host', 'script-process', 'registry')
+
+
+def _has_powershell():
+    return shutil.which('powershell') is not None
+
+
+def create_backend(name, workdir):
+    """创建要测量的后端，当前系统不支持时返回 None"""
+    if name == 'file':
+        return env_backends.FileEnvBackend(Path(workdir) / 'env_vars.json')
+    if name == 'script-host':
+        host_command = None
+        if not _has_powershell():
+            host_command = [sys.executable, str(PROJECT_ROOT / 'scripts' / 'stub_script_host.py')]
+        return env_backends.ScriptEnvBackend(ScriptExecutor(use_host=True, host_command=host_command))
+    if name == 'script-process':
+        if not _has_powershell():
+            return None
+        return env_backends.ScriptEnvBackend(ScriptExecutor(use_host=False))
+    if name == 'registry':
+        if env_backends.winreg is None:
+            return None
+        return env_backends.RegistryEnvBackend()
+    raise ValueError(f'Unknown backend: {name}')
+
+
+def measure(backend, mode, names, applies):
+    """对一个后端和应用方式重复应用配置，返回汇总结果"""
+    latencies_ms = []
+    failures = 0
+    errors = 0
+    started = time.perf_counter()
+    for index in range(applies):
+        config = {name: f'value-{index}' for name in names}
+        call_started = time.perf_counter()
+        try:
+            summary = EnvService.apply_config(config, mode)
+        except Exception:
+            errors += 1
+            continue
+        latencies_ms.append((time.perf_counter() - call_started) * 1000)
+        if not summary['success']:
+            failures += 1
+    return summarize(mode, len(names), latencies_ms, errors, failures, time.perf_counter() - started)
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='Compare per-apply latency across environment backends')
+    parser.add_argument('--backends', default=','.join(BACKENDS), help='comma-separated backends to measure')
+    parser.add_argument('--modes', default=','.join(APPLY_MODES), help='comma-separated apply modes')
+    parser.add_argument('--applies', type=int, default=20, help='applies per backend and mode')
+    parser.add_argument('--variables', type=int, default=4, help='variables written per apply')
+    parser.add_argument('--stub-latency', type=float, default=0.0,
+                        help='simulated seconds per call for the stub script host (no PowerShell)')
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT), help='where to write the JSON results')
+    args = parser.parse_args(argv)
+
+    os.environ['STUB_HOST_LATENCY'] = str(args.stub_latency)
+    names = [f'CCSWITCH_BENCH_{index}' for index in range(args.variables)]
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'applies': args.applies,
+            'variables': args.variables,
+            'stub_latency': args.stub_latency,
+            'powershell': _has_powershell()
+        },
+        'results': []
+    }
+
+    # 应用配置时只写入占位变量
+    original_vars = env_service.ENV_VARS
+    original_backend = env_service.env_backend
+    env_service.ENV_VARS = names
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for name in [name.strip() for name in args.backends.split(',') if name.strip()]:
+                backend = create_backend(name, workdir)
+                if backend is None:
+                    print(f'{name:<16} not available on this system, skipped')
+                    continue
+                env_service.env_backend = backend
+                try:
+                    for mode in modes:
+                        result = measure(backend, mode, names, args.applies)
+                        result['backend'] = name
+                        report['results'].append(result)
+                        print(f"{name:<16} {mode:<11} mean={result['mean_ms']}ms  "
+                              f"p50={result['p50_ms']}ms  p95={result['p95_ms']}ms  "
+                              f"failures={result['failures']}  errors={result['errors']}")
+                finally:
+                    for var_name in names:
+                        backend.delete_environment_variable(var_name)
+                    backend.shutdown()
+    finally:
+        env_service.ENV_VARS = original_vars
+        env_service.env_backend = original_backend
+        env_service.env_snapshot_cache.invalidate()
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f'\nResults written to {output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
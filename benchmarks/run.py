@@ -0,0 +1,395 @@
+"""
+API 与服务层基准测试
+通过 app.create_app 的测试客户端调用 api/routes.py 中的每个路由，
+使用合成的 configs.json 数据集和模拟脚本执行器，不需要 PowerShell 即可运行
+
+用法：
+    python -m benchmarks.run
+    python -m benchmarks.run --sizes 10,1000,100000 --latency 0.05 --failure-rate 0.1
+    python -m benchmarks.run --backend sqlite --output benchmarks/results/sqlite.json
+    python -m benchmarks.run --compare benchmarks/results/baseline.json --fail-on-regression
+
+结果以 JSON 写入 --output，--compare 会与之前的结果逐路由比较 p50/p95 延迟和吞吐量
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.datasets import write_dataset, make_config
+from benchmarks.simulated_executor import SimulatedScriptExecutor
+
+
+DEFAULT_OUTPUT = Path(__file__).parent / 'results' / 'latest.json'
+
+SIMULATED_PRIVILEGE = {
+    'is_admin': False,
+    'can_modify_env': True,
+    'level': 'User (can modify environment variables)',
+    'recommendations': [{
+        'type': 'warning',
+        'message': 'Can modify user environment variables only. Some features may be limited.'
+    }]
+}
+
+
+def percentile(sorted_values, fraction):
+    """最近秩法百分位数"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(label, size, latencies_ms, errors, failures, elapsed):
+    """汇总一个路由的测量结果"""
+    values = sorted(latencies_ms)
+    count = len(values)
+    return {
+        'route': label,
+        'size': size,
+        'requests': count,
+        'errors': errors,
+        'failures': failures,
+        'throughput': round(count / elapsed, 2) if elapsed > 0 else None,
+        'mean_ms': round(sum(values) / count, 3) if count else None,
+        'p50_ms': round(percentile(values, 0.50), 3) if count else None,
+        'p95_ms': round(percentile(values, 0.95), 3) if count else None,
+        'p99_ms': round(percentile(values, 0.99), 3) if count else None,
+        'max_ms': round(values[-1], 3) if count else None
+    }
+
+
+class BenchmarkContext:
+    """一个数据集上的基准测试状态"""
+
+    def __init__(self, client, document, seed):
+        self.client = client
+        self.rng = random.Random(seed)
+        self.existing_ids = [config['id'] for config in document['configs']]
+        self.created_ids = []
+        self.job_ids = []
+        self.counter = 0
+
+    def next_profile(self):
+        """生成一个用于创建/导入的新配置"""
+        self.counter += 1
+        config = make_config(self.rng, self.counter, datetime(2025, 6, 1))
+        config['name'] = f'Bench profile {self.counter}'
+        return config
+
+    def any_id(self):
+        return self.rng.choice(self.created_ids or self.existing_ids)
+
+    def take_created_id(self):
+        """取出一个由基准测试创建的配置 id（用于删除），没有时先创建一个"""
+        if not self.created_ids:
+            response = self.client.post('/api/configs', json=self.next_profile())
+            self.created_ids.append(response.get_json()['config']['id'])
+        return self.created_ids.pop()
+
+    def submit_job(self):
+        """以后台任务方式提交一次应用配置，返回任务 id"""
+        response = self.client.post(f'/api/configs/{self.any_id()}/apply?async=1')
+        job_id = response.get_json()['job']['id']
+        self.job_ids.append(job_id)
+        return job_id
+
+    def job_id(self):
+        """最近提交的任务 id（用于轮询），没有时先提交一个"""
+        return self.job_ids[-1] if self.job_ids else self.submit_job()
+
+    def cancel_jobs(self):
+        """取消基准测试提交的全部任务，避免排队的任务占满队列"""
+        while self.job_ids:
+            self.client.delete(f'/api/jobs/{self.job_ids.pop()}')
+
+
+def _create(ctx):
+    return 'POST', '/api/configs', ctx.next_profile()
+
+
+def _update(ctx):
+    config = ctx.next_profile()
+    return 'PUT', f'/api/configs/{ctx.any_id()}', config
+
+
+def _import(ctx):
+    return 'POST', '/api/import', {'configs': [ctx.next_profile() for _ in range(10)]}
+
+
+def _validate_batch(ctx):
+    return 'POST', '/api/validate/batch', {'configs': [ctx.next_profile() for _ in range(1000)]}
+
+
+def _import_ndjson(ctx):
+    lines = ''.join(json.dumps(ctx.next_profile()) + '\n' for _ in range(10))
+    return 'POST', '/api/import?format=ndjson', lines
+
+
+def _validate(ctx):
+    return 'POST', '/api/validate', ctx.next_profile()
+
+
+def _apply_async(ctx):
+    # 先取消上一次提交的任务（不计时），测量的是提交本身而不是排队满后的 503
+    ctx.cancel_jobs()
+    return 'POST', f'/api/configs/{ctx.any_id()}/apply?async=1', None
+
+
+def _apply_sse(ctx):
+    return 'POST', f'/api/configs/{ctx.any_id()}/apply', None, {'Accept': 'text/event-stream'}
+
+
+def _cancel_job(ctx):
+    return 'DELETE', f'/api/jobs/{ctx.submit_job()}', None
+
+
+def _reset_bootstrap():
+    """等待上一次页面初始化留下的后台部分结束，并清空探测和环境变量缓存，使下一次初始化从头计算"""
+    from concurrent.futures import wait
+    import services.bootstrap_service as bootstrap_service
+    import services.env_service as env_service
+    from services.capability_service import CapabilityService
+
+    wait(list(bootstrap_service._inflight.values()))
+    CapabilityService.invalidate()
+    env_service.env_snapshot_cache.invalidate()
+
+
+def _cold_bootstrap(wait_seconds=None):
+    """
+    缓存为空时的页面初始化：默认等待时间测量首次响应，
+    较长的 wait 测量全部部分完成的时间
+    """
+    query = '' if wait_seconds is None else f'?wait={wait_seconds}'
+
+    def build(ctx):
+        _reset_bootstrap()
+        return 'GET', f'/api/bootstrap{query}', None
+    return build
+
+
+# (路由标签, 生成请求的函数)；按顺序执行，删除放在最后以消耗前面创建的配置
+# 生成请求的函数返回 (方法, 路径, 请求体) 或 (方法, 路径, 请求体, 请求头)，它本身的耗时不计入测量；
+# 后台任务的路由与对应的同步路由相邻，便于用 --latency 比较
+SCENARIOS = [
+    ('GET /', lambda ctx: ('GET', '/', None)),
+    ('GET /api/check-admin', lambda ctx: ('GET', '/api/check-admin', None)),
+    ('GET /api/bootstrap (cold)', _cold_bootstrap()),
+    ('GET /api/bootstrap?wait=10 (cold)', _cold_bootstrap(10)),
+    ('GET /api/bootstrap', lambda ctx: ('GET', '/api/bootstrap', None)),
+    ('GET /api/test-env-access', lambda ctx: ('GET', '/api/test-env-access', None)),
+    ('GET /api/test-env-access?refresh=1', lambda ctx: ('GET', '/api/test-env-access?refresh=1', None)),
+    ('GET /api/capabilities', lambda ctx: ('GET', '/api/capabilities', None)),
+    ('GET /api/cache-stats', lambda ctx: ('GET', '/api/cache-stats', None)),
+    ('GET /api/configs', lambda ctx: ('GET', '/api/configs', None)),
+    ('GET /api/configs?limit=50', lambda ctx: ('GET', '/api/configs?sort=-createdAt&limit=50&fields=name,AI_model', None)),
+    ('POST /api/configs', _create),
+    ('PUT /api/configs/<id>', _update),
+    ('POST /api/configs/<id>/set-default', lambda ctx: ('POST', f'/api/configs/{ctx.any_id()}/set-default', None)),
+    ('POST /api/configs/<id>/apply', lambda ctx: ('POST', f'/api/configs/{ctx.any_id()}/apply', None)),
+    ('POST /api/configs/<id>/apply (SSE)', _apply_sse),
+    ('POST /api/configs/<id>/apply?async=1', _apply_async),
+    ('GET /api/jobs/<id>', lambda ctx: ('GET', f'/api/jobs/{ctx.job_id()}', None)),
+    ('DELETE /api/jobs/<id>', _cancel_job),
+    ('GET /api/jobs', lambda ctx: ('GET', '/api/jobs', None)),
+    ('POST /api/validate', _validate),
+    ('POST /api/validate/batch', _validate_batch),
+    ('GET /api/env-vars', lambda ctx: ('GET', '/api/env-vars', None)),
+    ('GET /api/env-vars?refresh=1', lambda ctx: ('GET', '/api/env-vars?refresh=1', None)),
+    ('GET /api/env-vars?refresh=1&async=1', lambda ctx: ('GET', '/api/env-vars?refresh=1&async=1', None)),
+    ('GET /api/export', lambda ctx: ('GET', '/api/export', None)),
+    ('GET /api/export?format=ndjson', lambda ctx: ('GET', '/api/export?format=ndjson', None)),
+    ('POST /api/import', _import),
+    ('POST /api/import?format=ndjson', _import_ndjson),
+    ('DELETE /api/configs/<id>', lambda ctx: ('DELETE', f'/api/configs/{ctx.take_created_id()}', None)),
+]
+
+
+def install(store, executor):
+    """让应用使用基准测试的配置存储和模拟执行器"""
+    import models.config as config_model
+    import services.env_service as env_service
+    from services.capability_service import CapabilityService, _probe_env_access
+
+    config_model.config_store = store
+    env_service.env_backend = executor
+    env_service.env_snapshot_cache.invalidate()
+    CapabilityService.register_probe('privilege', lambda: dict(SIMULATED_PRIVILEGE))
+    CapabilityService.register_probe('env_access', _probe_env_access)
+
+
+def run_scenario(ctx, label, build_request, size, max_requests, max_seconds):
+    """重复调用一个路由，直到达到请求数或时间上限"""
+    latencies_ms = []
+    errors = 0
+    failures = 0
+    started = time.perf_counter()
+    deadline = started + max_seconds
+
+    while len(latencies_ms) < max_requests:
+        method, path, body, *headers = build_request(ctx)
+        headers = headers[0] if headers else None
+        request_started = time.perf_counter()
+        if isinstance(body, str):
+            response = ctx.client.open(path, method=method, data=body, headers=headers)
+        else:
+            response = ctx.client.open(path, method=method, json=body, headers=headers)
+        # 流式响应（SSE、NDJSON）读完全部内容才算完成
+        response.get_data()
+        latencies_ms.append((time.perf_counter() - request_started) * 1000)
+
+        if response.status_code >= 400:
+            errors += 1
+        elif response.is_json:
+            payload = response.get_json(silent=True)
+            if isinstance(payload, dict) and payload.get('success') is False:
+                failures += 1
+            if label == 'POST /api/configs' and isinstance(payload, dict) and payload.get('success'):
+                ctx.created_ids.append(payload['config']['id'])
+            if response.status_code == 202 and isinstance(payload, dict) and payload.get('success'):
+                ctx.job_ids.append(payload['job']['id'])
+
+        if time.perf_counter() >= deadline:
+            break
+
+    return summarize(label, size, latencies_ms, errors, failures, time.perf_counter() - started)
+
+
+def run_size(size, args, workdir):
+    """在一个数据集规模上运行全部路由"""
+    from app import create_app
+    from models.config_store import JsonConfigStore, create_config_store
+
+    dataset_path = os.path.join(workdir, f'configs-{size}.json')
+    document = write_dataset(dataset_path, size, seed=args.seed)
+
+    if args.backend == 'sqlite':
+        store = create_config_store('sqlite', os.path.join(workdir, f'configs-{size}.db'))
+        store.save(JsonConfigStore(dataset_path).load())
+    else:
+        store = create_config_store(args.backend, dataset_path)
+
+    executor = SimulatedScriptExecutor(args.latency, args.failure_rate, seed=args.seed)
+    install(store, executor)
+
+    app = create_app()
+    ctx = BenchmarkContext(app.test_client(), document, args.seed)
+    routes = [route.strip() for route in args.routes.split(',')] if args.routes else None
+
+    results = []
+    for label, build_request in SCENARIOS:
+        if routes and label not in routes:
+            continue
+        result = run_scenario(ctx, label, build_request, size, args.requests, args.max_seconds)
+        results.append(result)
+        print(f"  {label:<40} n={result['requests']:<5} "
+              f"{result['throughput'] or 0:>9.1f} req/s  "
+              f"p50={result['p50_ms']:>9.3f}ms  p95={result['p95_ms']:>9.3f}ms  p99={result['p99_ms']:>9.3f}ms")
+
+    ctx.cancel_jobs()
+    store.close()
+    return results
+
+
+def compare(current, previous, threshold):
+    """
+    与之前的结果比较
+
+    Returns:
+        list: 退化的 (size, route) 列表
+    """
+    previous_index = {(item['size'], item['route']): item for item in previous.get('results', [])}
+    regressions = []
+
+    print()
+    print(f"{'size':>7}  {'route':<40} {'p50 change':>11} {'p95 change':>11} {'req/s change':>13}")
+    for item in current['results']:
+        old = previous_index.get((item['size'], item['route']))
+        if not old or not old.get('p95_ms') or not item.get('p95_ms'):
+            continue
+
+        p50_change = (item['p50_ms'] - old['p50_ms']) / old['p50_ms'] if old['p50_ms'] else 0.0
+        p95_change = (item['p95_ms'] - old['p95_ms']) / old['p95_ms']
+        throughput_change = ((item['throughput'] - old['throughput']) / old['throughput']
+                             if old.get('throughput') else 0.0)
+        regressed = p95_change > threshold or throughput_change < -threshold
+        if regressed:
+            regressions.append((item['size'], item['route']))
+
+        print(f"{item['size']:>7}  {item['route']:<40} {p50_change:>+10.1%} {p95_change:>+10.1%} "
+              f"{throughput_change:>+12.1%}{'  REGRESSION' if regressed else ''}")
+
+    return regressions
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='Benchmark the API and service layer')
+    parser.add_argument('--sizes', default='10,1000,10000,100000',
+                        help='comma-separated dataset sizes (number of profiles)')
+    parser.add_argument('--requests', type=int, default=200, help='max requests per route')
+    parser.add_argument('--max-seconds', type=float, default=3.0, help='time budget per route')
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help='simulated script call latency in seconds')
+    parser.add_argument('--failure-rate', type=float, default=0.0,
+                        help='simulated script call failure rate (0-1)')
+    parser.add_argument('--backend', choices=('json', 'journal', 'sqlite'), default='json',
+                        help='config storage backend')
+    parser.add_argument('--routes', help='comma-separated route labels to run (default: all)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT), help='where to write the JSON results')
+    parser.add_argument('--compare', help='previous results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative change treated as a regression (default 0.2 = 20%%)')
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help='exit with status 1 when a regression is found')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'backend': args.backend,
+            'latency': args.latency,
+            'failure_rate': args.failure_rate,
+            'requests': args.requests,
+            'max_seconds': args.max_seconds,
+            'seed': args.seed
+        },
+        'results': []
+    }
+
+    with tempfile.TemporaryDirectory(prefix='cc-switch-bench-') as workdir:
+        for size in sizes:
+            print(f'Dataset: {size} profiles ({args.backend})')
+            report['results'].extend(run_size(size, args, workdir))
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f'\nResults written to {output}')
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        regressions = compare(report, previous, args.threshold)
+        if regressions:
+            print(f'\n{len(regressions)} regression(s) beyond {args.threshold:.0%}')
+            if args.fail_on_regression:
+                return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
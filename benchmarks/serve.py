@@ -0,0 +1,188 @@
+"""
+HTTP 服务器基准测试
+在子进程中分别以开发模式（Flask 开发服务器 + 调试器）和生产模式（core/server.py）启动应用，
+用多个并发 keep-alive 客户端通过真实的 HTTP 连接请求，比较吞吐量和延迟
+
+用法：
+    python -m benchmarks.serve
+    python -m benchmarks.serve --modes production --concurrency 1,8,32 --threads 16
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.datasets import write_dataset
+from benchmarks.run import summarize
+from benchmarks.simulated_executor import SimulatedScriptExecutor
+from core.server import describe_server
+
+
+DEFAULT_OUTPUT = Path(__file__).parent / 'results' / 'serve.json'
+
+ROUTES = ['/api/configs?limit=50', '/api/configs', '/api/env-vars', '/api/capabilities']
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _serve(mode, port, dataset_path, latency, threads, workers):
+    """子进程入口：使用合成数据集和模拟执行器启动服务器"""
+    import logging
+    from werkzeug.serving import run_simple
+    from app import create_app
+    from benchmarks.run import install
+    from models.config_store import create_config_store
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    logging.getLogger('waitress.queue').setLevel(logging.ERROR)
+    install(create_config_store('json', dataset_path), SimulatedScriptExecutor(latency))
+    app = create_app()
+
+    if mode == 'production':
+        from core.server import serve
+        serve(app, '127.0.0.1', port, threads=threads, workers=workers)
+    else:
+        # 与 app.run(debug=True) 相同，但不启用重载器（重载器会再启动一个子进程）
+        run_simple('127.0.0.1', port, app, use_debugger=True, use_reloader=False, threaded=True)
+
+
+def _wait_ready(port, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
+def _client(port, path, deadline, max_requests, latencies, counts, lock):
+    """一个 keep-alive 客户端，循环请求直到时间或请求数用完"""
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    local = []
+    errors = 0
+    while time.perf_counter() < deadline and len(local) < max_requests:
+        started = time.perf_counter()
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors += 1
+            if response.getheader('Connection', '').lower() == 'close':
+                connection.close()
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+        local.append((time.perf_counter() - started) * 1000)
+    connection.close()
+    with lock:
+        latencies.extend(local)
+        counts['errors'] += errors
+
+
+def run_load(port, path, concurrency, max_seconds, max_requests):
+    """以 concurrency 个并发客户端请求 path"""
+    latencies = []
+    counts = {'errors': 0}
+    lock = threading.Lock()
+    started = time.perf_counter()
+    deadline = started + max_seconds
+    clients = [
+        threading.Thread(target=_client, args=(port, path, deadline, max_requests, latencies, counts, lock))
+        for _ in range(concurrency)
+    ]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    return latencies, counts['errors'], time.perf_counter() - started
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='Benchmark development vs production serving')
+    parser.add_argument('--modes', default='development,production', help='comma-separated server modes')
+    parser.add_argument('--size', type=int, default=1000, help='dataset size (number of profiles)')
+    parser.add_argument('--concurrency', default='1,8,32', help='comma-separated client counts')
+    parser.add_argument('--max-seconds', type=float, default=3.0, help='time budget per route and concurrency')
+    parser.add_argument('--requests', type=int, default=2000, help='max requests per client')
+    parser.add_argument('--latency', type=float, default=0.02, help='simulated script call latency in seconds')
+    parser.add_argument('--threads', type=int, default=8, help='production mode threads per worker')
+    parser.add_argument('--workers', type=int, default=1, help='production mode worker processes')
+    parser.add_argument('--routes', help='comma-separated paths (default: %s)' % ','.join(ROUTES))
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT), help='where to write the JSON results')
+    args = parser.parse_args(argv)
+
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+    levels = [int(level) for level in args.concurrency.split(',') if level.strip()]
+    routes = [route.strip() for route in args.routes.split(',')] if args.routes else ROUTES
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'server': describe_server(),
+            'size': args.size,
+            'latency': args.latency,
+            'threads': args.threads,
+            'workers': args.workers,
+            'max_seconds': args.max_seconds
+        },
+        'results': []
+    }
+
+    with tempfile.TemporaryDirectory(prefix='cc-switch-serve-') as workdir:
+        dataset_path = os.path.join(workdir, 'configs.json')
+        write_dataset(dataset_path, args.size)
+
+        for mode in modes:
+            port = _free_port()
+            process = multiprocessing.Process(
+                target=_serve,
+                args=(mode, port, dataset_path, args.latency, args.threads, args.workers),
+                daemon=True
+            )
+            process.start()
+            try:
+                if not _wait_ready(port):
+                    print(f'{mode}: server did not start')
+                    continue
+                print(f'Mode: {mode}')
+                for path in routes:
+                    for concurrency in levels:
+                        latencies, errors, elapsed = run_load(
+                            port, path, concurrency, args.max_seconds, args.requests
+                        )
+                        result = summarize(path, args.size, latencies, errors, 0, elapsed)
+                        result.update(mode=mode, concurrency=concurrency)
+                        report['results'].append(result)
+                        print(f"  {path:<28} c={concurrency:<4} n={result['requests']:<6} "
+                              f"{result['throughput'] or 0:>9.1f} req/s  "
+                              f"p50={result['p50_ms'] or 0:>8.3f}ms  p95={result['p95_ms'] or 0:>8.3f}ms  "
+                              f"errors={errors}")
+            finally:
+                process.terminate()
+                process.join(10)
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f'\nResults written to {output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+模拟脚本执行器
+提供与 ScriptExecutor 相同的环境变量接口，用内存字典代替 PowerShell，
+每次"脚本调用"按配置休眠并按失败率随机失败，用于在没有 PowerShell 的系统上做基准测试
+"""
+import random
+import threading
+import time
+from core.env_backend import EnvBackend
+
+
+class SimulatedScriptExecutor(EnvBackend):
+    """模拟脚本执行器（实现 EnvBackend 接口，可直接替换 EnvService 的后端）"""
+
+    name = 'simulated'
+    method = 'PowerShell Script'
+
+    def __init__(self, latency=0.0, failure_rate=0.0, seed=None):
+        """
+        Args:
+            latency (float): 每次脚本调用的模拟耗时（秒）
+            failure_rate (float): 每次脚本调用失败的概率（0~1）
+            seed (int): 随机数种子，便于多次运行结果可比
+        """
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self.broadcasts = 0
+        self._random = random.Random(seed)
+        self._variables = {'User': {}, 'Machine': {}}
+        self._lock = threading.Lock()
+
+    def _call(self):
+        """模拟一次脚本调用，返回本次调用是否失败"""
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+            return self.failure_rate and self._random.random() < self.failure_rate
+
+    @staticmethod
+    def _failure(message):
+        return {
+            'success': False,
+            'message': message,
+            'error': 'Simulated failure'
+        }
+
+    def set_environment_variable(self, var_name, var_value, scope='User', broadcast=True):
+        """设置环境变量"""
+        if self._call():
+            return self._failure(f"Failed to set environment variable '{var_name}'")
+        with self._lock:
+            self._variables[scope][var_name] = str(var_value)
+        return {
+            'success': True,
+            'message': f"Environment variable '{var_name}' set to '{var_value}' for {scope} scope",
+            'value': str(var_value)
+        }
+
+    def get_environment_variable(self, var_name, scope='User'):
+        """获取环境变量"""
+        if self._call():
+            return self._failure(f"Failed to get environment variable '{var_name}'")
+        with self._lock:
+            value = self._variables[scope].get(var_name, '')
+        return {
+            'success': True,
+            'message': f"Environment variable '{var_name}' retrieved successfully",
+            'value': value
+        }
+
+    def delete_environment_variable(self, var_name, scope='User'):
+        """删除环境变量"""
+        if self._call():
+            return self._failure(f"Failed to delete environment variable '{var_name}'")
+        with self._lock:
+            self._variables[scope].pop(var_name, None)
+        return {
+            'success': True,
+            'message': f"Environment variable '{var_name}' deleted from {scope} scope"
+        }
+
+    def set_environment_variables(self, variables, scope='User', broadcast=True):
+        """批量设置环境变量（一次调用）"""
+        if self._call():
+            message = 'Simulated batch failure'
+            return {
+                'success': False,
+                'message': message,
+                'results': {name: self._failure(message) for name in variables}
+            }
+        results = {}
+        with self._lock:
+            for var_name, var_value in variables.items():
+                self._variables[scope][var_name] = str(var_value)
+                results[var_name] = {
+                    'name': var_name,
+                    'success': True,
+                    'message': f"Environment variable '{var_name}' set to '{var_value}' for {scope} scope",
+                    'value': str(var_value)
+                }
+        return {
+            'success': True,
+            'message': f'{len(results)} of {len(results)} environment variables set for {scope} scope',
+            'results': results,
+            'broadcast': broadcast
+        }
+
+    def get_environment_variables(self, names, scope='User'):
+        """批量获取环境变量（一次调用）"""
+        names = list(names)
+        if self._call():
+            message = 'Simulated batch failure'
+            return {
+                'success': False,
+                'message': message,
+                'results': {name: self._failure(message) for name in names}
+            }
+        with self._lock:
+            results = {
+                name: {
+                    'name': name,
+                    'success': True,
+                    'message': f"Environment variable '{name}' retrieved successfully",
+                    'value': self._variables[scope].get(name, '')
+                }
+                for name in names
+            }
+        return {
+            'success': True,
+            'message': f'{len(results)} of {len(results)} environment variables retrieved',
+            'results': results
+        }
+
+    def list_environment_variables(self, scope='User'):
+        """列出环境变量"""
+        if self._call():
+            return self._failure('Failed to list environment variables')
+        with self._lock:
+            variables = dict(self._variables[scope])
+        return {
+            'success': True,
+            'message': 'Environment variables list retrieved successfully',
+            'variables': variables,
+            'count': len(variables)
+        }
+
+    def broadcast_environment_change(self):
+        """广播环境变更（单独的一次脚本调用）"""
+        if self._call():
+            return False
+        with self._lock:
+            self.broadcasts += 1
+        return True
+
+    def can_modify(self):
+        return True
+
+    def get_host_stats(self):
+        """与 ScriptExecutor 接口保持一致"""
+        return {'enabled': False, 'simulated': True, 'calls': self.calls}
+
+    def get_stats(self):
+        return {'backend': self.name, 'calls': self.calls, 'broadcasts': self.broadcasts}
@@ -0,0 +1,125 @@
+"""
+启动耗时基准测试
+多次启动 python app.py，测量从启动进程到第一个请求成功的时间（time-to-first-response），
+并读取应用自身的启动阶段报告（GET /api/startup）
+
+用法：
+    python -m benchmarks.startup
+    python -m benchmarks.startup --modes production,development --runs 10
+"""
+import argparse
+import http.client
+import json
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DEFAULT_OUTPUT = Path(__file__).parent / 'results' / 'startup.json'
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _get(port, path, timeout):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    try:
+        connection.request('GET', path)
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+
+def measure(mode, path, timeout):
+    """启动一次应用，返回 (首个响应耗时毫秒, 应用的启动阶段报告)"""
+    port = _free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, 'app.py', '--mode', mode, '--host', '127.0.0.1', '--port', str(port)],
+        cwd=str(PROJECT_ROOT),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = started + timeout
+        while time.perf_counter() < deadline:
+            try:
+                status, _ = _get(port, path, timeout)
+                if status < 500:
+                    break
+            except (OSError, http.client.HTTPException):
+                time.sleep(0.005)
+        else:
+            return None, None
+        first_response_ms = (time.perf_counter() - started) * 1000
+
+        _, body = _get(port, '/api/startup', timeout)
+        return first_response_ms, json.loads(body).get('startup')
+    finally:
+        process.send_signal(signal.SIGTERM if hasattr(signal, 'SIGTERM') else signal.SIGINT)
+        try:
+            process.wait(15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='Measure application time-to-first-response')
+    parser.add_argument('--modes', default='production', help='comma-separated server modes')
+    parser.add_argument('--runs', type=int, default=5, help='restarts per mode')
+    parser.add_argument('--path', default='/api/configs?limit=1', help='request used to detect readiness')
+    parser.add_argument('--timeout', type=float, default=30.0, help='seconds to wait for each start')
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT), help='where to write the JSON results')
+    args = parser.parse_args(argv)
+
+    report = {'meta': {'timestamp': datetime.now().isoformat(), 'runs': args.runs, 'path': args.path},
+              'results': []}
+
+    for mode in [mode.strip() for mode in args.modes.split(',') if mode.strip()]:
+        samples = []
+        phases = None
+        for _ in range(args.runs):
+            first_response_ms, startup = measure(mode, args.path, args.timeout)
+            if first_response_ms is not None:
+                samples.append(first_response_ms)
+                phases = startup
+        if not samples:
+            print(f'{mode:<12} did not start within {args.timeout}s')
+            continue
+
+        result = {
+            'mode': mode,
+            'runs': len(samples),
+            'min_ms': round(min(samples), 2),
+            'median_ms': round(statistics.median(samples), 2),
+            'max_ms': round(max(samples), 2),
+            'last_startup_report': phases
+        }
+        report['results'].append(result)
+        print(f"{mode:<12} time-to-first-response  min={result['min_ms']:.1f}ms  "
+              f"median={result['median_ms']:.1f}ms  max={result['max_ms']:.1f}ms")
+        if phases:
+            print('             ' + ', '.join(f"{item['phase']} +{item['delta_ms']:.1f}ms"
+                                          for item in phases['phases']))
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f'\nResults written to {output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,10 +9,142 @@ PROJECT_ROOT = Path(__file__).parent.parent
 # 配置文件路径（修改为项目目录内）
 CONFIG_FILE = PROJECT_ROOT / 'configs.json'
 
+# 配置存储后端
+# 'json'：每次修改整体重写 configs.json
+# 'journal'：修改追加到 configs.json.journal 并分组 fsync，后台定期合并回 configs.json
+# 'sqlite'：保存在 CONFIG_SQLITE_FILE 数据库中（WAL 模式），可用 python -m models.migrate 迁移
+CONFIG_STORAGE_BACKEND = 'json'
+# SQLite 后端的数据库文件
+CONFIG_SQLITE_FILE = PROJECT_ROOT / 'configs.db'
+# 按命名空间（用户或团队）分片的配置存储：/api/ns/<namespace>/... 路由读写该目录下命名空间自己的文件
+# （json / journal 为 <namespace>.json，sqlite 为 <namespace>.db）；不带命名空间的路由使用上面的默认存储
+CONFIG_NAMESPACE_DIR = PROJECT_ROOT / 'namespaces'
+# 同时打开（缓存在内存中）的命名空间存储数量上限，超出时关闭最久未使用的
+CONFIG_NAMESPACE_MAX_OPEN = 32
+# 日志模式下每次修改是否等待 fsync 落盘
+CONFIG_JOURNAL_FSYNC = True
+# 日志模式下后台合并的间隔（秒）
+CONFIG_JOURNAL_COMPACT_INTERVAL = 30
+# 日志超过该字节数时立即触发合并
+CONFIG_JOURNAL_COMPACT_BYTES = 1024 * 1024
+
+# 流式导出时每次从存储读取的配置条数
+EXPORT_CHUNK_SIZE = 500
+# NDJSON 导入时每批提交的配置条数
+IMPORT_BATCH_SIZE = 500
+# NDJSON 导入时单行（解压后）的最大字节数，超过时拒绝导入
+IMPORT_MAX_LINE_BYTES = 1024 * 1024
+# 导入时 id 冲突的默认合并策略：'skip' / 'overwrite' / 'rename' / 'keep-newest'
+# 环境变量内容与已有配置相同的记录总是跳过；可用 ?policy= 按请求指定
+IMPORT_MERGE_POLICY = 'skip'
+
+# 配置校验规则（启动时编译一次）
+# AI_model 允许的模型列表，为空时只检查是否为空
+VALIDATION_MODEL_ALLOWLIST = []
+# CLAUDE_CODE_DISABLE_NONESSENTIAL_TRAFFIC 允许的取值（不区分大小写，空值总是允许）
+VALIDATION_TRAFFIC_VALUES = ['true', 'false']
+
 # 环境变量名称列表
 ENV_VARS = ['ANTHROPIC_AUTH_TOKEN', 'ANTHROPIC_BASE_URL', 'CLAUDE_CODE_DISABLE_NONESSENTIAL_TRAFFIC', 'AI_model']
 
+# 环境变量后端（core/env_backend.py）
+# 'script'：通过 scripts/Set-EnvironmentVariable.ps1 读写（PowerShell 宿主进程或每次启动 PowerShell）
+# 'registry'：在进程内用 winreg 直接读写注册表，不启动子进程（仅 Windows）
+# 'file'：读写 ENV_BACKEND_FILE，不修改真实环境变量，用于 Linux 上的开发和测试
+ENV_BACKEND = 'script'
+# 'file' 后端的 JSON 文件
+ENV_BACKEND_FILE = PROJECT_ROOT / 'env_vars.json'
+
+# 应用配置的执行方式
+# 'batch'：一次后端调用设置全部变量，只广播一次
+# 'sequential'：每个变量一次后端调用，依次执行，最后广播一次
+# 'parallel'：每个变量一次后端调用，在线程池中并发执行，最后广播一次
+APPLY_MODE = 'batch'
+# 应用配置时跳过与当前环境变量快照相同的变量（没有未过期的快照时全部写入）；?force=1 可按请求写入全部变量
+APPLY_ONLY_CHANGED = True
+# 并行模式的最大线程数（实际并发度还受 SCRIPT_HOST_POOL_SIZE 限制）
+APPLY_MAX_WORKERS = 4
+
+# 当前环境变量快照的缓存时间（秒），GET /api/env-vars?refresh=1 可跳过缓存
+ENV_SNAPSHOT_TTL = 30
+
+# 静态资源（CSS/JS），以 /assets/<带内容指纹的文件名> 提供
+STATIC_DIR = PROJECT_ROOT / 'static'
+# 带指纹的静态资源的浏览器缓存时间（秒）；内容变化时文件名随之变化，因此可以长期缓存
+STATIC_ASSET_MAX_AGE = 365 * 24 * 3600
+# 小于该字节数的资源和页面不压缩
+STATIC_COMPRESS_MIN_BYTES = 256
+
+# GET /api/bootstrap 等待各部分完成的最长时间（秒），超时的部分标记为 pending，由前端随后单独请求
+BOOTSTRAP_WAIT_SECONDS = 0.3
+# ?wait= 允许指定的最长等待时间（秒）
+BOOTSTRAP_MAX_WAIT_SECONDS = 10
+
 # Flask配置
 FLASK_HOST = '0.0.0.0'
 FLASK_PORT = 5000
-FLASK_DEBUG = True
\ No newline at end of file
+FLASK_DEBUG = True
+
+# 服务器模式
+# 'development'：Flask 开发服务器（FLASK_DEBUG 决定是否启用调试器和重载器）
+# 'production'：core/server.py 的线程池 WSGI 服务器（安装了 waitress 时使用 waitress）
+# 可用命令行 --mode 或环境变量 SERVER_MODE 覆盖
+SERVER_MODE = 'development'
+# 生产模式下每个工作进程处理请求的线程数
+SERVER_THREADS = 8
+# 生产模式下的工作进程数；大于 1 时需要 os.fork，且只在 sqlite 后端下启用
+# （json / journal 后端的内存缓存和日志写入不能在多个进程间共享）
+SERVER_WORKERS = 1
+# 线程全部忙碌时每个工作进程最多排队的连接数，超出时返回 503
+SERVER_MAX_QUEUE = 64
+# 操作系统监听队列长度
+SERVER_BACKLOG = 128
+# keep-alive 连接的空闲超时（秒，仅 waitress 支持 keep-alive）
+SERVER_KEEPALIVE_TIMEOUT = 5
+# 收到 SIGTERM 后等待处理中请求完成的最长时间（秒）
+SERVER_SHUTDOWN_TIMEOUT = 10
+
+# 后台任务队列（请求带 Prefer: respond-async 或 ?async=1 时，耗时的脚本操作返回 202 和任务 id）
+# 执行任务的线程数
+JOB_WORKERS = 2
+# 排队中（尚未开始）的任务数上限，超出时返回 503
+JOB_MAX_PENDING = 32
+# 已结束任务的保留时间（秒）和最大保留数量
+JOB_RETENTION_SECONDS = 600
+JOB_MAX_RETAINED = 200
+
+# 是否收集请求、脚本调用和配置读写的运行指标，并在 GET /api/metrics 以 Prometheus 文本格式导出
+METRICS_ENABLED = True
+
+# 请求剖析（默认关闭）
+# 开启后带 PROFILING_HEADER 请求头（值为 1、cprofile 或 sampling）的请求会被剖析，
+# 另外按 PROFILING_SAMPLE_RATE 随机剖析一部分请求；同一时间只剖析一个请求
+PROFILING_ENABLED = False
+PROFILING_HEADER = 'X-Profile'
+# 默认剖析方式：'cprofile'（输出 .prof）或 'sampling'（定时采样调用栈，输出 collapsed-stack）
+PROFILING_MODE = 'cprofile'
+# 没有请求头时随机剖析的请求比例（0 到 1）
+PROFILING_SAMPLE_RATE = 0.0
+# 随机剖析的请求耗时低于该值（毫秒）时不保存结果
+PROFILING_MIN_DURATION_MS = 0
+# 'sampling' 方式的采样间隔（秒）
+PROFILING_SAMPLE_INTERVAL = 0.005
+# 剖析结果的输出目录、最多保留的结果数和目录总大小上限（字节），超出时删除最旧的
+PROFILING_DIR = PROJECT_ROOT / 'profiles'
+PROFILING_MAX_FILES = 50
+PROFILING_MAX_BYTES = 50 * 1024 * 1024
+
+# 脚本宿主进程池配置
+# 为 True 时 PowerShell 脚本在常驻宿主进程中执行，避免每次调用都冷启动解释器
+SCRIPT_HOST_ENABLED = True
+# 宿主启动命令，None 表示使用 scripts/ScriptHost.ps1；
+# 在没有 PowerShell 的系统上可替换为 [sys.executable, 'scripts/stub_script_host.py']
+SCRIPT_HOST_COMMAND = None
+# 最多同时运行的宿主进程数
+SCRIPT_HOST_POOL_SIZE = 2
+# 单个宿主执行多少次调用后回收重启
+SCRIPT_HOST_MAX_CALLS = 500
+# 宿主空闲超过该秒数后，复用前先做健康检查
+SCRIPT_HOST_HEALTH_CHECK_INTERVAL = 60
+# 宿主启动失败后，在该秒数内改用单次进程方式执行，之后再次尝试宿主
+SCRIPT_HOST_RETRY_INTERVAL = 30
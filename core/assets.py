@@ -0,0 +1,168 @@
+"""
+静态资源模块
+把 static/ 下的 CSS/JS 按内容生成带指纹的文件名（例如 css/app.3f2a9c1b7d.css），
+在内存中预先压缩为 gzip（安装了 brotli 时同时生成 br），请求时按 Accept-Encoding 选择
+
+- 指纹文件名随内容变化，响应可以设置长期缓存（Cache-Control: immutable）
+- 资源在第一次使用时加载和压缩；开发模式下每次渲染页面前检查源文件，变化后重新加载
+- 页面外壳（渲染后的 index.html）同样用 CompressedBody 预先压缩，并以内容摘要作为 ETag
+"""
+import gzip
+import hashlib
+import os
+import threading
+from pathlib import Path
+from config.settings import STATIC_DIR, STATIC_COMPRESS_MIN_BYTES
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+CONTENT_TYPES = {
+    '.css': 'text/css; charset=utf-8',
+    '.js': 'application/javascript; charset=utf-8',
+    '.html': 'text/html; charset=utf-8',
+    '.svg': 'image/svg+xml',
+    '.png': 'image/png',
+    '.ico': 'image/x-icon'
+}
+
+# 已压缩的格式不再压缩
+COMPRESSIBLE = ('.css', '.js', '.html', '.svg')
+
+# 客户端同时接受时的优先顺序
+ENCODINGS = ('br', 'gzip')
+
+
+class CompressedBody:
+    """一份内容及其预先压缩的各个编码"""
+
+    def __init__(self, data, content_type, compress=True):
+        self.content_type = content_type
+        self.digest = hashlib.sha256(data).hexdigest()[:10]
+        self.bodies = {'identity': data}
+        if compress and len(data) >= STATIC_COMPRESS_MIN_BYTES:
+            self._add('gzip', gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                self._add('br', brotli.compress(data, quality=11))
+
+    def _add(self, encoding, body):
+        # 压缩后没有变小时不提供该编码
+        if len(body) < len(self.bodies['identity']):
+            self.bodies[encoding] = body
+
+    def choose_encoding(self, accept_encodings):
+        """
+        按请求的 Accept-Encoding 选择编码
+
+        Args:
+            accept_encodings: request.accept_encodings
+        """
+        for encoding in ENCODINGS:
+            if encoding in self.bodies and accept_encodings[encoding] > 0:
+                return encoding
+        return 'identity'
+
+    def etag(self, encoding):
+        """每种编码使用不同的 ETag（同一个 URL 的不同表示）"""
+        return self.digest if encoding == 'identity' else f'{self.digest}-{encoding}'
+
+
+class Asset(CompressedBody):
+    """static/ 下的一个文件"""
+
+    def __init__(self, name, path):
+        """
+        Args:
+            name (str): 相对 static/ 的路径，例如 'css/app.css'
+            path (Path): 源文件路径
+        """
+        suffix = path.suffix.lower()
+        with open(path, 'rb') as f:
+            data = f.read()
+        super().__init__(data, CONTENT_TYPES.get(suffix, 'application/octet-stream'), suffix in COMPRESSIBLE)
+        self.name = name
+        self.mtime = os.stat(path).st_mtime_ns
+        stem, _ = os.path.splitext(name)
+        self.fingerprinted_name = f'{stem}.{self.digest}{suffix}'
+
+
+class StaticAssets:
+    """static/ 下全部资源的清单"""
+
+    def __init__(self, directory, url_prefix='/assets/'):
+        self.directory = Path(directory)
+        self.url_prefix = url_prefix
+        self._by_name = {}
+        self._by_fingerprint = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._version = None
+
+    def _scan(self):
+        """源文件列表：{相对路径: mtime}"""
+        files = {}
+        if not self.directory.is_dir():
+            return files
+        for path in self.directory.rglob('*'):
+            if path.is_file() and path.suffix.lower() in CONTENT_TYPES:
+                files[path.relative_to(self.directory).as_posix()] = path.stat().st_mtime_ns
+        return files
+
+    def load(self):
+        """加载并压缩全部资源"""
+        by_name = {}
+        for name in sorted(self._scan()):
+            by_name[name] = Asset(name, self.directory / name)
+        with self._lock:
+            self._by_name = by_name
+            self._by_fingerprint = {asset.fingerprinted_name: asset for asset in by_name.values()}
+            self._version = hashlib.sha256(
+                ''.join(asset.fingerprinted_name for asset in by_name.values()).encode('utf-8')
+            ).hexdigest()[:10]
+            self._loaded = True
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    @property
+    def version(self):
+        """全部资源指纹的摘要，任何资源变化时随之变化"""
+        self._ensure_loaded()
+        return self._version
+
+    def reload_if_changed(self):
+        """源文件新增、删除或修改后重新加载（开发模式下每次渲染页面前调用）"""
+        if not self._loaded:
+            self.load()
+            return
+        current = {name: asset.mtime for name, asset in self._by_name.items()}
+        if self._scan() != current:
+            self.load()
+
+    def url_for(self, name):
+        """资源的指纹 URL，找不到时抛出 KeyError"""
+        self._ensure_loaded()
+        return self.url_prefix + self._by_name[name].fingerprinted_name
+
+    def get(self, fingerprinted_name):
+        """按指纹文件名获取资源，不存在（包括内容已变化的旧指纹）时返回 None"""
+        self._ensure_loaded()
+        return self._by_fingerprint.get(fingerprinted_name)
+
+
+_static_assets = None
+_static_assets_lock = threading.Lock()
+
+
+def get_static_assets():
+    """获取全局静态资源清单（首次使用时加载和压缩）"""
+    global _static_assets
+    if _static_assets is None:
+        with _static_assets_lock:
+            if _static_assets is None:
+                _static_assets = StaticAssets(STATIC_DIR)
+    return _static_assets
@@ -0,0 +1,440 @@
+"""
+环境变量后端模块
+EnvService 通过 EnvBackend 读写用户/系统环境变量，可在 config/settings.py 的 ENV_BACKEND 中选择实现：
+
+- 'script'：调用 scripts/Set-EnvironmentVariable.ps1（常驻宿主进程或每次启动 PowerShell），原有方式
+- 'registry'：在进程内用 winreg 直接读写注册表，用 SendMessageTimeout 广播环境变更（仅 Windows）
+- 'file'：读写 JSON 文件，不影响真实环境变量，用于 Linux 上的开发和测试
+
+所有实现的返回结构与脚本相同：单个操作返回 {'success', 'message', 'value'}，
+批量操作返回 {'success', 'message', 'results': {变量名: 单个结果}}
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from config.settings import ENV_BACKEND, ENV_BACKEND_FILE
+from core.permissions import can_modify_user_env
+
+try:
+    import winreg
+except ImportError:
+    winreg = None
+
+
+ENV_BACKENDS = ('script', 'registry', 'file')
+
+ENV_SCOPES = ('User', 'Machine')
+
+
+def _failure(message, error=None):
+    return {'success': False, 'message': message, 'error': error or message}
+
+
+class EnvBackend:
+    """环境变量后端接口"""
+
+    name = None
+    # 结果中 'method' 字段的取值
+    method = None
+
+    def set_environment_variable(self, var_name, var_value, scope='User', broadcast=True):
+        """
+        设置环境变量
+
+        Args:
+            broadcast (bool): 是否立即广播环境变更；批量修改时传 False，最后调用一次 broadcast_environment_change()
+        """
+        raise NotImplementedError
+
+    def get_environment_variable(self, var_name, scope='User'):
+        """获取环境变量，不存在时 value 为空字符串"""
+        raise NotImplementedError
+
+    def delete_environment_variable(self, var_name, scope='User'):
+        """删除环境变量"""
+        raise NotImplementedError
+
+    def list_environment_variables(self, scope='User'):
+        """列出环境变量，结果中 variables 为变量名到值的映射"""
+        raise NotImplementedError
+
+    def broadcast_environment_change(self):
+        """通知正在运行的程序环境变量已变更（WM_SETTINGCHANGE），返回是否成功"""
+        raise NotImplementedError
+
+    def set_environment_variables(self, variables, scope='User', broadcast=True):
+        """批量设置环境变量，全部写入后最多广播一次"""
+        results = {}
+        for var_name, var_value in variables.items():
+            result = dict(self.set_environment_variable(var_name, var_value, scope, broadcast=False))
+            result['name'] = var_name
+            results[var_name] = result
+
+        succeeded = sum(1 for result in results.values() if result.get('success'))
+        sent = broadcast and succeeded > 0 and self.broadcast_environment_change()
+        return {
+            'success': succeeded == len(results),
+            'message': f'{succeeded} of {len(results)} environment variables set for {scope} scope',
+            'results': results,
+            'broadcast': bool(sent)
+        }
+
+    def get_environment_variables(self, names, scope='User'):
+        """批量获取环境变量"""
+        results = {}
+        for var_name in names:
+            result = dict(self.get_environment_variable(var_name, scope))
+            result['name'] = var_name
+            results[var_name] = result
+
+        succeeded = sum(1 for result in results.values() if result.get('success'))
+        return {
+            'success': succeeded == len(results),
+            'message': f'{succeeded} of {len(results)} environment variables retrieved',
+            'results': results
+        }
+
+    def can_modify(self):
+        """当前进程能否修改用户环境变量（用于权限探测）"""
+        return can_modify_user_env()
+
+    def get_stats(self):
+        """后端统计信息"""
+        return {'backend': self.name}
+
+    def shutdown(self):
+        """释放后端持有的资源"""
+
+
+class ScriptEnvBackend(EnvBackend):
+    """通过 Set-EnvironmentVariable.ps1 读写环境变量"""
+
+    name = 'script'
+    method = 'PowerShell Script'
+
+    def __init__(self, executor=None):
+        """
+        Args:
+            executor (ScriptExecutor): 脚本执行器，默认使用全局执行器（首次使用时创建）
+        """
+        self._executor = executor
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            from core.script_executor import get_script_executor
+            self._executor = get_script_executor()
+        return self._executor
+
+    def set_environment_variable(self, var_name, var_value, scope='User', broadcast=True):
+        return self.executor.set_environment_variable(var_name, var_value, scope, broadcast)
+
+    def get_environment_variable(self, var_name, scope='User'):
+        return self.executor.get_environment_variable(var_name, scope)
+
+    def delete_environment_variable(self, var_name, scope='User'):
+        return self.executor.delete_environment_variable(var_name, scope)
+
+    def list_environment_variables(self, scope='User'):
+        return self.executor.list_environment_variables(scope)
+
+    def broadcast_environment_change(self):
+        return bool(self.executor.broadcast_environment_change().get('success'))
+
+    def set_environment_variables(self, variables, scope='User', broadcast=True):
+        # 一次脚本调用写入全部变量
+        return self.executor.set_environment_variables(variables, scope, broadcast)
+
+    def get_environment_variables(self, names, scope='User'):
+        return self.executor.get_environment_variables(names, scope)
+
+    def get_stats(self):
+        stats = self.executor.get_host_stats()
+        stats['backend'] = self.name
+        return stats
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+
+
+class RegistryEnvBackend(EnvBackend):
+    """在进程内直接读写注册表（仅 Windows），不启动任何子进程"""
+
+    name = 'registry'
+    method = 'Registry'
+
+    SUBKEYS = {
+        'User': 'Environment',
+        'Machine': r'SYSTEM\CurrentControlSet\Control\Session Manager\Environment'
+    }
+
+    # SendMessageTimeout 参数
+    HWND_BROADCAST = 0xFFFF
+    WM_SETTINGCHANGE = 0x001A
+    SMTO_ABORTIFHUNG = 0x0002
+    BROADCAST_TIMEOUT_MS = 5000
+
+    def __init__(self):
+        if winreg is None:
+            raise RuntimeError("The 'registry' environment backend needs Windows (winreg)")
+
+    def _open(self, scope, access):
+        root = winreg.HKEY_CURRENT_USER if scope == 'User' else winreg.HKEY_LOCAL_MACHINE
+        return winreg.OpenKey(root, self.SUBKEYS[scope], 0, access)
+
+    def set_environment_variable(self, var_name, var_value, scope='User', broadcast=True):
+        if scope not in ENV_SCOPES:
+            return _failure(f'Invalid scope: {scope}')
+        var_value = str(var_value)
+        try:
+            with self._open(scope, winreg.KEY_READ | winreg.KEY_WRITE) as key:
+                try:
+                    value_type = winreg.QueryValueEx(key, var_name)[1]
+                except FileNotFoundError:
+                    value_type = winreg.REG_SZ
+                # 只保留字符串类型（REG_EXPAND_SZ），其他类型（例如 REG_DWORD）改写为 REG_SZ
+                if value_type not in (winreg.REG_SZ, winreg.REG_EXPAND_SZ):
+                    value_type = winreg.REG_SZ
+                winreg.SetValueEx(key, var_name, 0, value_type, var_value)
+        except (OSError, TypeError, ValueError) as e:
+            return _failure(f"Failed to set environment variable '{var_name}': {e}", str(e))
+
+        if broadcast:
+            self.broadcast_environment_change()
+        return {
+            'success': True,
+            'message': f"Environment variable '{var_name}' set to '{var_value}' for {scope} scope",
+            'value': var_value
+        }
+
+    def get_environment_variable(self, var_name, scope='User'):
+        if scope not in ENV_SCOPES:
+            return _failure(f'Invalid scope: {scope}')
+        try:
+            with self._open(scope, winreg.KEY_READ) as key:
+                try:
+                    value = winreg.QueryValueEx(key, var_name)[0]
+                except FileNotFoundError:
+                    value = ''
+        except OSError as e:
+            return _failure(f"Failed to get environment variable '{var_name}': {e}", str(e))
+        return {
+            'success': True,
+            'message': f"Environment variable '{var_name}' retrieved successfully",
+            'value': '' if value is None else str(value)
+        }
+
+    def delete_environment_variable(self, var_name, scope='User'):
+        if scope not in ENV_SCOPES:
+            return _failure(f'Invalid scope: {scope}')
+        try:
+            with self._open(scope, winreg.KEY_WRITE) as key:
+                try:
+                    winreg.DeleteValue(key, var_name)
+                except FileNotFoundError:
+                    pass
+        except OSError as e:
+            return _failure(f"Failed to delete environment variable '{var_name}': {e}", str(e))
+        self.broadcast_environment_change()
+        return {
+            'success': True,
+            'message': f"Environment variable '{var_name}' deleted from {scope} scope"
+        }
+
+    def list_environment_variables(self, scope='User'):
+        if scope not in ENV_SCOPES:
+            return _failure(f'Invalid scope: {scope}')
+        variables = {}
+        try:
+            with self._open(scope, winreg.KEY_READ) as key:
+                index = 0
+                while True:
+                    try:
+                        name, value, _ = winreg.EnumValue(key, index)
+                    except OSError:
+                        break
+                    variables[name] = value
+                    index += 1
+        except OSError as e:
+            return _failure(f'Failed to list environment variables: {e}', str(e))
+        return {
+            'success': True,
+            'message': 'Environment variables list retrieved successfully',
+            'variables': variables,
+            'count': len(variables)
+        }
+
+    def broadcast_environment_change(self):
+        import ctypes
+        from ctypes import wintypes
+
+        result = wintypes.DWORD()
+        sent = ctypes.windll.user32.SendMessageTimeoutW(
+            self.HWND_BROADCAST, self.WM_SETTINGCHANGE, 0, 'Environment',
+            self.SMTO_ABORTIFHUNG, self.BROADCAST_TIMEOUT_MS, ctypes.byref(result)
+        )
+        return bool(sent)
+
+
+class FileEnvBackend(EnvBackend):
+    """把环境变量保存在 JSON 文件中（不修改真实环境变量），广播只计数"""
+
+    name = 'file'
+    method = 'JSON File'
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.broadcasts = 0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        for scope in ENV_SCOPES:
+            if not isinstance(state.get(scope), dict):
+                state[scope] = {}
+        return state
+
+    def _save(self, state):
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
+
+    def set_environment_variable(self, var_name, var_value, scope='User', broadcast=True):
+        result = self.set_environment_variables({var_name: var_value}, scope, broadcast)
+        if not result['success']:
+            return _failure(result['message'], result.get('error'))
+        item = dict(result['results'][var_name])
+        item.pop('name')
+        return item
+
+    def set_environment_variables(self, variables, scope='User', broadcast=True):
+        # 一次读写文件完成整批修改
+        if scope not in ENV_SCOPES:
+            message = f'Invalid scope: {scope}'
+            return {'success': False, 'message': message, 'error': message,
+                    'results': {name: dict(_failure(message), name=name) for name in variables}}
+        variables = {name: str(value) for name, value in variables.items()}
+        try:
+            with self._lock:
+                state = self._load()
+                state[scope].update(variables)
+                self._save(state)
+        except OSError as e:
+            message = f'Failed to write {self.path}: {e}'
+            return {'success': False, 'message': message, 'error': str(e),
+                    'results': {name: dict(_failure(message, str(e)), name=name) for name in variables}}
+
+        if broadcast and variables:
+            self.broadcast_environment_change()
+        return {
+            'success': True,
+            'message': f'{len(variables)} of {len(variables)} environment variables set for {scope} scope',
+            'results': {
+                name: {
+                    'name': name,
+                    'success': True,
+                    'message': f"Environment variable '{name}' set to '{value}' for {scope} scope",
+                    'value': value
+                }
+                for name, value in variables.items()
+            },
+            'broadcast': bool(broadcast and variables)
+        }
+
+    def get_environment_variable(self, var_name, scope='User'):
+        if scope not in ENV_SCOPES:
+            return _failure(f'Invalid scope: {scope}')
+        with self._lock:
+            value = self._load()[scope].get(var_name, '')
+        return {
+            'success': True,
+            'message': f"Environment variable '{var_name}' retrieved successfully",
+            'value': value
+        }
+
+    def get_environment_variables(self, names, scope='User'):
+        # 一次读取文件
+        if scope not in ENV_SCOPES:
+            return super().get_environment_variables(names, scope)
+        with self._lock:
+            values = self._load()[scope]
+        results = {
+            name: {
+                'name': name,
+                'success': True,
+                'message': f"Environment variable '{name}' retrieved successfully",
+                'value': values.get(name, '')
+            }
+            for name in names
+        }
+        return {
+            'success': True,
+            'message': f'{len(results)} of {len(results)} environment variables retrieved',
+            'results': results
+        }
+
+    def delete_environment_variable(self, var_name, scope='User'):
+        if scope not in ENV_SCOPES:
+            return _failure(f'Invalid scope: {scope}')
+        try:
+            with self._lock:
+                state = self._load()
+                state[scope].pop(var_name, None)
+                self._save(state)
+        except OSError as e:
+            return _failure(f"Failed to delete environment variable '{var_name}': {e}", str(e))
+        self.broadcast_environment_change()
+        return {
+            'success': True,
+            'message': f"Environment variable '{var_name}' deleted from {scope} scope"
+        }
+
+    def list_environment_variables(self, scope='User'):
+        if scope not in ENV_SCOPES:
+            return _failure(f'Invalid scope: {scope}')
+        with self._lock:
+            variables = self._load()[scope]
+        return {
+            'success': True,
+            'message': 'Environment variables list retrieved successfully',
+            'variables': variables,
+            'count': len(variables)
+        }
+
+    def broadcast_environment_change(self):
+        with self._lock:
+            self.broadcasts += 1
+        return True
+
+    def can_modify(self):
+        directory = self.path.parent
+        if self.path.exists():
+            return os.access(self.path, os.W_OK)
+        return directory.is_dir() and os.access(directory, os.W_OK)
+
+    def get_stats(self):
+        return {'backend': self.name, 'path': str(self.path), 'broadcasts': self.broadcasts}
+
+
+def create_env_backend(backend=ENV_BACKEND, path=None):
+    """
+    按名称创建环境变量后端
+
+    Args:
+        backend (str): 'script' / 'registry' / 'file'
+        path (str): 'file' 后端的文件路径，默认取 ENV_BACKEND_FILE
+    """
+    if backend == 'registry':
+        return RegistryEnvBackend()
+    if backend == 'file':
+        return FileEnvBackend(path or ENV_BACKEND_FILE)
+    if backend == 'script':
+        return ScriptEnvBackend()
+    raise ValueError(f'Unknown environment backend: {backend}')
@@ -0,0 +1,228 @@
+"""
+后台任务队列
+把耗时的脚本操作（应用配置、环境变量读取和访问测试）交给固定数量的工作线程执行，
+请求线程立即返回任务 id，客户端通过 GET /api/jobs/<id> 查询状态和结果
+
+- 排队中的任务数有上限，超出时拒绝提交
+- 相同去重键的任务在排队或执行期间只有一个，重复提交返回已有任务
+- 排队中的任务可直接取消；执行中的任务设置取消标记，由任务函数在合适的位置检查
+- 已结束的任务保留 retention_seconds 秒，最多保留 max_retained 个
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from config.settings import JOB_WORKERS, JOB_MAX_PENDING, JOB_RETENTION_SECONDS, JOB_MAX_RETAINED
+from core.metrics import registry
+
+
+FINISHED_STATES = ('succeeded', 'failed', 'cancelled')
+
+
+class JobQueueFull(Exception):
+    """排队中的任务已达上限"""
+
+
+class Job:
+    """一个后台任务"""
+
+    def __init__(self, kind, key, func):
+        """
+        Args:
+            kind (str): 任务类型，例如 'apply'
+            key: 去重键，None 表示不去重
+            func (callable): 以 func(job) 调用，返回值作为任务结果；可读取 job.cancel_requested、写入 job.progress
+        """
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.key = key
+        self.func = func
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.progress = None
+        self.cancel_requested = False
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        self._started = None
+        self._finished = None
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    def to_dict(self):
+        """任务状态（用于 JSON 响应）"""
+        elapsed_ms = None
+        if self._started is not None:
+            elapsed_ms = round(((self._finished or time.monotonic()) - self._started) * 1000, 2)
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'createdAt': self.created_at,
+            'startedAt': self.started_at,
+            'finishedAt': self.finished_at,
+            'elapsedMs': elapsed_ms,
+            'cancelRequested': self.cancel_requested,
+            'progress': self.progress,
+            'result': self.result,
+            'error': self.error
+        }
+
+
+class JobQueue:
+    """有界的进程内任务队列"""
+
+    def __init__(self, workers=2, max_pending=32, retention_seconds=600, max_retained=200):
+        """
+        Args:
+            workers (int): 执行任务的线程数
+            max_pending (int): 排队中（尚未开始）的任务数上限
+            retention_seconds (float): 已结束任务的保留时间（秒）
+            max_retained (int): 已结束任务的最大保留数量
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self.max_retained = max_retained
+        self._jobs = OrderedDict()
+        self._active_keys = {}
+        self._pending = 0
+        self._running = 0
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def submit(self, kind, key, func):
+        """
+        提交任务
+
+        Returns:
+            tuple: (任务, 是否新建)；相同去重键的任务仍在排队或执行时返回已有任务
+
+        Raises:
+            JobQueueFull: 排队中的任务已达上限
+        """
+        with self._lock:
+            self._prune()
+            existing = self._active_keys.get(key) if key is not None else None
+            if existing is not None and not existing.finished and not existing.cancel_requested:
+                return existing, False
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f'{self._pending} jobs already queued')
+
+            job = Job(kind, key, func)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._active_keys[key] = job
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='job-worker')
+            job.future = self._executor.submit(self._run, job)
+        return job, True
+
+    def _run(self, job):
+        with self._lock:
+            if job.status != 'queued':
+                # 开始前已被取消
+                return
+            job.status = 'running'
+            job.started_at = datetime.now().isoformat()
+            job._started = time.monotonic()
+            self._pending -= 1
+            self._running += 1
+
+        try:
+            result = job.func(job)
+            status = 'cancelled' if job.cancel_requested else 'succeeded'
+            error = None
+        except Exception as e:
+            result, status, error = None, 'failed', str(e)
+
+        with self._lock:
+            job.result = result
+            job.error = error
+            self._running -= 1
+            self._finish(job, status)
+
+    def _finish(self, job, status):
+        """标记任务结束（调用方需持有锁）"""
+        job.status = status
+        job.finished_at = datetime.now().isoformat()
+        job._finished = time.monotonic()
+        if job.key is not None and self._active_keys.get(job.key) is job:
+            del self._active_keys[job.key]
+
+    def _prune(self):
+        """按保留时间和数量上限删除已结束的任务（调用方需持有锁）"""
+        now = time.monotonic()
+        finished = [job for job in self._jobs.values() if job.finished]
+        excess = len(finished) - self.max_retained
+        for job in finished:
+            if excess > 0 or now - job._finished > self.retention_seconds:
+                del self._jobs[job.id]
+                excess -= 1
+
+    def get(self, job_id):
+        """按 id 获取任务，不存在或已过保留期时返回 None"""
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def list(self, limit=50):
+        """最近提交的任务，新的在前"""
+        with self._lock:
+            self._prune()
+            return list(reversed(self._jobs.values()))[:limit]
+
+    def cancel(self, job_id):
+        """
+        取消任务：排队中的任务直接取消，执行中的任务只设置取消标记
+
+        Returns:
+            Job: 任务，不存在时返回 None
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return job
+            job.cancel_requested = True
+            if job.status == 'queued':
+                job.future.cancel()
+                self._pending -= 1
+                self._finish(job, 'cancelled')
+            return job
+
+    def get_stats(self):
+        """队列统计"""
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'pending': self._pending,
+                'running': self._running,
+                'retained': len(self._jobs)
+            }
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """获取全局任务队列（首次使用时创建，工作线程在第一次提交时启动）"""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = JobQueue(JOB_WORKERS, JOB_MAX_PENDING, JOB_RETENTION_SECONDS, JOB_MAX_RETAINED)
+    return _job_queue
+
+
+registry.gauge('ccswitch_jobs_pending', 'Background jobs waiting for a worker.',
+               lambda: _job_queue.get_stats()['pending'] if _job_queue is not None else 0)
+registry.gauge('ccswitch_jobs_running', 'Background jobs currently running.',
+               lambda: _job_queue.get_stats()['running'] if _job_queue is not None else 0)
@@ -0,0 +1,236 @@
+"""
+运行指标模块
+进程内的计数器和直方图，以 Prometheus 文本格式导出（GET /api/metrics）
+
+- 只依赖标准库，每次记录只是在锁内更新几个数字，可以在生产环境常开
+- 标签值应来自有限集合（路由规则、脚本名、动作名），不要使用配置 id 等无界取值
+- 多进程模式下每个工作进程各自统计
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+
+# 延迟直方图的默认桶（秒）
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    """指标基类"""
+
+    type_name = 'untyped'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _check_labels(self, labelvalues):
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {labelvalues}')
+
+    def samples(self):
+        """产出 (样本名后缀, 标签文本, 值)"""
+        raise NotImplementedError
+
+    def render(self):
+        """Prometheus 文本格式"""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.type_name}']
+        for suffix, labels, value in self.samples():
+            lines.append(f'{self.name}{suffix}{labels} {_format_value(value)}')
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """只增不减的计数器"""
+
+    type_name = 'counter'
+
+    def inc(self, *labelvalues, amount=1):
+        """计数增加 amount"""
+        self._check_labels(labelvalues)
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def get(self, *labelvalues):
+        with self._lock:
+            return self._values.get(labelvalues, 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for labelvalues, value in items:
+            yield '', _format_labels(self.labelnames, labelvalues), value
+
+
+class Histogram(Metric):
+    """分桶直方图，记录观测值的分布、总和与次数"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labelvalues):
+        """记录一次观测值"""
+        self._check_labels(labelvalues)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                # [各桶计数（非累计，最后一格为 +Inf）, 总和, 次数]
+                state = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, *labelvalues):
+        """记录代码块的耗时（秒）"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labelvalues)
+
+    def get(self, *labelvalues):
+        """返回 (次数, 总和)"""
+        with self._lock:
+            state = self._values.get(labelvalues)
+            return (state[2], state[1]) if state else (0, 0.0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted((labelvalues, (list(state[0]), state[1], state[2]))
+                           for labelvalues, state in self._values.items())
+        bounds = self.buckets + (float('inf'),)
+        for labelvalues, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                yield '_bucket', _format_labels(self.labelnames, labelvalues, le), cumulative
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield '_sum', labels, total
+            yield '_count', labels, count
+
+
+class Gauge(Metric):
+    """在导出时通过回调取值的瞬时值指标"""
+
+    type_name = 'gauge'
+
+    def __init__(self, name, help_text, callback):
+        super().__init__(name, help_text)
+        self.callback = callback
+
+    def samples(self):
+        yield '', '', self.callback()
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f'Metric {metric.name} already registered with a different type or labels')
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        """注册（或获取已注册的）计数器"""
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """注册（或获取已注册的）直方图"""
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def gauge(self, name, help_text, callback):
+        """注册瞬时值指标"""
+        return self._register(Gauge(name, help_text, callback))
+
+    def render(self):
+        """所有指标的 Prometheus 文本格式"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+# 全局注册表
+registry = MetricsRegistry()
+
+PROCESS_START_TIME = time.time()
+
+registry.gauge('ccswitch_process_start_time_seconds', 'Start time of the process since unix epoch in seconds.',
+               lambda: PROCESS_START_TIME)
+
+HTTP_REQUESTS = registry.counter(
+    'ccswitch_http_requests_total', 'HTTP requests handled, by route and status.',
+    ('method', 'route', 'status')
+)
+HTTP_REQUEST_DURATION = registry.histogram(
+    'ccswitch_http_request_duration_seconds',
+    'Time from request start until the view returned its response, by route.',
+    ('method', 'route')
+)
+
+SCRIPT_CALLS = registry.counter(
+    'ccswitch_script_calls_total',
+    'Script executions by script, action, runner and outcome (ok, failed, timeout, error).',
+    ('script', 'action', 'runner', 'outcome')
+)
+SCRIPT_DURATION = registry.histogram(
+    'ccswitch_script_duration_seconds', 'Script execution latency.',
+    ('script', 'action', 'runner')
+)
+SCRIPT_SPAWNS = registry.counter(
+    'ccswitch_script_spawns_total',
+    'Interpreter processes started (one per call for the process runner, one per host for the host pool).',
+    ('runner',)
+)
+
+CONFIG_MODEL_DURATION = registry.histogram(
+    'ccswitch_config_model_duration_seconds', 'ConfigModel load and save latency.',
+    ('operation',)
+)
+CONFIG_FILE_BYTES = registry.counter(
+    'ccswitch_config_file_bytes_total', 'Bytes read from or written to the config storage files.',
+    ('operation', 'file')
+)
+CONFIG_FILE_DURATION = registry.histogram(
+    'ccswitch_config_file_duration_seconds', 'Config storage file read and write latency.',
+    ('operation', 'file')
+)
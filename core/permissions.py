@@ -63,25 +63,38 @@ def request_admin_privilege(script_path=None):
         return True
 
 
-def get_current_privilege_level():
-    """获取当前权限级别的描述"""
+def get_current_privilege_level(can_modify_env=None):
+    """
+    获取当前权限级别的描述
+
+    Args:
+        can_modify_env (bool): 已知的环境变量修改权限，None 时检查注册表
+    """
+    if can_modify_env is None:
+        can_modify_env = can_modify_user_env()
     if is_admin():
         return "Administrator"
-    elif can_modify_user_env():
+    elif can_modify_env:
         return "User (can modify environment variables)"
     else:
         return "Limited User"
 
 
-def check_runtime_privilege():
-    """运行时权限检查，返回权限信息和建议"""
+def check_runtime_privilege(env_modify_status=None):
+    """
+    运行时权限检查，返回权限信息和建议
+
+    Args:
+        env_modify_status (bool): 由环境变量后端给出的修改权限，None 时检查注册表
+    """
     admin_status = is_admin()
-    env_modify_status = can_modify_user_env()
+    if env_modify_status is None:
+        env_modify_status = can_modify_user_env()
 
     return {
         'is_admin': admin_status,
         'can_modify_env': env_modify_status,
-        'level': get_current_privilege_level(),
+        'level': get_current_privilege_level(env_modify_status),
         'recommendations': get_privilege_recommendations(admin_status, env_modify_status)
     }
 
@@ -0,0 +1,298 @@
+"""
+请求级性能剖析模块
+在设置中开启后，按请求头或采样率对单个请求做剖析，结果写入 PROFILING_DIR
+
+- 'cprofile' 模式：用 cProfile 记录函数调用，输出 .prof（可用 snakeviz、pstats 查看）
+- 'sampling' 模式：后台线程定时采样请求线程的调用栈，输出 collapsed-stack 文本
+  （每行 "帧;帧;帧 次数"，可直接交给 flamegraph.pl / speedscope）
+- 每个剖析结果附带一个 .json，记录路由、状态码、墙钟耗时、CPU 耗时和等待脚本子进程的时间，
+  用来区分阻塞时间和 CPU 时间
+- 只记录被剖析请求自己的脚本调用：剖析过程保存在 ContextVar 中，请求线程以及复制了其上下文
+  的线程（例如并行应用的线程池任务）能看到它，其他并发请求的调用不会计入
+- 同一时间只剖析一个请求（Python 3.12 起一个进程只能有一个活动的 cProfile），其他请求照常处理
+- 目录中的剖析结果超过数量或总大小上限时删除最旧的
+"""
+import contextvars
+import cProfile
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from config.settings import (
+    PROFILING_DIR, PROFILING_MODE, PROFILING_SAMPLE_RATE, PROFILING_MIN_DURATION_MS,
+    PROFILING_MAX_FILES, PROFILING_MAX_BYTES, PROFILING_SAMPLE_INTERVAL
+)
+
+
+PROFILING_MODES = ('cprofile', 'sampling')
+
+RESULT_SUFFIXES = ('.prof', '.collapsed', '.json')
+
+# 当前上下文（被剖析的请求及其复制上下文的任务）的剖析过程
+_current_session = contextvars.ContextVar('profile_session', default=None)
+
+
+class ProfileSession:
+    """一个请求的剖析过程"""
+
+    def __init__(self, mode, method, route, sample_interval=0.005):
+        self.id = uuid.uuid4().hex[:8]
+        self.mode = mode
+        self.method = method
+        self.route = route
+        self.sample_interval = sample_interval
+        self.thread_id = threading.get_ident()
+        self.status = None
+        self.script_calls = []
+        self._profiler = None
+        self._sampler = None
+        self._stacks = {}
+        self._stopped = threading.Event()
+        self._token = None
+        self.active = False
+
+    def start(self):
+        self._token = _current_session.set(self)
+        self.active = True
+        self._wall_started = time.perf_counter()
+        self._cpu_started = time.thread_time()
+        if self.mode == 'cprofile':
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._sampler = threading.Thread(target=self._sample_loop, name='profile-sampler', daemon=True)
+            self._sampler.start()
+
+    def stop(self):
+        self.active = False
+        try:
+            _current_session.reset(self._token)
+        except ValueError:
+            # 在另一个上下文中结束（不应发生），至少不让复用的请求线程继续带着它
+            _current_session.set(None)
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self._sampler is not None:
+            self._stopped.set()
+            self._sampler.join()
+        self.wall_seconds = time.perf_counter() - self._wall_started
+        self.cpu_seconds = time.thread_time() - self._cpu_started
+
+    def _sample_loop(self):
+        """定时读取请求线程的调用栈并计数"""
+        while not self._stopped.wait(self.sample_interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+                frame = frame.f_back
+            key = ';'.join(reversed(stack))
+            self._stacks[key] = self._stacks.get(key, 0) + 1
+
+    def record_script(self, script, action, runner, seconds):
+        """记录剖析期间请求（或它启动的任务）的一次脚本调用"""
+        if not self.active:
+            return
+        self.script_calls.append({
+            'script': script,
+            'action': action,
+            'runner': runner,
+            'ms': round(seconds * 1000, 3),
+            'thread': threading.current_thread().name,
+            'request_thread': threading.get_ident() == self.thread_id
+        })
+
+    def summary(self):
+        """剖析结果的元数据"""
+        script_wait = sum(call['ms'] for call in self.script_calls if call['request_thread'])
+        wall_ms = self.wall_seconds * 1000
+        cpu_ms = self.cpu_seconds * 1000
+        return {
+            'id': self.id,
+            'mode': self.mode,
+            'method': self.method,
+            'route': self.route,
+            'status': self.status,
+            'wall_ms': round(wall_ms, 3),
+            'cpu_ms': round(cpu_ms, 3),
+            'script_wait_ms': round(script_wait, 3),
+            # 请求线程上既不是 CPU 也不是等待脚本的时间（锁、磁盘 I/O、网络等）
+            'other_wait_ms': round(max(0.0, wall_ms - cpu_ms - script_wait), 3),
+            'script_calls': self.script_calls,
+            'samples': sum(self._stacks.values()) if self.mode == 'sampling' else None
+        }
+
+    def write(self, directory, stem):
+        """写入剖析结果，返回写入的文件列表"""
+        if self.mode == 'cprofile':
+            data_path = directory / f'{stem}.prof'
+            self._profiler.dump_stats(str(data_path))
+        else:
+            data_path = directory / f'{stem}.collapsed'
+            with open(data_path, 'w', encoding='utf-8') as f:
+                for stack, count in sorted(self._stacks.items()):
+                    f.write(f'{stack} {count}\n')
+
+        meta_path = directory / f'{stem}.json'
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+        return [data_path, meta_path]
+
+
+class RequestProfiler:
+    """按请求决定是否剖析，并管理输出目录"""
+
+    def __init__(self, directory, mode='cprofile', sample_rate=0.0, min_duration_ms=0,
+                 max_files=50, max_bytes=50 * 1024 * 1024, sample_interval=0.005):
+        """
+        Args:
+            directory (str): 输出目录
+            mode (str): 默认剖析方式，'cprofile' 或 'sampling'
+            sample_rate (float): 没有请求头时随机剖析的请求比例（0 到 1）
+            min_duration_ms (float): 按采样率剖析的请求耗时低于该值时丢弃结果
+            max_files (int): 保留的剖析结果数量上限
+            max_bytes (int): 输出目录总大小上限
+            sample_interval (float): 'sampling' 模式的采样间隔（秒）
+        """
+        if mode not in PROFILING_MODES:
+            raise ValueError(f'Unknown profiling mode: {mode}')
+        self.directory = Path(directory)
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.min_duration_ms = min_duration_ms
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.sample_interval = sample_interval
+        self._busy = threading.Lock()
+        self._prune_lock = threading.Lock()
+
+    def choose_mode(self, header_value, sample):
+        """
+        根据请求头决定剖析方式，不剖析时返回 None
+
+        Args:
+            header_value (str): 请求头的值，'1' 使用默认方式，也可以直接指定 'cprofile' / 'sampling'
+            sample (float): [0, 1) 之间的随机数，用于按采样率选择
+        """
+        if header_value:
+            value = header_value.strip().lower()
+            if value in PROFILING_MODES:
+                return value
+            if value in ('1', 'true', 'yes'):
+                return self.mode
+        if self.sample_rate and sample < self.sample_rate:
+            return self.mode
+        return None
+
+    def start(self, mode, method, route):
+        """开始剖析当前线程的请求，已有请求在剖析时返回 None"""
+        if not self._busy.acquire(blocking=False):
+            return None
+        try:
+            session = ProfileSession(mode, method, route, self.sample_interval)
+            session.start()
+            return session
+        except BaseException:
+            self._busy.release()
+            raise
+
+    def finish(self, session, sampled=False):
+        """
+        结束剖析并写入结果
+
+        Args:
+            session (ProfileSession): start() 返回的剖析过程
+            sampled (bool): 是否按采样率触发（只有这种情况才按 min_duration_ms 丢弃）
+
+        Returns:
+            list: 写入的文件，没有写入时为空列表
+        """
+        try:
+            session.stop()
+        finally:
+            self._busy.release()
+
+        duration_ms = session.wall_seconds * 1000
+        if sampled and duration_ms < self.min_duration_ms:
+            return []
+
+        stem = '{}-{}-{}-{:.0f}ms-{}'.format(
+            time.strftime('%Y%m%d-%H%M%S'),
+            session.method,
+            re.sub(r'[^A-Za-z0-9]+', '_', session.route).strip('_') or 'root',
+            duration_ms,
+            session.id
+        )
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            files = session.write(self.directory, stem)
+        except OSError as e:
+            print(f"Failed to write profile {stem}: {e}")
+            return []
+        self.prune()
+        return files
+
+    def prune(self):
+        """按数量和总大小上限删除最旧的剖析结果"""
+        with self._prune_lock:
+            groups = {}
+            try:
+                entries = list(os.scandir(self.directory))
+            except OSError:
+                return
+            for entry in entries:
+                stem, suffix = os.path.splitext(entry.name)
+                if suffix not in RESULT_SUFFIXES or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                group = groups.setdefault(stem, {'mtime': stat.st_mtime, 'size': 0, 'paths': []})
+                group['mtime'] = min(group['mtime'], stat.st_mtime)
+                group['size'] += stat.st_size
+                group['paths'].append(entry.path)
+
+            ordered = sorted(groups.values(), key=lambda group: group['mtime'])
+            total = sum(group['size'] for group in ordered)
+            while ordered and (len(ordered) > self.max_files or total > self.max_bytes):
+                group = ordered.pop(0)
+                total -= group['size']
+                for path in group['paths']:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler():
+    """获取全局剖析器（按 config/settings.py 中的 PROFILING_* 创建）"""
+    global _profiler
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                _profiler = RequestProfiler(
+                    PROFILING_DIR,
+                    mode=PROFILING_MODE,
+                    sample_rate=PROFILING_SAMPLE_RATE,
+                    min_duration_ms=PROFILING_MIN_DURATION_MS,
+                    max_files=PROFILING_MAX_FILES,
+                    max_bytes=PROFILING_MAX_BYTES,
+                    sample_interval=PROFILING_SAMPLE_INTERVAL
+                )
+    return _profiler
+
+
+def record_script(script, action, runner, seconds):
+    """脚本执行器在每次调用后调用，当前上下文属于被剖析的请求时记录到它的剖析结果"""
+    session = _current_session.get()
+    if session is not None:
+        session.record_script(script, action, runner, seconds)
@@ -2,20 +2,95 @@
 脚本执行器模块
 用于调用PowerShell或CMD脚本执行系统级操作
 """
+import atexit
+import base64
 import subprocess
 import json
+import logging
 import os
 import sys
+import threading
+import time
 from pathlib import Path
+from config.settings import (
+    SCRIPT_HOST_ENABLED, SCRIPT_HOST_COMMAND, SCRIPT_HOST_POOL_SIZE,
+    SCRIPT_HOST_MAX_CALLS, SCRIPT_HOST_HEALTH_CHECK_INTERVAL, SCRIPT_HOST_RETRY_INTERVAL
+)
+from core.script_host import (
+    ScriptHostPool, ScriptHostError, ScriptHostTimeout, ScriptHostUnavailable
+)
+from core.metrics import SCRIPT_CALLS, SCRIPT_DURATION, SCRIPT_SPAWNS
+from core import profiling
+
+
+logger = logging.getLogger(__name__)
+
+
+def _script_outcome(result):
+    """把执行结果归类为指标中的 outcome 标签"""
+    if result.get('error') == 'Timeout':
+        return 'timeout'
+    if 'return_code' in result:
+        return 'failed'
+    if result.get('success') is False:
+        return 'error'
+    return 'ok'
 
 
 class ScriptExecutor:
     """脚本执行器，用于执行PowerShell和CMD脚本"""
 
-    def __init__(self):
+    def __init__(self, use_host=None, host_command=None, pool_size=None):
+        """
+        Args:
+            use_host (bool): 是否使用常驻宿主进程池，默认取 SCRIPT_HOST_ENABLED
+            host_command (list): 宿主启动命令，默认取 SCRIPT_HOST_COMMAND
+            pool_size (int): 宿主进程数，默认取 SCRIPT_HOST_POOL_SIZE
+        """
         self.scripts_dir = Path(__file__).parent.parent / 'scripts'
         self.scripts_dir.mkdir(exist_ok=True)
 
+        self.use_host = SCRIPT_HOST_ENABLED if use_host is None else use_host
+        self.host_command = host_command or SCRIPT_HOST_COMMAND or [
+            'powershell',
+            '-NoLogo', '-NoProfile',
+            '-ExecutionPolicy', 'Bypass',
+            '-File', str(self.scripts_dir / 'ScriptHost.ps1')
+        ]
+        self.pool_size = pool_size or SCRIPT_HOST_POOL_SIZE
+        self._host_pool = None
+        self._host_pool_lock = threading.Lock()
+        # 宿主不可用时，在该时刻（time.monotonic）之前改用单次进程方式
+        self._host_retry_at = 0.0
+
+    def _get_host_pool(self):
+        """获取宿主进程池（首次使用时创建）"""
+        if self._host_pool is None:
+            with self._host_pool_lock:
+                if self._host_pool is None:
+                    self._host_pool = ScriptHostPool(
+                        self.host_command,
+                        size=self.pool_size,
+                        max_calls=SCRIPT_HOST_MAX_CALLS,
+                        health_check_interval=SCRIPT_HOST_HEALTH_CHECK_INTERVAL,
+                        cwd=str(self.scripts_dir.parent)
+                    )
+        return self._host_pool
+
+    def get_host_stats(self):
+        """获取宿主进程池统计信息"""
+        if self._host_pool is None:
+            return {'enabled': self.use_host, 'started': False}
+        stats = self._host_pool.get_stats()
+        stats['enabled'] = self.use_host
+        stats['started'] = True
+        return stats
+
+    def shutdown(self):
+        """关闭宿主进程池"""
+        if self._host_pool is not None:
+            self._host_pool.shutdown()
+
     def _normalize_output_keys(self, data):
         """递归地将返回结果的键名统一为小写，便于调用方处理"""
         if isinstance(data, dict):
@@ -28,6 +103,50 @@ class ScriptExecutor:
             return [self._normalize_output_keys(item) for item in data]
         return data
 
+    def _parse_powershell_output(self, stdout):
+        """解析PowerShell脚本输出的JSON，并统一键名大小写"""
+        try:
+            output_data = json.loads(stdout.strip())
+            return self._normalize_output_keys(output_data)
+        except json.JSONDecodeError:
+            return {
+                'success': True,
+                'message': 'Script executed successfully',
+                'output': stdout.strip()
+            }
+
+    def _execute_in_host(self, script_path, parameters, timeout):
+        """
+        在常驻宿主进程中执行PowerShell脚本
+
+        Returns:
+            dict: 执行结果；宿主不可用时返回 None，由调用方退回单次进程方式
+        """
+        try:
+            output = self._get_host_pool().run_script(
+                script_path,
+                {key: str(value) for key, value in (parameters or {}).items()},
+                timeout
+            )
+            return self._parse_powershell_output(output)
+        except ScriptHostTimeout:
+            return {
+                'success': False,
+                'message': f'Script execution timed out after {timeout} seconds',
+                'error': 'Timeout'
+            }
+        except ScriptHostUnavailable as e:
+            logger.warning('Script host unavailable, using one process per call for %ss: %s',
+                           SCRIPT_HOST_RETRY_INTERVAL, e)
+            self._host_retry_at = time.monotonic() + SCRIPT_HOST_RETRY_INTERVAL
+            return None
+        except ScriptHostError as e:
+            return {
+                'success': False,
+                'message': 'Script execution failed',
+                'error': str(e)
+            }
+
     def execute_powershell_script(self, script_name, parameters=None, timeout=30):
         """
         执行PowerShell脚本
@@ -40,14 +159,38 @@ class ScriptExecutor:
         Returns:
             dict: 执行结果
         """
+        started = time.perf_counter()
+        result, runner = self._run_powershell_script(script_name, parameters, timeout)
+        self._record_call(script_name, parameters, runner, result, started)
+        return result
+
+    def _record_call(self, script_name, parameters, runner, result, started):
+        """记录一次脚本调用的耗时和结果"""
+        action = str((parameters or {}).get('Action', ''))
+        elapsed = time.perf_counter() - started
+        SCRIPT_DURATION.observe(elapsed, script_name, action, runner)
+        SCRIPT_CALLS.inc(script_name, action, runner, _script_outcome(result))
+        profiling.record_script(script_name, action, runner, elapsed)
+
+    def _run_powershell_script(self, script_name, parameters, timeout):
+        """执行PowerShell脚本，返回 (执行结果, 执行方式 host/process/none)"""
         script_path = self.scripts_dir / script_name
         if not script_path.exists():
             return {
                 'success': False,
                 'message': f'Script not found: {script_path}',
                 'error': 'File not found'
-            }
+            }, 'none'
 
+        if self.use_host and time.monotonic() >= self._host_retry_at:
+            result = self._execute_in_host(script_path, parameters, timeout)
+            if result is not None:
+                return result, 'host'
+
+        return self._execute_in_process(script_path, parameters, timeout), 'process'
+
+    def _execute_in_process(self, script_path, parameters, timeout):
+        """每次调用启动一个PowerShell进程执行脚本"""
         try:
             # 构建PowerShell命令
             ps_command = [
@@ -62,6 +205,7 @@ class ScriptExecutor:
                     ps_command.extend(['-' + key, str(value)])
 
             # 执行脚本
+            SCRIPT_SPAWNS.inc('process')
             result = subprocess.run(
                 ps_command,
                 capture_output=True,
@@ -72,16 +216,8 @@ class ScriptExecutor:
             )
 
             if result.returncode == 0:
-                try:
-                    # 尝试解析JSON输出，并统一键名大小写
-                    output_data = json.loads(result.stdout.strip())
-                    return self._normalize_output_keys(output_data)
-                except json.JSONDecodeError:
-                    return {
-                        'success': True,
-                        'message': 'Script executed successfully',
-                        'output': result.stdout.strip()
-                    }
+                # 尝试解析JSON输出，并统一键名大小写
+                return self._parse_powershell_output(result.stdout)
             else:
                 return {
                     'success': False,
@@ -115,14 +251,25 @@ class ScriptExecutor:
         Returns:
             dict: 执行结果
         """
+        started = time.perf_counter()
+        result, runner = self._run_cmd_script(script_name, parameters, timeout)
+        self._record_call(script_name, parameters, runner, result, started)
+        return result
+
+    def _run_cmd_script(self, script_name, parameters, timeout):
+        """执行CMD脚本，返回 (执行结果, 执行方式 process/none)"""
         script_path = self.scripts_dir / script_name
         if not script_path.exists():
             return {
                 'success': False,
                 'message': f'Script not found: {script_path}',
                 'error': 'File not found'
-            }
+            }, 'none'
 
+        return self._execute_cmd_in_process(script_path, parameters, timeout), 'process'
+
+    def _execute_cmd_in_process(self, script_path, parameters, timeout):
+        """启动一个CMD进程执行脚本"""
         try:
             # 构建CMD命令
             cmd_command = ['cmd', '/c', str(script_path)]
@@ -134,6 +281,7 @@ class ScriptExecutor:
                     env[key.upper()] = str(value)
 
             # 执行脚本
+            SCRIPT_SPAWNS.inc('process')
             result = subprocess.run(
                 cmd_command,
                 capture_output=True,
@@ -176,7 +324,7 @@ class ScriptExecutor:
                 'error': str(e)
             }
 
-    def set_environment_variable(self, var_name, var_value, scope='User'):
+    def set_environment_variable(self, var_name, var_value, scope='User', broadcast=True):
         """
         设置环境变量
 
@@ -184,19 +332,20 @@ class ScriptExecutor:
             var_name (str): 变量名
             var_value (str): 变量值
             scope (str): 作用域 ('User' 或 'Machine')
+            broadcast (bool): 是否广播环境变更，为 False 时由调用方稍后调用 broadcast_environment_change()
 
         Returns:
             dict: 执行结果
         """
-        return self.execute_powershell_script(
-            'Set-EnvironmentVariable.ps1',
-            {
-                'Name': var_name,
-                'Value': var_value,
-                'Scope': scope,
-                'Action': 'Set'
-            }
-        )
+        parameters = {
+            'Name': var_name,
+            'Value': var_value,
+            'Scope': scope,
+            'Action': 'Set'
+        }
+        if not broadcast:
+            parameters['Broadcast'] = 'False'
+        return self.execute_powershell_script('Set-EnvironmentVariable.ps1', parameters)
 
     def get_environment_variable(self, var_name, scope='User'):
         """
@@ -218,6 +367,81 @@ class ScriptExecutor:
             }
         )
 
+    def _encode_batch_parameter(self, value):
+        """将批量参数编码为Base64的UTF-8 JSON，避免命令行引号和代码页问题"""
+        return base64.b64encode(json.dumps(value, ensure_ascii=False).encode('utf-8')).decode('ascii')
+
+    def _index_batch_results(self, result, names):
+        """
+        将批量动作返回的结果列表整理为以变量名为键的字典
+
+        脚本没有返回某个变量的结果时（例如整个调用失败），用整体错误信息补齐
+        """
+        items = result.get('results') or []
+        if isinstance(items, dict):
+            items = [items]
+
+        indexed = {}
+        for item in items:
+            if isinstance(item, dict) and item.get('name') is not None:
+                indexed[item['name']] = item
+
+        for name in names:
+            if name not in indexed:
+                indexed[name] = {
+                    'name': name,
+                    'success': False,
+                    'message': result.get('message', 'Unknown error')
+                }
+
+        result['results'] = indexed
+        return result
+
+    def set_environment_variables(self, variables, scope='User', broadcast=True):
+        """
+        批量设置环境变量，一次脚本调用、一次环境变更广播
+
+        Args:
+            variables (dict): 变量名到变量值的映射
+            scope (str): 作用域 ('User' 或 'Machine')
+            broadcast (bool): 是否广播环境变更
+
+        Returns:
+            dict: 执行结果，results 为以变量名为键的逐个结果
+        """
+        variables = {name: str(value) for name, value in variables.items()}
+        parameters = {
+            'Variables': self._encode_batch_parameter(variables),
+            'Scope': scope,
+            'Action': 'SetMany'
+        }
+        if not broadcast:
+            parameters['Broadcast'] = 'False'
+        result = self.execute_powershell_script('Set-EnvironmentVariable.ps1', parameters)
+        return self._index_batch_results(result, variables)
+
+    def get_environment_variables(self, names, scope='User'):
+        """
+        批量获取环境变量，一次脚本调用
+
+        Args:
+            names (list): 变量名列表
+            scope (str): 作用域 ('User' 或 'Machine')
+
+        Returns:
+            dict: 执行结果，results 为以变量名为键的逐个结果
+        """
+        names = list(names)
+        result = self.execute_powershell_script(
+            'Set-EnvironmentVariable.ps1',
+            {
+                'Names': self._encode_batch_parameter(names),
+                'Scope': scope,
+                'Action': 'GetMany'
+            }
+        )
+        return self._index_batch_results(result, names)
+
     def delete_environment_variable(self, var_name, scope='User'):
         """
         删除环境变量
@@ -256,6 +480,40 @@ class ScriptExecutor:
             }
         )
 
+    def broadcast_environment_change(self):
+        """
+        广播一次环境变更（WM_SETTINGCHANGE）
+
+        Returns:
+            dict: 执行结果
+        """
+        return self.execute_powershell_script(
+            'Set-EnvironmentVariable.ps1',
+            {
+                'Scope': 'User',
+                'Action': 'Broadcast'
+            }
+        )
+
+
+_script_executor = None
+_script_executor_lock = threading.Lock()
+
+
+def get_script_executor():
+    """获取全局执行器实例（首次使用时创建，避免启动时创建目录和进程池）"""
+    global _script_executor
+    if _script_executor is None:
+        with _script_executor_lock:
+            if _script_executor is None:
+                executor = ScriptExecutor()
+                atexit.register(executor.shutdown)
+                _script_executor = executor
+    return _script_executor
+
 
-# 创建全局执行器实例
-script_executor = ScriptExecutor()
+def __getattr__(name):
+    # 兼容 from core.script_executor import script_executor
+    if name == 'script_executor':
+        return get_script_executor()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
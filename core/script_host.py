@@ -0,0 +1,305 @@
+"""
+脚本宿主进程池模块
+维护一组常驻的脚本宿主进程，通过 stdin/stdout 上的逐行 JSON 请求执行脚本，
+避免每次调用都重新启动 PowerShell 解释器
+"""
+import itertools
+import json
+import queue
+import subprocess
+import threading
+import time
+from core.metrics import SCRIPT_SPAWNS
+
+
+class ScriptHostError(Exception):
+    """脚本宿主通信失败（进程崩溃、输出无法解析等）"""
+
+
+class ScriptHostTimeout(ScriptHostError):
+    """脚本宿主在超时时间内没有返回结果"""
+
+
+class ScriptHostUnavailable(ScriptHostError):
+    """无法启动脚本宿主进程（例如当前系统没有 PowerShell）"""
+
+
+class ScriptHost:
+    """单个常驻脚本宿主进程"""
+
+    def __init__(self, command, cwd=None):
+        self.command = list(command)
+        self.cwd = cwd
+        self.process = None
+        self.calls = 0
+        self.last_used = 0.0
+        self._responses = queue.Queue()
+        self._ids = itertools.count(1)
+
+    def start(self):
+        """启动宿主进程，并开启读取线程"""
+        try:
+            self.process = subprocess.Popen(
+                self.command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                cwd=self.cwd,
+                text=True,
+                encoding='utf-8',
+                errors='replace',
+                bufsize=1
+            )
+        except OSError as e:
+            raise ScriptHostUnavailable(f'Failed to start script host: {e}')
+
+        reader = threading.Thread(target=self._read_loop, args=(self.process.stdout,), daemon=True)
+        reader.start()
+        self.last_used = time.monotonic()
+
+    def _read_loop(self, stream):
+        """持续读取宿主输出，每一行是一个 JSON 响应"""
+        for line in stream:
+            self._responses.put(line)
+        # 输出流关闭说明进程已退出
+        self._responses.put(None)
+
+    def is_alive(self):
+        """宿主进程是否仍在运行"""
+        return self.process is not None and self.process.poll() is None
+
+    def request(self, payload, timeout):
+        """
+        发送一个请求并等待对应的响应
+
+        Args:
+            payload (dict): 请求内容（不含 id）
+            timeout (float): 超时时间（秒）
+
+        Returns:
+            dict: 宿主返回的响应
+        """
+        if not self.is_alive():
+            raise ScriptHostError('Script host is not running')
+
+        request_id = next(self._ids)
+        message = dict(payload, id=request_id)
+        try:
+            self.process.stdin.write(json.dumps(message, ensure_ascii=False) + '\n')
+            self.process.stdin.flush()
+        except (OSError, ValueError) as e:
+            raise ScriptHostError(f'Failed to send request to script host: {e}')
+
+        self.calls += 1
+        self.last_used = time.monotonic()
+        deadline = self.last_used + timeout
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise ScriptHostTimeout(f'Script host did not respond within {timeout} seconds')
+            try:
+                line = self._responses.get(timeout=remaining)
+            except queue.Empty:
+                raise ScriptHostTimeout(f'Script host did not respond within {timeout} seconds')
+
+            if line is None:
+                raise ScriptHostError('Script host exited unexpectedly')
+
+            try:
+                response = json.loads(line)
+            except json.JSONDecodeError:
+                # 忽略宿主输出的非协议内容（例如脚本直接写到控制台的文本）
+                continue
+
+            if isinstance(response, dict) and response.get('id') == request_id:
+                return response
+
+    def ping(self, timeout):
+        """健康检查"""
+        try:
+            response = self.request({'op': 'ping'}, timeout)
+            return bool(response.get('ok'))
+        except ScriptHostError:
+            return False
+
+    def close(self):
+        """关闭宿主进程"""
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+        except (OSError, ValueError):
+            pass
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            try:
+                self.process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                pass
+        self.process = None
+
+
+class ScriptHostPool:
+    """
+    脚本宿主进程池
+
+    - 宿主进程按需启动，最多 size 个
+    - 每个宿主执行 max_calls 次后回收，崩溃或超时的宿主立即回收
+    - 空闲超过 health_check_interval 秒的宿主在复用前先做健康检查
+    """
+
+    def __init__(self, command, size=2, max_calls=500, health_check_interval=60,
+                 health_check_timeout=5, cwd=None):
+        self.command = list(command)
+        self.size = max(1, int(size))
+        self.max_calls = max_calls
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self.cwd = cwd
+
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._hosts = set()
+        self._closed = False
+        self.stats = {
+            'started': 0,
+            'recycled': 0,
+            'crashed': 0,
+            'timeouts': 0,
+            'requests': 0
+        }
+
+    def _spawn(self):
+        """启动一个新的宿主进程"""
+        host = ScriptHost(self.command, cwd=self.cwd)
+        host.start()
+        SCRIPT_SPAWNS.inc('host')
+        with self._lock:
+            self._hosts.add(host)
+            self.stats['started'] += 1
+        return host
+
+    def _discard(self, host, reason):
+        """回收宿主进程"""
+        with self._lock:
+            self._hosts.discard(host)
+            self.stats[reason] += 1
+        host.close()
+
+    def _acquire(self, timeout):
+        """获取一个可用的宿主进程"""
+        if not self._slots.acquire(timeout=timeout):
+            raise ScriptHostTimeout(f'No script host became available within {timeout} seconds')
+
+        try:
+            while True:
+                try:
+                    host = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._spawn()
+
+                if not host.is_alive():
+                    self._discard(host, 'crashed')
+                    continue
+
+                idle_time = time.monotonic() - host.last_used
+                if self.health_check_interval is not None and idle_time > self.health_check_interval:
+                    if not host.ping(self.health_check_timeout):
+                        self._discard(host, 'crashed')
+                        continue
+                return host
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, host):
+        """归还宿主进程，必要时回收"""
+        try:
+            if self._closed:
+                self._discard(host, 'recycled')
+            elif not host.is_alive():
+                self._discard(host, 'crashed')
+            elif self.max_calls and host.calls >= self.max_calls:
+                self._discard(host, 'recycled')
+            else:
+                self._idle.put(host)
+        finally:
+            self._slots.release()
+
+    def run_script(self, script_path, parameters=None, timeout=30):
+        """
+        在宿主进程中执行脚本
+
+        Args:
+            script_path (str): 脚本完整路径
+            parameters (dict): 传递给脚本的参数
+            timeout (float): 超时时间（秒）
+
+        Returns:
+            str: 脚本的标准输出
+        """
+        if self._closed:
+            raise ScriptHostUnavailable('Script host pool has been shut down')
+
+        host = self._acquire(timeout)
+        try:
+            response = host.request({
+                'op': 'run',
+                'script': str(script_path),
+                'parameters': parameters or {}
+            }, timeout)
+        except ScriptHostTimeout:
+            # 超时的宿主可能仍在执行脚本，不能再复用
+            self._discard(host, 'timeouts')
+            self._slots.release()
+            raise
+        except ScriptHostError:
+            self._discard(host, 'crashed')
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self.stats['requests'] += 1
+        self._release(host)
+
+        if not response.get('ok'):
+            raise ScriptHostError(response.get('error') or 'Script host reported an error')
+        return response.get('output') or ''
+
+    def health_check(self):
+        """对所有空闲宿主做健康检查，返回健康的宿主数量"""
+        healthy = []
+        while True:
+            try:
+                host = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if host.ping(self.health_check_timeout):
+                healthy.append(host)
+            else:
+                self._discard(host, 'crashed')
+        for host in healthy:
+            self._idle.put(host)
+        return len(healthy)
+
+    def get_stats(self):
+        """获取进程池统计信息"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['alive'] = len(self._hosts)
+        stats['size'] = self.size
+        stats['idle'] = self._idle.qsize()
+        return stats
+
+    def shutdown(self):
+        """关闭进程池中的所有宿主"""
+        self._closed = True
+        with self._lock:
+            hosts = list(self._hosts)
+            self._hosts.clear()
+        for host in hosts:
+            host.close()
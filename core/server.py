@@ -0,0 +1,195 @@
+"""
+生产模式 WSGI 服务器
+- 安装了 waitress 时使用 waitress：线程池处理请求，支持 HTTP/1.1 keep-alive、连接数上限和空闲超时
+- 否则退回基于 werkzeug 的线程池服务器：线程全部忙碌时最多排队 max_queue 个连接，超出时返回 503
+  （werkzeug 的请求处理器每个请求后都会关闭连接，因此这种情况下没有 keep-alive）
+- 收到 SIGTERM / SIGINT 后停止接受新连接，等待处理中的请求完成后退出
+- 支持 fork 的系统上可以预先 fork 多个工作进程，共享主进程绑定的监听端口
+"""
+import os
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+from core.startup import bind_socket
+
+try:
+    import waitress
+except ImportError:
+    waitress = None
+
+
+# 请求处理过程中单次读写的超时（秒）
+SOCKET_TIMEOUT = 30
+
+OVERLOADED_RESPONSE = (
+    b'HTTP/1.1 503 Service Unavailable\r\n'
+    b'Content-Type: text/plain\r\n'
+    b'Content-Length: 19\r\n'
+    b'Retry-After: 1\r\n'
+    b'Connection: close\r\n'
+    b'\r\n'
+    b'Server overloaded\r\n'
+)
+
+
+class PooledRequestHandler(WSGIRequestHandler):
+    """带读写超时的请求处理器，避免慢客户端长期占用线程"""
+
+    timeout = SOCKET_TIMEOUT
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """线程池 WSGI 服务器（没有安装 waitress 时使用）"""
+
+    multithread = True
+
+    def __init__(self, sock, app, threads=8, max_queue=64):
+        """
+        Args:
+            sock (socket.socket): 已绑定并监听的套接字
+            app: WSGI 应用
+            threads (int): 处理请求的线程数
+            max_queue (int): 线程全部忙碌时最多排队的连接数
+        """
+        host, port = sock.getsockname()[:2]
+        self.threads = threads
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(threads + max_queue)
+        self._executor = None
+        super().__init__(host, port, app, handler=PooledRequestHandler, fd=sock.fileno())
+
+    def serve_forever(self, poll_interval=0.5):
+        # 线程池在开始服务时创建，fork 出的工作进程各自拥有自己的线程
+        self._executor = ThreadPoolExecutor(self.threads, thread_name_prefix='wsgi-worker')
+        super().serve_forever(poll_interval)
+
+    def process_request(self, request, client_address):
+        """把连接交给线程池，排队已满时返回 503"""
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            try:
+                request.sendall(OVERLOADED_RESPONSE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+
+        try:
+            self._executor.submit(self._process, request, client_address)
+        except RuntimeError:
+            # 线程池已关闭
+            self._slots.release()
+            self.shutdown_request(request)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def stop(self):
+        """停止接受新连接（可在信号处理函数中调用）"""
+        # shutdown() 会等待 serve_forever 退出，不能在运行 serve_forever 的线程中直接调用
+        threading.Thread(target=self.shutdown, name='wsgi-shutdown', daemon=True).start()
+
+    def drain(self, timeout):
+        """等待处理中的请求完成，最多等待 timeout 秒，返回是否全部完成"""
+        if self._executor is None:
+            return True
+        waiter = threading.Thread(target=self._executor.shutdown, kwargs={'wait': True}, daemon=True)
+        waiter.start()
+        waiter.join(timeout)
+        return not waiter.is_alive()
+
+
+def _install_stop_handlers(handler):
+    """为 SIGTERM / SIGINT 安装处理函数"""
+    for name in ('SIGTERM', 'SIGINT'):
+        signum = getattr(signal, name, None)
+        if signum is not None:
+            signal.signal(signum, handler)
+
+
+def _raise_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def _run_worker(app, sock, threads, max_queue, keepalive_timeout, shutdown_timeout):
+    """在当前进程中运行服务器，直到收到停止信号"""
+    if waitress is not None:
+        server = waitress.create_server(
+            app,
+            sockets=[sock],
+            threads=threads,
+            connection_limit=threads + max_queue,
+            channel_timeout=keepalive_timeout
+        )
+        # waitress 在收到 KeyboardInterrupt 后关闭监听并等待处理中的请求（最多 5 秒）
+        _install_stop_handlers(_raise_interrupt)
+        server.run()
+        return
+
+    server = PooledWSGIServer(sock, app, threads, max_queue)
+    _install_stop_handlers(lambda signum, frame: server.stop())
+    server.serve_forever()
+    if not server.drain(shutdown_timeout):
+        print(f'  WARNING: requests still running after {shutdown_timeout}s, exiting anyway')
+
+
+def serve(app, host, port, threads=8, workers=1, max_queue=64, backlog=128,
+          keepalive_timeout=5, shutdown_timeout=10, sock=None):
+    """
+    以生产模式运行 WSGI 应用，直到收到 SIGTERM / SIGINT
+
+    Args:
+        app: WSGI 应用
+        host (str): 监听地址
+        port (int): 监听端口
+        threads (int): 每个工作进程的线程数
+        workers (int): 工作进程数，大于 1 时需要 os.fork（Windows 上自动退回单进程）
+        max_queue (int): 每个工作进程线程全部忙碌时最多排队的连接数
+        backlog (int): 操作系统监听队列长度
+        keepalive_timeout (float): keep-alive 连接的空闲超时（秒，仅 waitress）
+        shutdown_timeout (float): 停止时等待处理中请求的最长时间（秒，waitress 固定为 5 秒）
+        sock (socket.socket): 已绑定并监听的套接字，None 时按 host/port 创建
+    """
+    if sock is None:
+        sock = bind_socket(host, port, backlog)
+    options = (threads, max_queue, keepalive_timeout, shutdown_timeout)
+
+    if workers <= 1 or not hasattr(os, 'fork'):
+        _run_worker(app, sock, *options)
+        return
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(app, sock, *options)
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    # 主进程不处理请求，只把停止信号转发给工作进程并等待它们退出
+    sock.close()
+
+    def forward(signum, frame):
+        for child in children:
+            try:
+                os.kill(child, signal.SIGTERM)
+            except OSError:
+                pass
+
+    _install_stop_handlers(forward)
+    for child in children:
+        os.waitpid(child, 0)
+
+
+def describe_server():
+    """当前使用的生产服务器实现"""
+    return 'waitress' if waitress is not None else 'werkzeug thread pool'
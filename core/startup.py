@@ -0,0 +1,69 @@
+"""
+启动耗时统计
+记录从进程启动到第一个请求完成的各个阶段，只依赖标准库，可以在导入 Flask 之前使用
+"""
+import os
+import socket
+import threading
+import time
+
+
+class StartupTimer:
+    """启动阶段计时器"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []
+        self._marked = set()
+        self._lock = threading.Lock()
+
+    def mark(self, name):
+        """记录一个阶段完成，同名阶段只记录第一次，返回是否为第一次记录"""
+        now = time.perf_counter()
+        with self._lock:
+            if name in self._marked:
+                return False
+            self._marked.add(name)
+            previous = self.phases[-1]['at_ms'] if self.phases else 0.0
+            at_ms = round((now - self.started) * 1000, 2)
+            self.phases.append({
+                'phase': name,
+                'at_ms': at_ms,
+                'delta_ms': round(at_ms - previous, 2)
+            })
+            return True
+
+    def has(self, name):
+        return name in self._marked
+
+    def report(self):
+        """启动耗时报告"""
+        with self._lock:
+            phases = list(self.phases)
+        return {
+            'phases': phases,
+            'total_ms': phases[-1]['at_ms'] if phases else 0.0
+        }
+
+    def format(self):
+        """单行文本形式的报告"""
+        return ', '.join(f"{item['phase']} +{item['delta_ms']:.1f}ms" for item in self.report()['phases'])
+
+
+def bind_socket(host, port, backlog=128):
+    """
+    创建监听套接字
+
+    在导入 Flask 和业务模块之前调用，启动期间到达的连接会在监听队列中等待，而不是被拒绝
+    """
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    if os.name != 'nt':
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    return sock
+
+
+# 全局计时器，进程中第一次导入本模块时开始计时
+startup_timer = StartupTimer()
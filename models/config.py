@@ -1,10 +1,23 @@
 """
 配置数据模型
+按当前命名空间选择存储：默认命名空间使用全局 config_store，其他命名空间使用各自的分片存储
 """
-import json
-import uuid
+from contextlib import contextmanager
 from datetime import datetime
-from config.settings import CONFIG_FILE
+from core.metrics import CONFIG_MODEL_DURATION
+from models.config_store import config_store
+from models.namespaces import DEFAULT_NAMESPACE, current_namespace, get_namespace_stores
+
+
+@contextmanager
+def _store(namespace=None):
+    """取得命名空间（默认为当前命名空间）的存储，with 块内分片存储不会被关闭"""
+    namespace = namespace or current_namespace()
+    if namespace == DEFAULT_NAMESPACE:
+        yield config_store
+    else:
+        with get_namespace_stores().lease(namespace) as store:
+            yield store
 
 
 class ConfigModel:
@@ -12,30 +25,90 @@ class ConfigModel:
 
     @staticmethod
     def load_configs():
-        """加载配置文件"""
-        if CONFIG_FILE.exists():
-            try:
-                with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return {'defaultConfigId': None, 'configs': []}
-        return {'defaultConfigId': None, 'configs': []}
+        """
+        加载配置文件
+
+        Returns:
+            dict: 缓存的只读配置文档，需要修改时先调用 thaw()
+        """
+        with CONFIG_MODEL_DURATION.time('load'), _store() as store:
+            return store.load()
 
     @staticmethod
     def save_configs(config_data):
-        """保存配置文件"""
-        try:
-            with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-                json.dump(config_data, f, ensure_ascii=False, indent=2)
-            return True
-        except:
-            return False
+        """保存配置文件（整体替换）"""
+        with CONFIG_MODEL_DURATION.time('save'), _store() as store:
+            return store.save(config_data)
+
+    @staticmethod
+    def get_cache_stats():
+        """获取配置缓存的命中统计"""
+        with _store() as store:
+            return store.get_stats()
+
+    @staticmethod
+    def get_namespace_stats():
+        """获取命名空间分片存储的统计（当前命名空间、打开数量和淘汰次数）"""
+        stats = get_namespace_stores().get_stats()
+        stats['current'] = current_namespace()
+        return stats
+
+    @staticmethod
+    def list_configs(offset=0, limit=None):
+        """按插入顺序分页获取配置，返回 (配置列表, 总数)"""
+        with _store() as store:
+            return store.list_configs(offset, limit)
+
+    @staticmethod
+    def iter_configs(batch_size=500):
+        """按插入顺序逐条产出配置，用于流式导出（命名空间在调用时确定，迭代期间存储不会被关闭）"""
+        namespace = current_namespace()
+
+        def iterate():
+            with _store(namespace) as store:
+                yield from store.iter_configs(batch_size)
+        return iterate()
+
+    @staticmethod
+    def query_configs(name_contains=None, model=None, sort=None, offset=0, limit=None):
+        """按名称子串和模型过滤、排序并分页获取配置，返回 (配置列表, 过滤后的总数)"""
+        with _store() as store:
+            return store.query_configs(name_contains, model, sort, offset, limit)
+
+    @staticmethod
+    def get_default_config_id():
+        """获取默认配置 id"""
+        with _store() as store:
+            return store.get_default_id()
+
+    @staticmethod
+    def get_version():
+        """获取配置存储的版本标识，用于生成 ETag"""
+        with _store() as store:
+            return store.get_version()
+
+    @staticmethod
+    def get_config(config_id):
+        """按 id 获取配置，不存在时返回 None"""
+        with _store() as store:
+            return store.get(config_id)
+
+    @staticmethod
+    def find_configs_by_name(name):
+        """按名称获取配置列表"""
+        with _store() as store:
+            return store.find_by_name(name)
+
+    @staticmethod
+    def _new_id():
+        with _store() as store:
+            return store.new_id()
 
     @staticmethod
     def create_config(name, env_vars):
         """创建新配置"""
         return {
-            'id': str(uuid.uuid4())[:8],
+            'id': ConfigModel._new_id(),
             'name': name,
             'isDefault': False,
             'ANTHROPIC_AUTH_TOKEN': env_vars.get('ANTHROPIC_AUTH_TOKEN', ''),
@@ -46,37 +119,52 @@ class ConfigModel:
         }
 
     @staticmethod
-    def update_config(config, update_data):
-        """更新配置"""
-        config['name'] = update_data.get('name', config['name'])
-        config['ANTHROPIC_AUTH_TOKEN'] = update_data.get('ANTHROPIC_AUTH_TOKEN', '')
-        config['ANTHROPIC_BASE_URL'] = update_data.get('ANTHROPIC_BASE_URL', '')
-        config['CLAUDE_CODE_DISABLE_NONESSENTIAL_TRAFFIC'] = update_data.get('CLAUDE_CODE_DISABLE_NONESSENTIAL_TRAFFIC', '')
-        config['AI_model'] = update_data.get('AI_model', '')
+    def add_config(config):
+        """保存新配置，返回保存后的配置，失败时返回 None"""
+        with _store() as store:
+            return store.insert(config)
 
     @staticmethod
-    def set_default_config(config_data, config_id):
-        """设置默认配置"""
-        # 先取消所有默认配置
-        for config in config_data['configs']:
-            config['isDefault'] = False
+    def update_config(config_id, update_data):
+        """更新配置，返回更新后的配置，不存在时返回 None"""
+        fields = {
+            'ANTHROPIC_AUTH_TOKEN': update_data.get('ANTHROPIC_AUTH_TOKEN', ''),
+            'ANTHROPIC_BASE_URL': update_data.get('ANTHROPIC_BASE_URL', ''),
+            'CLAUDE_CODE_DISABLE_NONESSENTIAL_TRAFFIC': update_data.get('CLAUDE_CODE_DISABLE_NONESSENTIAL_TRAFFIC', ''),
+            'AI_model': update_data.get('AI_model', '')
+        }
+        # 未提供名称时保留原名称
+        if 'name' in update_data:
+            fields['name'] = update_data['name']
+        with _store() as store:
+            return store.update(config_id, fields)
 
-        # 设置新的默认配置
-        for config in config_data['configs']:
-            if config['id'] == config_id:
-                config['isDefault'] = True
-                config_data['defaultConfigId'] = config_id
-                return True
-        return False
+    @staticmethod
+    def set_default_config(config_id):
+        """设置默认配置"""
+        with _store() as store:
+            return store.set_default(config_id)
 
     @staticmethod
-    def delete_config(config_data, config_id):
+    def delete_config(config_id):
         """删除配置"""
-        for i, config in enumerate(config_data['configs']):
-            if config['id'] == config_id:
-                # 如果删除的是默认配置，清除默认配置ID
-                if config_data.get('defaultConfigId') == config_id:
-                    config_data['defaultConfigId'] = None
-                del config_data['configs'][i]
-                return True
-        return False
\ No newline at end of file
+        with _store() as store:
+            return store.delete(config_id)
+
+    @staticmethod
+    def import_configs(configs):
+        """导入配置，返回导入的数量"""
+        with _store() as store:
+            return store.import_records(configs)
+
+    @staticmethod
+    def rewrites_document():
+        """当前存储的每次写入是否重写整个文档（JSON 后端）"""
+        with _store() as store:
+            return store.rewrites_document
+
+    @staticmethod
+    def upsert_configs(configs):
+        """按 id 写入配置（存在则替换，不存在则新增），返回写入的数量"""
+        with _store() as store:
+            return store.upsert_records(configs)
@@ -0,0 +1,906 @@
+"""
+配置存储模块
+在进程内缓存解析后的配置文档，通过 os.stat 校验文件是否变化，只在文件真正改变时重新解析；
+可选的日志模式把每次修改追加到日志文件，后台定期合并回 configs.json
+"""
+import atexit
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from config.settings import (
+    CONFIG_FILE, CONFIG_SQLITE_FILE, CONFIG_STORAGE_BACKEND, CONFIG_JOURNAL_FSYNC,
+    CONFIG_JOURNAL_COMPACT_INTERVAL, CONFIG_JOURNAL_COMPACT_BYTES
+)
+from core.metrics import CONFIG_FILE_BYTES, CONFIG_FILE_DURATION
+
+
+def record_file_io(operation, file, started, size):
+    """记录一次存储文件读写的耗时和字节数"""
+    CONFIG_FILE_DURATION.observe(time.perf_counter() - started, operation, file)
+    CONFIG_FILE_BYTES.inc(operation, file, amount=size)
+
+
+class ReadOnlyDict(dict):
+    """只读字典，仍是 dict 子类，可直接交给 json/jsonify 序列化"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('Cached config data is read-only, use thaw() to get a mutable copy')
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    __ior__ = _readonly
+    clear = _readonly
+    pop = _readonly
+    popitem = _readonly
+    setdefault = _readonly
+    update = _readonly
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+
+def freeze(data):
+    """递归地把字典和列表转换为只读的 ReadOnlyDict 和 tuple"""
+    if isinstance(data, dict):
+        return ReadOnlyDict((key, freeze(value)) for key, value in data.items())
+    if isinstance(data, (list, tuple)):
+        return tuple(freeze(item) for item in data)
+    return data
+
+
+def thaw(data):
+    """递归地把只读视图转换回普通的 dict 和 list"""
+    if isinstance(data, dict):
+        return {key: thaw(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [thaw(item) for item in data]
+    return data
+
+
+def empty_document():
+    """空配置文档"""
+    return {'defaultConfigId': None, 'configs': []}
+
+
+class ConfigStore:
+    """
+    配置存储接口
+
+    ConfigModel 只通过这些方法访问配置，具体实现可以是 JSON 文件或 SQLite 数据库。
+    返回的配置记录和文档都是只读视图（ReadOnlyDict/tuple），需要修改时先调用 thaw()。
+    """
+
+    backend = None
+    # 每次写入是否重写整个文档（批量导入据此合并写入）
+    rewrites_document = False
+
+    def load(self):
+        """获取完整的配置文档 {'defaultConfigId': ..., 'configs': [...]}"""
+        raise NotImplementedError
+
+    def save(self, config_data):
+        """用完整文档替换当前内容，返回是否成功"""
+        raise NotImplementedError
+
+    def list_configs(self, offset=0, limit=None):
+        """按插入顺序分页获取配置，返回 (配置列表, 总数)"""
+        raise NotImplementedError
+
+    def iter_configs(self, batch_size=500):
+        """按插入顺序逐条产出配置，每次从存储读取 batch_size 条"""
+        offset = 0
+        while True:
+            page, _ = self.list_configs(offset, batch_size)
+            if not page:
+                return
+            yield from page
+            offset += len(page)
+
+    def query_configs(self, name_contains=None, model=None, sort=None, offset=0, limit=None):
+        """
+        过滤、排序并分页获取配置
+
+        Args:
+            name_contains (str): 名称包含的子串（不区分大小写）
+            model (str): AI_model 精确匹配
+            sort (str): 'createdAt'、'name'，前缀 '-' 表示倒序；None 表示插入顺序
+            offset (int): 跳过的条数
+            limit (int): 最多返回的条数，None 表示不限
+
+        Returns:
+            tuple: (配置列表, 过滤后的总数)
+        """
+        configs = self.load()['configs']
+        if name_contains:
+            needle = name_contains.lower()
+            configs = [config for config in configs if needle in str(config.get('name') or '').lower()]
+        if model:
+            configs = [config for config in configs if config.get('AI_model') == model]
+        if sort:
+            key = sort.lstrip('-')
+            # 值相同时按插入顺序，方向与排序方向一致（与 SqliteConfigStore 的 ORDER BY ..., seq 相同）
+            ordered = sorted(
+                enumerate(configs),
+                key=lambda item: (str(item[1].get(key) or ''), item[0]),
+                reverse=sort.startswith('-')
+            )
+            configs = [config for _, config in ordered]
+
+        stop = offset + limit if limit is not None else None
+        return list(configs[offset:stop]), len(configs)
+
+    def get_version(self):
+        """获取存储内容的版本标识，内容每次变化都会改变"""
+        raise NotImplementedError
+
+    def get_default_id(self):
+        """获取默认配置 id"""
+        return self.load().get('defaultConfigId')
+
+    def get(self, config_id):
+        """按 id 获取配置，不存在时返回 None"""
+        raise NotImplementedError
+
+    def find_by_name(self, name):
+        """按名称获取配置列表"""
+        raise NotImplementedError
+
+    def new_id(self):
+        """生成一个未被使用的配置 id"""
+        raise NotImplementedError
+
+    def insert(self, config):
+        """新增一条配置，返回保存后的记录，失败时返回 None"""
+        raise NotImplementedError
+
+    def update(self, config_id, fields):
+        """更新一条配置的字段，返回更新后的记录，不存在或失败时返回 None"""
+        raise NotImplementedError
+
+    def delete(self, config_id):
+        """删除一条配置，返回是否成功"""
+        raise NotImplementedError
+
+    def set_default(self, config_id):
+        """设置默认配置，返回是否成功"""
+        raise NotImplementedError
+
+    def import_records(self, configs):
+        """批量导入配置，返回导入的数量，写入失败时返回 0"""
+        raise NotImplementedError
+
+    def upsert_records(self, configs):
+        """按 id 批量写入配置：已存在的整体替换（保持位置），不存在的追加，返回写入的数量，写入失败时返回 0"""
+        raise NotImplementedError
+
+    def get_stats(self):
+        """获取存储统计信息"""
+        raise NotImplementedError
+
+    def close(self):
+        """释放存储占用的资源"""
+
+
+class JsonConfigStore(ConfigStore):
+    """
+    JSON 配置文件存储
+
+    - 解析后的文档以只读视图缓存在内存中
+    - 每次读取只做一次 os.stat，(mtime_ns, size, inode) 不变时直接返回缓存
+    - 维护 id -> 配置 和 name -> id 两个索引，按 id 查找、修改、删除都是 O(1)
+    - 所有修改在同一把锁内完成并立即写回文件，同时更新缓存，不需要再次解析
+    """
+
+    backend = 'json'
+    rewrites_document = True
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._signature = None
+        self._loaded = False
+        self._records = {}
+        self._by_name = {}
+        self._flagged_defaults = set()
+        self._default_id = None
+        self._extra = {}
+        self._view = None
+        # 进程内的版本号，每次重新加载或修改都递增；epoch 区分不同进程和实例
+        self._epoch = uuid.uuid4().hex[:8]
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _stat_signature(self):
+        """获取文件的 (mtime_ns, size, inode)，文件不存在时返回 None"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _read_file(self):
+        """读取并解析配置文件"""
+        if self.path.exists():
+            try:
+                started = time.perf_counter()
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    document = json.load(f)
+                    record_file_io('read', 'document', started, os.fstat(f.fileno()).st_size)
+                return document
+            except:
+                return empty_document()
+        return empty_document()
+
+    def _index_document(self, document):
+        """用完整文档重建内存中的记录和索引"""
+        if not isinstance(document, dict):
+            document = empty_document()
+
+        self._records = {}
+        self._by_name = {}
+        self._flagged_defaults = set()
+        self._default_id = document.get('defaultConfigId')
+        self._extra = {
+            key: freeze(value) for key, value in document.items()
+            if key not in ('defaultConfigId', 'configs')
+        }
+        self._view = None
+        self._version += 1
+
+        for config in document.get('configs') or []:
+            if isinstance(config, dict):
+                self._add_record(dict(config))
+
+    def _add_record(self, config):
+        """把一条配置加入记录和索引，id 重复时分配新的 id"""
+        config_id = config.get('id')
+        if config_id is None or config_id in self._records:
+            # 旧版本的导入会产生重复 id，这里分配新 id 以保证索引一致
+            config_id = self.new_id()
+            config['id'] = config_id
+
+        record = freeze(config)
+        self._records[config_id] = record
+        self._by_name.setdefault(record.get('name'), {})[config_id] = None
+        if record.get('isDefault'):
+            self._flagged_defaults.add(config_id)
+        return record
+
+    def _remove_record(self, config_id):
+        """从记录和索引中移除一条配置"""
+        record = self._records.pop(config_id)
+        ids = self._by_name.get(record.get('name'))
+        if ids is not None:
+            ids.pop(config_id, None)
+            if not ids:
+                del self._by_name[record.get('name')]
+        self._flagged_defaults.discard(config_id)
+        return record
+
+    def _replace_record(self, config_id, config):
+        """替换一条配置，保持其在列表中的位置"""
+        old_record = self._records[config_id]
+        record = freeze(config)
+        if old_record.get('name') != record.get('name'):
+            ids = self._by_name.get(old_record.get('name'))
+            if ids is not None:
+                ids.pop(config_id, None)
+                if not ids:
+                    del self._by_name[old_record.get('name')]
+            self._by_name.setdefault(record.get('name'), {})[config_id] = None
+        if record.get('isDefault'):
+            self._flagged_defaults.add(config_id)
+        else:
+            self._flagged_defaults.discard(config_id)
+        self._records[config_id] = record
+        return record
+
+    def _apply_op(self, op):
+        """
+        把一条修改操作应用到内存状态
+
+        操作格式与日志记录相同：
+            {'op': 'put', 'config': {...}}   新增或整体替换一条配置
+            {'op': 'delete', 'id': '...'}    删除一条配置
+            {'op': 'default', 'id': '...'}   设置默认配置ID
+        """
+        kind = op.get('op')
+        if kind == 'put':
+            config = dict(op['config'])
+            if config.get('id') in self._records:
+                self._replace_record(config['id'], config)
+            else:
+                self._add_record(config)
+        elif kind == 'delete':
+            if op.get('id') in self._records:
+                self._remove_record(op['id'])
+            # 如果删除的是默认配置，清除默认配置ID
+            if self._default_id == op.get('id'):
+                self._default_id = None
+        elif kind == 'default':
+            self._default_id = op.get('id')
+        self._view = None
+        self._version += 1
+
+    def _reload(self):
+        """从磁盘重新读取并重建索引"""
+        self._index_document(self._read_file())
+
+    def _ensure_loaded(self):
+        """校验文件签名，文件变化时重新解析并重建索引（调用方需持有锁）"""
+        signature = self._stat_signature()
+        if self._loaded and self._is_current(signature):
+            self.hits += 1
+            return
+
+        self.misses += 1
+        # 先记录签名再读取：读取期间文件若被修改，下次校验时签名不一致会重新解析
+        self._reload()
+        self._signature = signature
+        self._loaded = True
+
+    def _is_current(self, signature):
+        """文件签名是否与缓存对应（调用方需持有锁）"""
+        return signature == self._signature
+
+    def _document(self):
+        """构建普通的配置文档（用于写回文件）"""
+        document = dict(self._extra)
+        document['defaultConfigId'] = self._default_id
+        document['configs'] = list(self._records.values())
+        return document
+
+    def _persist(self):
+        """把当前状态写回文件"""
+        self._view = None
+        try:
+            started = time.perf_counter()
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self._document(), f, ensure_ascii=False, indent=2)
+                size = f.tell()
+            record_file_io('write', 'document', started, size)
+        except:
+            # 写入失败时丢弃内存状态，下次读取以磁盘内容为准
+            self._loaded = False
+            return False
+
+        self._signature = self._stat_signature()
+        return True
+
+    def _commit(self, ops):
+        """
+        应用修改操作并持久化（调用方需持有锁）
+
+        Returns:
+            提交凭证，交给 _wait_durable 等待落盘；写入失败时返回 False
+        """
+        for op in ops:
+            self._apply_op(op)
+        return self._persist()
+
+    def _wait_durable(self, ticket):
+        """等待提交落盘（在释放锁之后调用），返回是否成功"""
+        return bool(ticket)
+
+    def new_id(self):
+        """生成一个未被使用的配置 id"""
+        while True:
+            config_id = str(uuid.uuid4())[:8]
+            if config_id not in self._records:
+                return config_id
+
+    def load(self):
+        """
+        获取配置文档
+
+        Returns:
+            ReadOnlyDict: 只读的配置文档，需要修改时先调用 thaw()
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if self._view is None:
+                # 记录本身已是只读的，这里只需组装外层文档
+                self._view = ReadOnlyDict(
+                    self._extra,
+                    defaultConfigId=self._default_id,
+                    configs=tuple(self._records.values())
+                )
+            return self._view
+
+    def save(self, config_data):
+        """用完整文档替换当前内容"""
+        with self._lock:
+            self._index_document(thaw(config_data))
+            self._loaded = True
+            return self._persist()
+
+    def get(self, config_id):
+        """按 id 获取配置，不存在时返回 None"""
+        with self._lock:
+            self._ensure_loaded()
+            return self._records.get(config_id)
+
+    def find_by_name(self, name):
+        """按名称获取配置列表"""
+        with self._lock:
+            self._ensure_loaded()
+            return [self._records[config_id] for config_id in self._by_name.get(name, ())]
+
+    def list_configs(self, offset=0, limit=None):
+        """按插入顺序分页获取配置，返回 (配置列表, 总数)"""
+        with self._lock:
+            self._ensure_loaded()
+            stop = offset + limit if limit is not None else None
+            page = list(itertools.islice(self._records.values(), offset, stop))
+            return page, len(self._records)
+
+    def iter_configs(self, batch_size=500):
+        """按插入顺序逐条产出配置（遍历调用时刻的记录快照，记录本身已在内存中）"""
+        with self._lock:
+            self._ensure_loaded()
+            records = tuple(self._records.values())
+        return iter(records)
+
+    def get_version(self):
+        """获取存储内容的版本标识（会先校验文件是否变化）"""
+        with self._lock:
+            self._ensure_loaded()
+            return f'{self._epoch}-{self._version}'
+
+    def get_default_id(self):
+        """获取默认配置 id"""
+        with self._lock:
+            self._ensure_loaded()
+            return self._default_id
+
+    def insert(self, config):
+        """新增一条配置，返回保存后的只读记录"""
+        with self._lock:
+            self._ensure_loaded()
+            config = thaw(config)
+            if config.get('id') is None or config['id'] in self._records:
+                config['id'] = self.new_id()
+            ticket = self._commit([{'op': 'put', 'config': config}])
+            record = self._records.get(config['id'])
+        if not self._wait_durable(ticket):
+            return None
+        return record
+
+    def update(self, config_id, fields):
+        """更新一条配置的字段，返回更新后的只读记录，不存在时返回 None"""
+        with self._lock:
+            self._ensure_loaded()
+            if config_id not in self._records:
+                return None
+            config = thaw(self._records[config_id])
+            config.update(fields)
+            config['id'] = config_id
+            ticket = self._commit([{'op': 'put', 'config': config}])
+            record = self._records.get(config_id)
+        if not self._wait_durable(ticket):
+            return None
+        return record
+
+    def delete(self, config_id):
+        """删除一条配置"""
+        with self._lock:
+            self._ensure_loaded()
+            if config_id not in self._records:
+                return False
+            ticket = self._commit([{'op': 'delete', 'id': config_id}])
+        return self._wait_durable(ticket)
+
+    def set_default(self, config_id):
+        """设置默认配置，只修改旧默认配置和新默认配置两条记录"""
+        with self._lock:
+            self._ensure_loaded()
+            if config_id not in self._records:
+                return False
+
+            ops = []
+            for old_id in self._flagged_defaults:
+                if old_id != config_id:
+                    ops.append({'op': 'put', 'config': dict(thaw(self._records[old_id]), isDefault=False)})
+            if not self._records[config_id].get('isDefault'):
+                ops.append({'op': 'put', 'config': dict(thaw(self._records[config_id]), isDefault=True)})
+            ops.append({'op': 'default', 'id': config_id})
+            ticket = self._commit(ops)
+        return self._wait_durable(ticket)
+
+    def import_records(self, configs):
+        """批量导入配置，返回导入的数量"""
+        with self._lock:
+            self._ensure_loaded()
+            ops = []
+            assigned = set()
+            for config in configs:
+                if not isinstance(config, dict):
+                    continue
+                config = thaw(config)
+                config_id = config.get('id')
+                if config_id is None or config_id in self._records or config_id in assigned:
+                    # 与已有配置或本批次重复的 id 分配新 id，保证索引一致
+                    config_id = self.new_id()
+                    while config_id in assigned:
+                        config_id = self.new_id()
+                    config['id'] = config_id
+                assigned.add(config_id)
+                ops.append({'op': 'put', 'config': config})
+            ticket = self._commit(ops)
+        if not self._wait_durable(ticket):
+            return 0
+        return len(ops)
+
+    def upsert_records(self, configs):
+        """按 id 批量写入配置：已存在的整体替换（保持位置），不存在的追加，返回写入的数量"""
+        with self._lock:
+            self._ensure_loaded()
+            ops = [{'op': 'put', 'config': thaw(config)} for config in configs if config.get('id') is not None]
+            ticket = self._commit(ops)
+        if not self._wait_durable(ticket):
+            return 0
+        return len(ops)
+
+    def invalidate(self):
+        """丢弃缓存，下次读取时重新解析"""
+        with self._lock:
+            self._loaded = False
+            self._view = None
+
+    def get_stats(self):
+        """获取缓存命中统计"""
+        with self._lock:
+            return {
+                'backend': self.backend,
+                'path': str(self.path),
+                'hits': self.hits,
+                'misses': self.misses,
+                'cached': self._loaded,
+                'count': len(self._records)
+            }
+
+
+class JournaledConfigStore(JsonConfigStore):
+    """
+    日志式 JSON 配置存储
+
+    - configs.json 作为快照，格式与 JsonConfigStore 相同，导出仍然产生该格式
+    - 每次修改只把操作以一行 JSON 追加到 configs.json.journal，多个并发写入共用一次 fsync
+    - 后台线程定期（或日志超过阈值时）把内存状态写成新快照，原子替换后清空日志；
+      锁内只复制文档并记下日志位置，序列化和 fsync 在锁外进行，不阻塞读写
+    - 启动时读取快照并重放日志；日志操作是幂等的，合并中途崩溃也能正确恢复
+    """
+
+    backend = 'journal'
+    rewrites_document = False
+
+    def __init__(self, path, journal_path=None, fsync=True, compact_interval=30,
+                 compact_bytes=1024 * 1024):
+        super().__init__(path)
+        self.journal_path = Path(journal_path or f'{self.path}.journal')
+        self.fsync = fsync
+        self.compact_interval = compact_interval
+        self.compact_bytes = compact_bytes
+        self.compactions = 0
+
+        self._journal = None
+        self._journal_entries = 0
+        self._written_seq = 0
+        self._synced_seq = 0
+        self._syncing = False
+        self._sync_cond = threading.Condition()
+        self._compact_event = threading.Event()
+        self._compactor = None
+        self._closed = False
+        # 串行化所有快照写入（合并、save、close），先于 _lock 获取
+        self._snapshot_lock = threading.Lock()
+        # 合并替换快照期间，快照文件的旧签名和新签名都视为与缓存一致
+        self._snapshot_swap = None
+
+    def _stat_signature(self):
+        """快照和日志两个文件的签名"""
+        return (super()._stat_signature(), self._stat_file(self.journal_path))
+
+    def _is_current(self, signature):
+        """合并替换快照期间，快照变成本进程写出的新快照不算文件变化"""
+        if signature == self._signature:
+            return True
+        if self._snapshot_swap is None or signature is None or self._signature is None:
+            return False
+        return signature[1] == self._signature[1] and signature[0] in self._snapshot_swap
+
+    @staticmethod
+    def _stat_file(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _reload(self):
+        """读取快照并重放日志"""
+        self._index_document(self._read_file())
+        self._journal_entries = 0
+        try:
+            started = time.perf_counter()
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                size = os.fstat(f.fileno()).st_size
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        op = json.loads(line)
+                    except ValueError:
+                        # 崩溃时写了一半的最后一行
+                        continue
+                    if isinstance(op, dict):
+                        self._apply_op(op)
+                        self._journal_entries += 1
+            record_file_io('read', 'journal', started, size)
+        except OSError:
+            pass
+
+    def _open_journal(self):
+        if self._journal is None:
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        return self._journal
+
+    def _commit(self, ops):
+        """应用操作并追加到日志，返回写入序号"""
+        for op in ops:
+            self._apply_op(op)
+
+        lines = ''.join(json.dumps(op, ensure_ascii=False, separators=(',', ':')) + '\n' for op in ops)
+        try:
+            started = time.perf_counter()
+            journal = self._open_journal()
+            journal_start = journal.tell()
+            journal.write(lines)
+            journal.flush()
+            journal_size = journal.tell()
+            record_file_io('write', 'journal', started, journal_size - journal_start)
+        except (OSError, ValueError):
+            # 写入失败时丢弃内存状态，下次读取以磁盘内容为准
+            self._loaded = False
+            return False
+
+        self._journal_entries += len(ops)
+        self._written_seq += 1
+        self._signature = self._stat_signature()
+
+        self._start_compactor()
+        if self.compact_bytes and journal_size >= self.compact_bytes:
+            self._compact_event.set()
+        return self._written_seq
+
+    def _wait_durable(self, ticket):
+        """分组提交：一个线程执行 fsync，期间到达的其他写入等待并共享这次 fsync"""
+        if ticket is False:
+            return False
+        if not self.fsync:
+            return True
+
+        with self._sync_cond:
+            while self._synced_seq < ticket:
+                if self._syncing:
+                    self._sync_cond.wait()
+                    continue
+
+                self._syncing = True
+                # 序号不大于 target 的写入都已 flush 到操作系统
+                target = self._written_seq
+                journal = self._journal
+                self._sync_cond.release()
+                synced = False
+                try:
+                    os.fsync(journal.fileno())
+                    synced = True
+                except (OSError, ValueError, AttributeError):
+                    pass
+                finally:
+                    self._sync_cond.acquire()
+                    self._syncing = False
+                    if synced:
+                        self._synced_seq = max(self._synced_seq, target)
+                    self._sync_cond.notify_all()
+                if not synced:
+                    return False
+        return True
+
+    def _write_snapshot_file(self, document):
+        """把文档写入临时文件并 fsync，返回临时文件路径（不需要持有锁）"""
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        started = time.perf_counter()
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(document, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        record_file_io('write', 'snapshot', started, size)
+        return temp_path
+
+    def _drop_journal_prefix(self, offset):
+        """
+        从日志中去掉前 offset 字节（已包含在快照中的操作），保留之后追加的部分（调用方需持有锁）
+
+        剩余部分写入新文件并 fsync 后原子替换日志，因此之后全部日志都已落盘
+        """
+        with self._sync_cond:
+            # 等待正在进行的分组提交，避免它对即将关闭的旧日志执行 fsync
+            while self._syncing:
+                self._sync_cond.wait()
+
+            journal = self._open_journal()
+            journal.flush()
+            with open(self.journal_path, 'rb') as f:
+                f.seek(offset)
+                tail = f.read()
+
+            if tail:
+                temp_path = self.journal_path.with_name(self.journal_path.name + '.tmp')
+                with open(temp_path, 'wb') as f:
+                    f.write(tail)
+                    f.flush()
+                    os.fsync(f.fileno())
+                journal.close()
+                self._journal = None
+                os.replace(temp_path, self.journal_path)
+            else:
+                journal.truncate(0)
+                os.fsync(journal.fileno())
+
+            self._synced_seq = self._written_seq
+            self._sync_cond.notify_all()
+
+    def _write_snapshot(self):
+        """把内存状态原子地写成新快照并清空日志（调用方需持有 _snapshot_lock 和 _lock）"""
+        self._view = None
+        try:
+            temp_path = self._write_snapshot_file(self._document())
+            os.replace(temp_path, self.path)
+            self._drop_journal_prefix(self._journal_size())
+        except (OSError, ValueError):
+            return False
+
+        self._journal_entries = 0
+        self._signature = self._stat_signature()
+        self.compactions += 1
+        return True
+
+    def _journal_size(self):
+        """日志当前的字节数（每次提交都已 flush，调用方需持有锁）"""
+        stat = self._stat_file(self.journal_path)
+        return stat[1] if stat else 0
+
+    def compact(self, force=False):
+        """
+        把日志合并进快照，日志为空时跳过（除非 force）
+
+        锁内只复制文档并记下日志的位置；序列化、fsync 和替换快照在锁外进行，
+        期间的读写照常执行，新追加的日志在替换后保留
+        """
+        with self._snapshot_lock:
+            with self._lock:
+                self._ensure_loaded()
+                if not force and self._journal_entries == 0:
+                    return False
+                # 记录本身是只读的，浅复制文档即可
+                document = self._document()
+                covered_entries = self._journal_entries
+                covered_offset = self._journal_size()
+                old_snapshot = self._signature[0] if self._signature else None
+
+            try:
+                temp_path = self._write_snapshot_file(document)
+                with self._lock:
+                    self._snapshot_swap = (old_snapshot, self._stat_file(temp_path))
+                os.replace(temp_path, self.path)
+            except (OSError, ValueError):
+                with self._lock:
+                    self._snapshot_swap = None
+                return False
+
+            with self._lock:
+                self._snapshot_swap = None
+                try:
+                    self._drop_journal_prefix(covered_offset)
+                except (OSError, ValueError):
+                    # 新快照已经替换，日志中的旧操作重放是幂等的，下次合并时再清理
+                    self._signature = self._stat_signature()
+                    return False
+                self._journal_entries -= covered_entries
+                self._signature = self._stat_signature()
+                self.compactions += 1
+                return True
+
+    def save(self, config_data):
+        """用完整文档替换当前内容，直接写成新快照"""
+        with self._snapshot_lock, self._lock:
+            self._index_document(thaw(config_data))
+            self._loaded = True
+            return self._write_snapshot()
+
+    def _start_compactor(self):
+        """首次写入时启动后台合并线程"""
+        if self._compactor is None and self.compact_interval:
+            self._compactor = threading.Thread(
+                target=self._compact_loop,
+                name='config-journal-compactor',
+                daemon=True
+            )
+            self._compactor.start()
+
+    def _compact_loop(self):
+        """后台合并线程"""
+        while not self._closed:
+            self._compact_event.wait(self.compact_interval)
+            self._compact_event.clear()
+            if self._closed:
+                break
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"Config journal compaction failed: {e}")
+
+    def close(self):
+        """停止后台合并，把剩余日志合并进快照"""
+        self._closed = True
+        self._compact_event.set()
+        with self._snapshot_lock, self._lock:
+            if self._loaded and self._journal_entries:
+                self._write_snapshot()
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    def get_stats(self):
+        """获取缓存命中和日志统计"""
+        stats = super().get_stats()
+        with self._lock:
+            stats['journal_path'] = str(self.journal_path)
+            stats['journal_entries'] = self._journal_entries
+            stats['compactions'] = self.compactions
+        return stats
+
+
+def create_config_store(backend=CONFIG_STORAGE_BACKEND, path=None, close_at_exit=True):
+    """
+    按配置创建存储实例
+
+    Args:
+        backend (str): 'json'、'journal' 或 'sqlite'
+        path: 存储文件路径，默认 JSON 类后端为 CONFIG_FILE，SQLite 为 CONFIG_SQLITE_FILE
+        close_at_exit (bool): 是否在进程退出时自动关闭；由调用方管理生命周期时传 False
+
+    Returns:
+        ConfigStore: 配置存储
+    """
+    if backend == 'journal':
+        store = JournaledConfigStore(
+            path or CONFIG_FILE,
+            fsync=CONFIG_JOURNAL_FSYNC,
+            compact_interval=CONFIG_JOURNAL_COMPACT_INTERVAL,
+            compact_bytes=CONFIG_JOURNAL_COMPACT_BYTES
+        )
+        if close_at_exit:
+            atexit.register(store.close)
+        return store
+    if backend == 'sqlite':
+        from models.sqlite_store import SqliteConfigStore
+        store = SqliteConfigStore(path or CONFIG_SQLITE_FILE)
+        if close_at_exit:
+            atexit.register(store.close)
+        return store
+    if backend == 'json':
+        return JsonConfigStore(path or CONFIG_FILE)
+    raise ValueError(f'Unknown config storage backend: {backend}')
+
+
+# 创建全局配置存储实例
+config_store = create_config_store()
@@ -0,0 +1,68 @@
+"""
+配置存储迁移工具
+在 json / journal / sqlite 存储后端之间复制全部配置
+
+用法：
+    python -m models.migrate --from json --to sqlite
+    python -m models.migrate --from sqlite --to json --target-path backup.json
+"""
+import argparse
+import sys
+from models.config_store import create_config_store
+
+
+BACKENDS = ('json', 'journal', 'sqlite')
+
+
+def migrate(source, target):
+    """
+    把 source 存储中的全部配置写入 target 存储（覆盖 target 原有内容）
+
+    Args:
+        source (ConfigStore): 源存储
+        target (ConfigStore): 目标存储
+
+    Returns:
+        dict: 迁移结果
+    """
+    document = source.load()
+    if not target.save(document):
+        return {'success': False, 'message': f'Failed to write {target.backend} storage'}
+    return {
+        'success': True,
+        'migrated_count': len(document.get('configs', ())),
+        'defaultConfigId': document.get('defaultConfigId')
+    }
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='Migrate configs between storage backends')
+    parser.add_argument('--from', dest='source', choices=BACKENDS, required=True,
+                        help='source storage backend')
+    parser.add_argument('--to', dest='target', choices=BACKENDS, required=True,
+                        help='target storage backend')
+    parser.add_argument('--source-path', help='source file (defaults to the configured path)')
+    parser.add_argument('--target-path', help='target file (defaults to the configured path)')
+    args = parser.parse_args(argv)
+
+    if args.source == args.target and args.source_path == args.target_path:
+        parser.error('source and target are the same storage')
+
+    source = create_config_store(args.source, args.source_path)
+    target = create_config_store(args.target, args.target_path)
+    try:
+        result = migrate(source, target)
+    finally:
+        source.close()
+        target.close()
+
+    if result['success']:
+        print(f"Migrated {result['migrated_count']} configs from {args.source} to {args.target}")
+        return 0
+    print(f"ERROR: {result['message']}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
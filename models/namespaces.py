@@ -0,0 +1,216 @@
+"""
+命名空间配置存储模块
+每个命名空间（用户或团队）的配置保存在 CONFIG_NAMESPACE_DIR 下自己的分片文件中，
+读写只解析和重写该命名空间的数据，不同命名空间之间互不阻塞
+
+- 默认命名空间使用原有的全局存储（CONFIG_FILE / CONFIG_SQLITE_FILE），不带命名空间的路由保持不变
+- 分片存储在第一次访问时打开，最多同时打开 CONFIG_NAMESPACE_MAX_OPEN 个，超出时关闭最久未使用的
+- 使用中的存储（例如正在流式导出）不会被关闭，全部在使用时暂时超出上限
+- 关闭在全局锁外进行（日志分片关闭时会写快照），只有重新打开同一命名空间的请求需要等待关闭完成
+- 当前请求的命名空间保存在 ContextVar 中，由路由层设置，ConfigModel 按它选择存储
+"""
+import atexit
+import contextvars
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from config.settings import CONFIG_NAMESPACE_DIR, CONFIG_NAMESPACE_MAX_OPEN, CONFIG_STORAGE_BACKEND
+from core.metrics import registry
+from models.config_store import create_config_store
+
+
+DEFAULT_NAMESPACE = 'default'
+
+# 命名空间同时用作文件名，只允许字母、数字、下划线和连字符
+NAMESPACE_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$')
+
+_current_namespace = contextvars.ContextVar('config_namespace', default=DEFAULT_NAMESPACE)
+
+
+def is_valid_namespace(namespace):
+    """命名空间名称是否合法"""
+    return bool(namespace) and NAMESPACE_PATTERN.match(namespace) is not None
+
+
+def current_namespace():
+    """当前上下文的命名空间"""
+    return _current_namespace.get()
+
+
+def set_current_namespace(namespace):
+    """设置当前上下文的命名空间（每个请求开始时由路由层调用）"""
+    if not is_valid_namespace(namespace):
+        raise ValueError(f'Invalid namespace: {namespace}')
+    _current_namespace.set(namespace)
+
+
+@contextmanager
+def use_namespace(namespace):
+    """在 with 块内切换命名空间"""
+    if not is_valid_namespace(namespace):
+        raise ValueError(f'Invalid namespace: {namespace}')
+    token = _current_namespace.set(namespace)
+    try:
+        yield
+    finally:
+        _current_namespace.reset(token)
+
+
+class _Entry:
+    """一个已打开的分片存储"""
+
+    def __init__(self, store):
+        self.store = store
+        self.leases = 0
+
+
+class NamespaceStores:
+    """按命名空间打开分片存储，按 LRU 关闭"""
+
+    def __init__(self, directory, backend=CONFIG_STORAGE_BACKEND, max_open=32):
+        """
+        Args:
+            directory (str): 分片文件所在目录
+            backend (str): 分片使用的存储后端，同 create_config_store
+            max_open (int): 同时打开的分片存储数量上限
+        """
+        self.directory = Path(directory)
+        self.backend = backend
+        self.max_open = max_open
+        self._entries = OrderedDict()
+        # 命名空间 -> 关闭完成事件，关闭期间同一命名空间的 lease 等待该事件
+        self._closing = {}
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.evictions = 0
+
+    def shard_path(self, namespace):
+        """命名空间的分片文件路径"""
+        suffix = '.db' if self.backend == 'sqlite' else '.json'
+        return self.directory / f'{namespace}{suffix}'
+
+    @contextmanager
+    def lease(self, namespace):
+        """
+        取得命名空间的存储，with 块内该存储不会被关闭
+
+        Raises:
+            ValueError: 命名空间名称不合法
+        """
+        if not is_valid_namespace(namespace):
+            raise ValueError(f'Invalid namespace: {namespace}')
+        while True:
+            with self._lock:
+                closing = self._closing.get(namespace)
+                if closing is None:
+                    entry = self._entries.get(namespace)
+                    if entry is None:
+                        self.directory.mkdir(parents=True, exist_ok=True)
+                        entry = _Entry(create_config_store(self.backend, self.shard_path(namespace), close_at_exit=False))
+                        self._entries[namespace] = entry
+                        self.opened += 1
+                    self._entries.move_to_end(namespace)
+                    entry.leases += 1
+                    evicted = self._evict()
+                    break
+            # 同一命名空间的旧实例正在关闭，等它把日志合并完再重新打开
+            closing.wait()
+        self._close_evicted(evicted)
+        try:
+            yield entry.store
+        finally:
+            with self._lock:
+                entry.leases -= 1
+                evicted = self._evict()
+            self._close_evicted(evicted)
+
+    def _evict(self):
+        """
+        移除最久未使用且没有被使用的存储，直到不超过上限（调用方需持有锁）
+
+        Returns:
+            list: 被移除的 (命名空间, 存储, 关闭完成事件)，由调用方在锁外调用 _close_evicted 关闭
+        """
+        evicted = []
+        excess = len(self._entries) - self.max_open
+        if excess <= 0:
+            return evicted
+        for namespace, entry in list(self._entries.items()):
+            if excess <= 0:
+                break
+            if entry.leases:
+                continue
+            del self._entries[namespace]
+            closed = threading.Event()
+            self._closing[namespace] = closed
+            evicted.append((namespace, entry.store, closed))
+            self.evictions += 1
+            excess -= 1
+        return evicted
+
+    def _close_evicted(self, evicted):
+        """在锁外关闭被移除的存储（日志分片关闭时会写快照并 fsync），完成后允许重新打开"""
+        for namespace, store, closed in evicted:
+            try:
+                store.close()
+            finally:
+                with self._lock:
+                    if self._closing.get(namespace) is closed:
+                        del self._closing[namespace]
+                closed.set()
+
+    def list_namespaces(self):
+        """已有分片文件的命名空间（包括未打开的）和默认命名空间"""
+        suffix = '.db' if self.backend == 'sqlite' else '.json'
+        namespaces = {DEFAULT_NAMESPACE}
+        if self.directory.is_dir():
+            for path in self.directory.iterdir():
+                if path.suffix == suffix and is_valid_namespace(path.stem):
+                    namespaces.add(path.stem)
+        return sorted(namespaces)
+
+    def close_all(self):
+        """关闭全部已打开的存储"""
+        with self._lock:
+            closing = []
+            for namespace, entry in self._entries.items():
+                closed = threading.Event()
+                self._closing[namespace] = closed
+                closing.append((namespace, entry.store, closed))
+            self._entries.clear()
+        self._close_evicted(closing)
+
+    def get_stats(self):
+        """分片存储统计"""
+        with self._lock:
+            return {
+                'backend': self.backend,
+                'directory': str(self.directory),
+                'open': len(self._entries),
+                'max_open': self.max_open,
+                'opened': self.opened,
+                'evictions': self.evictions,
+                'closing': len(self._closing),
+                'in_use': sum(1 for entry in self._entries.values() if entry.leases)
+            }
+
+
+_namespace_stores = None
+_namespace_stores_lock = threading.Lock()
+
+
+def get_namespace_stores():
+    """获取全局分片存储管理器（首次使用时创建）"""
+    global _namespace_stores
+    if _namespace_stores is None:
+        with _namespace_stores_lock:
+            if _namespace_stores is None:
+                _namespace_stores = NamespaceStores(CONFIG_NAMESPACE_DIR, CONFIG_STORAGE_BACKEND, CONFIG_NAMESPACE_MAX_OPEN)
+                atexit.register(_namespace_stores.close_all)
+    return _namespace_stores
+
+
+registry.gauge('ccswitch_config_namespaces_open', 'Namespace config stores currently open.',
+               lambda: _namespace_stores.get_stats()['open'] if _namespace_stores is not None else 0)
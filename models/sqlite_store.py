@@ -0,0 +1,433 @@
+"""
+SQLite 配置存储模块
+使用标准库 sqlite3，以 WAL 模式支持多个并发读取，写入在事务中完成
+"""
+import json
+import queue
+import threading
+import time
+import uuid
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from core.metrics import CONFIG_FILE_DURATION
+from models.config_store import ConfigStore, ReadOnlyDict, freeze, thaw
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS configs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT,
+    created_at TEXT,
+    is_default INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_configs_name ON configs(name);
+CREATE INDEX IF NOT EXISTS idx_configs_created_at ON configs(created_at);
+CREATE INDEX IF NOT EXISTS idx_configs_is_default ON configs(is_default) WHERE is_default = 1;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', '0');
+INSERT OR IGNORE INTO meta (key, value) VALUES ('defaultConfigId', 'null');
+INSERT OR IGNORE INTO meta (key, value) VALUES ('extra', '{}');
+INSERT OR IGNORE INTO meta (key, value) SELECT 'epoch', '"' || lower(hex(randomblob(4))) || '"';
+"""
+
+
+class SqliteConfigStore(ConfigStore):
+    """
+    SQLite 配置存储
+
+    - 每条配置一行，完整内容以 JSON 保存在 data 列，id/name/createdAt 单独建索引
+    - seq 自增列保持插入顺序，与 JSON 文件中的列表顺序一致
+    - 连接放在连接池中复用，WAL 模式下多个线程的读取互不阻塞
+    - meta 表中的 version 在每次修改了数据的写入事务中递增，完整文档视图按版本号缓存
+    """
+
+    backend = 'sqlite'
+
+    def __init__(self, path, pool_size=8):
+        self.path = Path(path)
+        self.pool_size = pool_size
+        self._pool = queue.LifoQueue()
+        self._write_lock = threading.RLock()
+        self._cached = (None, None)
+        self.hits = 0
+        self.misses = 0
+
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+
+    def _open_connection(self):
+        connection = sqlite3.connect(str(self.path), timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    @contextmanager
+    def _connect(self):
+        """从连接池取出一个连接，用完放回（池满时关闭）"""
+        try:
+            connection = self._pool.get_nowait()
+        except queue.Empty:
+            connection = self._open_connection()
+        try:
+            yield connection
+        finally:
+            if self._pool.qsize() < self.pool_size:
+                self._pool.put(connection)
+            else:
+                connection.close()
+
+    def _transaction(self, operation):
+        """在写事务中执行 operation(connection)，有行被修改时递增版本号"""
+        with self._write_lock, self._connect() as connection:
+            started = time.perf_counter()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                changes = connection.total_changes
+                result = operation(connection)
+                # 没有匹配到行的更新和删除不改变版本号，缓存的文档视图和 ETag 保持有效
+                if connection.total_changes > changes:
+                    connection.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'version'")
+                connection.execute('COMMIT')
+                # 事务写入的字节数无法直接得到，只记录耗时
+                CONFIG_FILE_DURATION.observe(time.perf_counter() - started, 'write', 'sqlite')
+                return result
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+
+    @staticmethod
+    def _get_meta(connection, key):
+        row = connection.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @staticmethod
+    def _set_meta(connection, key, value):
+        connection.execute(
+            'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+            (key, json.dumps(value, ensure_ascii=False))
+        )
+
+    @staticmethod
+    def _row_values(config):
+        """配置记录对应的列值"""
+        return (
+            config['id'],
+            config.get('name'),
+            config.get('createdAt'),
+            1 if config.get('isDefault') else 0,
+            json.dumps(config, ensure_ascii=False)
+        )
+
+    @staticmethod
+    def _exists(connection, config_id):
+        return connection.execute('SELECT 1 FROM configs WHERE id = ?', (config_id,)).fetchone() is not None
+
+    def _new_id(self, connection, reserved=()):
+        while True:
+            config_id = str(uuid.uuid4())[:8]
+            if config_id not in reserved and not self._exists(connection, config_id):
+                return config_id
+
+    def _insert_row(self, connection, config):
+        connection.execute(
+            'INSERT INTO configs (id, name, created_at, is_default, data) VALUES (?, ?, ?, ?, ?)',
+            self._row_values(config)
+        )
+
+    def _update_row(self, connection, config):
+        connection.execute(
+            'UPDATE configs SET name = ?, created_at = ?, is_default = ?, data = ? WHERE id = ?',
+            self._row_values(config)[1:] + (config['id'],)
+        )
+
+    def _get_row(self, connection, config_id):
+        row = connection.execute('SELECT data FROM configs WHERE id = ?', (config_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def new_id(self):
+        """生成一个未被使用的配置 id"""
+        with self._connect() as connection:
+            return self._new_id(connection)
+
+    def load(self):
+        """
+        获取配置文档
+
+        Returns:
+            ReadOnlyDict: 只读的配置文档，版本号未变化时直接返回缓存
+        """
+        with self._connect() as connection:
+            version = self._get_meta(connection, 'version')
+            cached_version, view = self._cached
+            if view is not None and version == cached_version:
+                self.hits += 1
+                return view
+
+            self.misses += 1
+            # 在一个读事务中读取，保证文档与版本号一致
+            connection.execute('BEGIN')
+            try:
+                version = self._get_meta(connection, 'version')
+                default_id = self._get_meta(connection, 'defaultConfigId')
+                extra = self._get_meta(connection, 'extra') or {}
+                rows = connection.execute('SELECT data FROM configs ORDER BY seq').fetchall()
+            finally:
+                connection.execute('COMMIT')
+
+        view = ReadOnlyDict(
+            freeze(extra),
+            defaultConfigId=default_id,
+            configs=tuple(freeze(json.loads(row[0])) for row in rows)
+        )
+        # 版本号和视图作为一个整体替换，避免并发读取时两者不一致
+        self._cached = (version, view)
+        return view
+
+    def save(self, config_data):
+        """用完整文档替换当前内容"""
+        config_data = thaw(config_data)
+
+        def operation(connection):
+            connection.execute('DELETE FROM configs')
+            reserved = set()
+            for config in config_data.get('configs') or []:
+                if not isinstance(config, dict):
+                    continue
+                if config.get('id') is None or config['id'] in reserved:
+                    config['id'] = self._new_id(connection, reserved)
+                reserved.add(config['id'])
+                self._insert_row(connection, config)
+            self._set_meta(connection, 'defaultConfigId', config_data.get('defaultConfigId'))
+            self._set_meta(connection, 'extra', {
+                key: value for key, value in config_data.items()
+                if key not in ('defaultConfigId', 'configs')
+            })
+            return True
+
+        try:
+            return self._transaction(operation)
+        except sqlite3.Error:
+            return False
+
+    def list_configs(self, offset=0, limit=None):
+        """按插入顺序分页获取配置，返回 (配置列表, 总数)"""
+        with self._connect() as connection:
+            total = connection.execute('SELECT COUNT(*) FROM configs').fetchone()[0]
+            rows = connection.execute(
+                'SELECT data FROM configs ORDER BY seq LIMIT ? OFFSET ?',
+                (-1 if limit is None else limit, offset)
+            ).fetchall()
+        return [freeze(json.loads(row[0])) for row in rows], total
+
+    def iter_configs(self, batch_size=500):
+        """按插入顺序逐条产出配置，按 seq 分批读取，内存占用与总数无关"""
+        last_seq = 0
+        while True:
+            with self._connect() as connection:
+                rows = connection.execute(
+                    'SELECT seq, data FROM configs WHERE seq > ? ORDER BY seq LIMIT ?',
+                    (last_seq, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for _, data in rows:
+                yield freeze(json.loads(data))
+            last_seq = rows[-1][0]
+
+    def query_configs(self, name_contains=None, model=None, sort=None, offset=0, limit=None):
+        """过滤、排序并分页获取配置，条件和排序在 SQL 中完成"""
+        conditions = []
+        parameters = []
+        if name_contains:
+            escaped = name_contains.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            conditions.append("name LIKE ? ESCAPE '\\'")
+            parameters.append(f'%{escaped}%')
+        if model:
+            conditions.append("json_extract(data, '$.AI_model') = ?")
+            parameters.append(model)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        order = 'seq'
+        if sort:
+            column = {'createdAt': 'created_at', 'name': 'name'}.get(sort.lstrip('-'))
+            if column:
+                direction = 'DESC' if sort.startswith('-') else 'ASC'
+                order = f"COALESCE({column}, '') {direction}, seq {direction}"
+
+        with self._connect() as connection:
+            total = connection.execute(f'SELECT COUNT(*) FROM configs {where}', parameters).fetchone()[0]
+            rows = connection.execute(
+                f'SELECT data FROM configs {where} ORDER BY {order} LIMIT ? OFFSET ?',
+                parameters + [-1 if limit is None else limit, offset]
+            ).fetchall()
+        return [freeze(json.loads(row[0])) for row in rows], total
+
+    def get_version(self):
+        """获取存储内容的版本标识（写事务递增的版本号）"""
+        with self._connect() as connection:
+            return f"{self._get_meta(connection, 'epoch')}-{self._get_meta(connection, 'version')}"
+
+    def get_default_id(self):
+        """获取默认配置 id"""
+        with self._connect() as connection:
+            return self._get_meta(connection, 'defaultConfigId')
+
+    def get(self, config_id):
+        """按 id 获取配置，不存在时返回 None"""
+        with self._connect() as connection:
+            config = self._get_row(connection, config_id)
+        return freeze(config) if config is not None else None
+
+    def find_by_name(self, name):
+        """按名称获取配置列表"""
+        with self._connect() as connection:
+            rows = connection.execute(
+                'SELECT data FROM configs WHERE name = ? ORDER BY seq', (name,)
+            ).fetchall()
+        return [freeze(json.loads(row[0])) for row in rows]
+
+    def insert(self, config):
+        """新增一条配置，返回保存后的只读记录"""
+        config = thaw(config)
+
+        def operation(connection):
+            if config.get('id') is None or self._exists(connection, config['id']):
+                config['id'] = self._new_id(connection)
+            self._insert_row(connection, config)
+            return freeze(config)
+
+        try:
+            return self._transaction(operation)
+        except sqlite3.Error:
+            return None
+
+    def update(self, config_id, fields):
+        """更新一条配置的字段，返回更新后的只读记录，不存在时返回 None"""
+        def operation(connection):
+            config = self._get_row(connection, config_id)
+            if config is None:
+                return None
+            config.update(thaw(fields))
+            config['id'] = config_id
+            self._update_row(connection, config)
+            return freeze(config)
+
+        try:
+            return self._transaction(operation)
+        except sqlite3.Error:
+            return None
+
+    def delete(self, config_id):
+        """删除一条配置"""
+        def operation(connection):
+            cursor = connection.execute('DELETE FROM configs WHERE id = ?', (config_id,))
+            if cursor.rowcount == 0:
+                return False
+            # 如果删除的是默认配置，清除默认配置ID
+            if self._get_meta(connection, 'defaultConfigId') == config_id:
+                self._set_meta(connection, 'defaultConfigId', None)
+            return True
+
+        try:
+            return self._transaction(operation)
+        except sqlite3.Error:
+            return False
+
+    def set_default(self, config_id):
+        """设置默认配置，只修改旧默认配置和新默认配置两行"""
+        def operation(connection):
+            config = self._get_row(connection, config_id)
+            if config is None:
+                return False
+
+            rows = connection.execute(
+                'SELECT data FROM configs WHERE is_default = 1 AND id != ?', (config_id,)
+            ).fetchall()
+            for row in rows:
+                old_config = json.loads(row[0])
+                old_config['isDefault'] = False
+                self._update_row(connection, old_config)
+
+            if not config.get('isDefault'):
+                config['isDefault'] = True
+                self._update_row(connection, config)
+            self._set_meta(connection, 'defaultConfigId', config_id)
+            return True
+
+        try:
+            return self._transaction(operation)
+        except sqlite3.Error:
+            return False
+
+    def import_records(self, configs):
+        """在一个事务中批量导入配置，返回导入的数量"""
+        configs = [thaw(config) for config in configs if isinstance(config, dict)]
+
+        def operation(connection):
+            reserved = set()
+            for config in configs:
+                config_id = config.get('id')
+                if config_id is None or config_id in reserved or self._exists(connection, config_id):
+                    # 与已有配置或本批次重复的 id 分配新 id
+                    config['id'] = self._new_id(connection, reserved)
+                reserved.add(config['id'])
+            connection.executemany(
+                'INSERT INTO configs (id, name, created_at, is_default, data) VALUES (?, ?, ?, ?, ?)',
+                [self._row_values(config) for config in configs]
+            )
+            return len(configs)
+
+        try:
+            return self._transaction(operation)
+        except sqlite3.Error:
+            return 0
+
+    def upsert_records(self, configs):
+        """在一个事务中按 id 批量写入配置，已存在的整体替换，返回写入的数量"""
+        rows = [self._row_values(thaw(config)) for config in configs if config.get('id') is not None]
+
+        def operation(connection):
+            connection.executemany(
+                'INSERT INTO configs (id, name, created_at, is_default, data) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(id) DO UPDATE SET name = excluded.name, created_at = excluded.created_at, '
+                'is_default = excluded.is_default, data = excluded.data',
+                rows
+            )
+            return len(rows)
+
+        try:
+            return self._transaction(operation)
+        except sqlite3.Error:
+            return 0
+
+    def get_stats(self):
+        """获取存储统计信息"""
+        with self._connect() as connection:
+            return {
+                'backend': self.backend,
+                'path': str(self.path),
+                'hits': self.hits,
+                'misses': self.misses,
+                'cached': self._cached[1] is not None,
+                'count': connection.execute('SELECT COUNT(*) FROM configs').fetchone()[0],
+                'version': self._get_meta(connection, 'version')
+            }
+
+    def close(self):
+        """关闭连接池中的连接"""
+        while True:
+            try:
+                connection = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                connection.close()
+            except sqlite3.Error:
+                pass
@@ -0,0 +1,70 @@
+<#
+.SYNOPSIS
+    Long-lived script host for the environment config manager
+.DESCRIPTION
+    Reads line-delimited JSON requests from stdin and writes one JSON response
+    per line to stdout, so a single PowerShell process can serve many calls.
+
+    Request:  {"id": 1, "op": "run", "script": "C:\...\Set-EnvironmentVariable.ps1", "parameters": {"Name": "X", "Action": "Get", "Scope": "User"}}
+    Request:  {"id": 2, "op": "ping"}
+    Response: {"id": 1, "ok": true, "output": "<script stdout>"}
+    Response: {"id": 2, "ok": false, "error": "<message>"}
+.EXAMPLE
+    powershell -NoLogo -NoProfile -ExecutionPolicy Bypass -File .\ScriptHost.ps1
+#>
+
+$ErrorActionPreference = "Stop"
+[Console]::InputEncoding = [System.Text.Encoding]::UTF8
+[Console]::OutputEncoding = [System.Text.Encoding]::UTF8
+
+function Write-HostResponse {
+    param(
+        [hashtable]$Response
+    )
+
+    [Console]::Out.WriteLine(($Response | ConvertTo-Json -Compress -Depth 5))
+    [Console]::Out.Flush()
+}
+
+while ($true) {
+    $Line = [Console]::In.ReadLine()
+    if ($null -eq $Line) {
+        break
+    }
+    if (-not $Line.Trim()) {
+        continue
+    }
+
+    $RequestId = $null
+    try {
+        $Request = $Line | ConvertFrom-Json
+        $RequestId = $Request.id
+
+        if ($Request.op -eq "ping") {
+            Write-HostResponse @{ id = $RequestId; ok = $true }
+            continue
+        }
+
+        if ($Request.op -ne "run") {
+            throw "Unknown op: $($Request.op)"
+        }
+
+        $Parameters = @{}
+        if ($Request.parameters) {
+            foreach ($Property in $Request.parameters.PSObject.Properties) {
+                $Parameters[$Property.Name] = [string]$Property.Value
+            }
+        }
+
+        # Run each script in a child scope so its variables and functions do not leak between calls
+        $Output = & {
+            param($ScriptPath, $ScriptParameters)
+            & $ScriptPath @ScriptParameters
+        } $Request.script $Parameters | Out-String
+
+        Write-HostResponse @{ id = $RequestId; ok = $true; output = $Output.Trim() }
+    }
+    catch {
+        Write-HostResponse @{ id = $RequestId; ok = $false; error = $_.Exception.Message }
+    }
+}
@@ -11,14 +11,23 @@
 .PARAMETER Scope
     The scope of the environment variable (User or Machine)
 .PARAMETER Action
-    The action to perform (Set, Get, or Delete)
+    The action to perform (Set, Get, Delete, List, SetMany, GetMany or Broadcast)
+.PARAMETER Variables
+    SetMany only: Base64-encoded UTF-8 JSON object of name/value pairs
+.PARAMETER Names
+    GetMany only: Base64-encoded UTF-8 JSON array of variable names
+.PARAMETER Broadcast
+    Set and SetMany only: "False" writes the registry without broadcasting WM_SETTINGCHANGE,
+    so a caller setting several variables can send one Broadcast action at the end
 .EXAMPLE
     .\Set-EnvironmentVariable.ps1 -Name "TEST_VAR" -Value "test_value" -Scope "User" -Action "Set"
+.EXAMPLE
+    .\Set-EnvironmentVariable.ps1 -Variables "eyJBIjoiMSIsIkIiOiIyIn0=" -Scope "User" -Action "SetMany"
 #>
 
 param(
-    [Parameter(Mandatory=$true)]
-    [string]$Name,
+    [Parameter(Mandatory=$false)]
+    [string]$Name = "",
 
     [Parameter(Mandatory=$false)]
     [string]$Value = "",
@@ -28,20 +37,81 @@ param(
     [string]$Scope = "User",
 
     [Parameter(Mandatory=$true)]
-    [ValidateSet("Set", "Get", "Delete", "List")]
-    [string]$Action
+    [ValidateSet("Set", "Get", "Delete", "List", "SetMany", "GetMany", "Broadcast")]
+    [string]$Action,
+
+    [Parameter(Mandatory=$false)]
+    [string]$Variables = "",
+
+    [Parameter(Mandatory=$false)]
+    [string]$Names = "",
+
+    [Parameter(Mandatory=$false)]
+    [ValidateSet("True", "False")]
+    [string]$Broadcast = "True"
 )
 
+# Function to get the registry path that backs the given scope
+function Get-EnvironmentRegistryPath {
+    param(
+        [string]$TargetScope
+    )
+
+    if ($TargetScope -eq "User") {
+        return "HKCU:\Environment"
+    }
+    return "HKLM:\SYSTEM\CurrentControlSet\Control\Session Manager\Environment"
+}
+
+# Function to broadcast WM_SETTINGCHANGE so running programs pick up the new environment
+function Send-EnvironmentChange {
+    try {
+        if (-not ("EnvSwitcher.NativeMethods" -as [type])) {
+            $Signature = @"
+[DllImport("user32.dll", SetLastError=true, CharSet=CharSet.Auto)]
+public static extern IntPtr SendMessageTimeout(
+    IntPtr hWnd, uint Msg, IntPtr wParam, string lParam,
+    uint fuFlags, uint uTimeout, out IntPtr lpdwResult);
+"@
+            Add-Type -MemberDefinition $Signature -Name "NativeMethods" -Namespace "EnvSwitcher" | Out-Null
+        }
+
+        $Result = [IntPtr]::Zero
+        # HWND_BROADCAST, WM_SETTINGCHANGE, SMTO_ABORTIFHUNG
+        [EnvSwitcher.NativeMethods]::SendMessageTimeout([IntPtr]0xffff, 0x001A, [IntPtr]::Zero, "Environment", 2, 5000, [ref]$Result) | Out-Null
+        return $true
+    }
+    catch {
+        return $false
+    }
+}
+
+# Function to decode a Base64-encoded UTF-8 JSON parameter
+function ConvertFrom-Base64Json {
+    param(
+        [string]$Encoded
+    )
+
+    $Json = [System.Text.Encoding]::UTF8.GetString([System.Convert]::FromBase64String($Encoded))
+    return $Json | ConvertFrom-Json
+}
+
 # Function to set environment variable
 function Set-EnvironmentVariableInternal {
     param(
         [string]$VarName,
         [string]$VarValue,
-        [string]$TargetScope
+        [string]$TargetScope,
+        [bool]$SendBroadcast = $true
     )
 
     try {
-        if ($TargetScope -eq "User") {
+        if (-not $SendBroadcast) {
+            # Write the registry only; [Environment]::SetEnvironmentVariable would broadcast
+            $RegPath = Get-EnvironmentRegistryPath -TargetScope $TargetScope
+            Set-ItemProperty -Path $RegPath -Name $VarName -Value $VarValue -Force
+            Set-Item -Path "env:$VarName" -Value $VarValue -ErrorAction SilentlyContinue
+        } elseif ($TargetScope -eq "User") {
             [System.Environment]::SetEnvironmentVariable($VarName, $VarValue, "User")
             # Also update the registry for immediate effect
             $RegPath = "HKCU:\Environment"
@@ -54,18 +124,11 @@ function Set-EnvironmentVariableInternal {
         }
 
         # Broadcast environment change
-        if ($TargetScope -eq "Machine") {
+        if (-not $SendBroadcast) {
+            # The caller sends a single Broadcast action later
+        } elseif ($TargetScope -eq "Machine") {
             # For machine scope, we need to broadcast to all windows
-            $Signature = @"
-[DllImport"user32.dll", SetLastError=true, CharSet=CharSet.Auto)]
-public static extern IntPtr SendMessageTimeout(
-    IntPtr hWnd, uint Msg, IntPtr wParam, string lParam,
-    uint fuFlags, uint uTimeout, out IntPtr lpdwResult);
-"@
-
-            $Type = Add-Type -MemberDefinition $Signature -Name "Win32" -PassThru
-            $Result = [IntPtr]::Zero
-            $Type::SendMessageTimeout(0xffff, 0x001A, [IntPtr]::Zero, "Environment", 0, 5000, [ref]$Result)
+            Send-EnvironmentChange | Out-Null
         } else {
             # For user scope, just update current process
             Set-Item -Path "env:$VarName" -Value $VarValue
@@ -204,10 +267,118 @@ function Get-EnvironmentVariablesList {
     }
 }
 
+# Function to set several environment variables with a single broadcast
+function Set-EnvironmentVariablesInternal {
+    param(
+        [string]$EncodedVariables,
+        [string]$TargetScope,
+        [bool]$SendBroadcast = $true
+    )
+
+    try {
+        $VarTable = ConvertFrom-Base64Json -Encoded $EncodedVariables
+    }
+    catch {
+        return @{
+            Success = $false
+            Message = "Invalid Variables parameter: $($_.Exception.Message)"
+            Error = $_.Exception.Message
+        }
+    }
+
+    $RegPath = Get-EnvironmentRegistryPath -TargetScope $TargetScope
+    $Results = @()
+    $FailedCount = 0
+
+    foreach ($Property in $VarTable.PSObject.Properties) {
+        $VarName = $Property.Name
+        $VarValue = [string]$Property.Value
+        try {
+            # Write the registry directly; [Environment]::SetEnvironmentVariable would broadcast once per variable
+            Set-ItemProperty -Path $RegPath -Name $VarName -Value $VarValue -Force
+            Set-Item -Path "env:$VarName" -Value $VarValue -ErrorAction SilentlyContinue
+            $Results += @{
+                Name = $VarName
+                Success = $true
+                Message = "Environment variable '$VarName' set to '$VarValue' for $TargetScope scope"
+                Value = $VarValue
+            }
+        }
+        catch {
+            $FailedCount++
+            $Results += @{
+                Name = $VarName
+                Success = $false
+                Message = "Failed to set environment variable '$VarName': $($_.Exception.Message)"
+                Error = $_.Exception.Message
+            }
+        }
+    }
+
+    # One broadcast for the whole batch
+    $Broadcasted = $false
+    if ($SendBroadcast -and $Results.Count -gt $FailedCount) {
+        $Broadcasted = Send-EnvironmentChange
+    }
+
+    return @{
+        Success = ($FailedCount -eq 0)
+        Message = "$($Results.Count - $FailedCount) of $($Results.Count) environment variables set for $TargetScope scope"
+        Results = $Results
+        Broadcast = $Broadcasted
+    }
+}
+
+# Function to get several environment variables in one call
+function Get-EnvironmentVariablesInternal {
+    param(
+        [string]$EncodedNames,
+        [string]$TargetScope
+    )
+
+    try {
+        $NameList = @(ConvertFrom-Base64Json -Encoded $EncodedNames)
+    }
+    catch {
+        return @{
+            Success = $false
+            Message = "Invalid Names parameter: $($_.Exception.Message)"
+            Error = $_.Exception.Message
+        }
+    }
+
+    $Results = @()
+    $FailedCount = 0
+
+    foreach ($VarName in $NameList) {
+        $Item = Get-EnvironmentVariableInternal -VarName $VarName -TargetScope $TargetScope
+        $Item.Name = $VarName
+        if (-not $Item.Success) {
+            $FailedCount++
+        }
+        $Results += $Item
+    }
+
+    return @{
+        Success = ($FailedCount -eq 0)
+        Message = "$($Results.Count - $FailedCount) of $($Results.Count) environment variables retrieved"
+        Results = $Results
+    }
+}
+
+if (($Action -eq "Set" -or $Action -eq "Get" -or $Action -eq "Delete") -and -not $Name) {
+    @{
+        Success = $false
+        Message = "Parameter -Name is required for action '$Action'"
+        Error = "Missing parameter"
+    } | ConvertTo-Json -Depth 3
+    return
+}
+
 # Main execution logic
 $Result = switch ($Action) {
     "Set" {
-        Set-EnvironmentVariableInternal -VarName $Name -VarValue $Value -TargetScope $Scope
+        Set-EnvironmentVariableInternal -VarName $Name -VarValue $Value -TargetScope $Scope -SendBroadcast ($Broadcast -eq "True")
     }
     "Get" {
         Get-EnvironmentVariableInternal -VarName $Name -TargetScope $Scope
@@ -218,6 +389,19 @@ $Result = switch ($Action) {
     "List" {
         Get-EnvironmentVariablesList -TargetScope $Scope
     }
+    "SetMany" {
+        Set-EnvironmentVariablesInternal -EncodedVariables $Variables -TargetScope $Scope -SendBroadcast ($Broadcast -eq "True")
+    }
+    "GetMany" {
+        Get-EnvironmentVariablesInternal -EncodedNames $Names -TargetScope $Scope
+    }
+    "Broadcast" {
+        $Sent = Send-EnvironmentChange
+        @{
+            Success = $Sent
+            Message = if ($Sent) { "Environment change broadcast sent" } else { "Failed to broadcast environment change" }
+        }
+    }
 }
 
 # Output result as JSON
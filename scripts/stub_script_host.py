@@ -0,0 +1,172 @@
+"""
+脚本宿主替身
+在没有 PowerShell 的系统（例如 Linux）上代替 ScriptHost.ps1，用于测试和基准测试。
+协议与 ScriptHost.ps1 相同：stdin 每行一个 JSON 请求，stdout 每行一个 JSON 响应。
+Set-EnvironmentVariable.ps1 的各个动作用进程内字典模拟。
+
+环境变量：
+    STUB_HOST_LATENCY       每次脚本调用的模拟延迟（秒），默认 0
+    STUB_HOST_FAILURE_RATE  脚本调用返回失败的概率（0~1），默认 0
+    STUB_HOST_STATE_FILE    持久化变量的 JSON 文件，多个宿主进程可共享，默认不持久化
+
+用法：
+    SCRIPT_HOST_COMMAND = [sys.executable, 'scripts/stub_script_host.py']
+"""
+import base64
+import json
+import os
+import random
+import sys
+import time
+
+
+LATENCY = float(os.environ.get('STUB_HOST_LATENCY', '0') or 0)
+FAILURE_RATE = float(os.environ.get('STUB_HOST_FAILURE_RATE', '0') or 0)
+STATE_FILE = os.environ.get('STUB_HOST_STATE_FILE')
+
+_memory_state = {'User': {}, 'Machine': {}}
+
+
+def load_state():
+    """读取模拟的环境变量"""
+    if not STATE_FILE:
+        return _memory_state
+    try:
+        with open(STATE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'User': {}, 'Machine': {}}
+
+
+def save_state(state):
+    """保存模拟的环境变量"""
+    if not STATE_FILE:
+        return
+    temp_file = f'{STATE_FILE}.{os.getpid()}.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(temp_file, STATE_FILE)
+
+
+def run_env_script(parameters):
+    """模拟 Set-EnvironmentVariable.ps1，返回与其相同结构的结果"""
+    action = parameters.get('Action')
+    scope = parameters.get('Scope', 'User')
+    name = parameters.get('Name', '')
+
+    if FAILURE_RATE and random.random() < FAILURE_RATE:
+        return {
+            'Success': False,
+            'Message': f"Simulated failure for action '{action}'",
+            'Error': 'Simulated failure'
+        }
+
+    state = load_state()
+    variables = state.setdefault(scope, {})
+
+    if action == 'Set':
+        variables[name] = parameters.get('Value', '')
+        save_state(state)
+        return {
+            'Success': True,
+            'Message': f"Environment variable '{name}' set to '{variables[name]}' for {scope} scope",
+            'Value': variables[name]
+        }
+    if action == 'Get':
+        return {
+            'Success': True,
+            'Message': f"Environment variable '{name}' retrieved successfully",
+            'Value': variables.get(name, '')
+        }
+    if action == 'Delete':
+        variables.pop(name, None)
+        save_state(state)
+        return {
+            'Success': True,
+            'Message': f"Environment variable '{name}' deleted from {scope} scope"
+        }
+    if action == 'SetMany':
+        batch = json.loads(base64.b64decode(parameters.get('Variables', '')).decode('utf-8'))
+        results = []
+        for var_name, var_value in batch.items():
+            variables[var_name] = str(var_value)
+            results.append({
+                'Name': var_name,
+                'Success': True,
+                'Message': f"Environment variable '{var_name}' set to '{var_value}' for {scope} scope",
+                'Value': variables[var_name]
+            })
+        save_state(state)
+        return {
+            'Success': True,
+            'Message': f'{len(results)} of {len(results)} environment variables set for {scope} scope',
+            'Results': results,
+            'Broadcast': parameters.get('Broadcast', 'True') == 'True'
+        }
+    if action == 'GetMany':
+        names = json.loads(base64.b64decode(parameters.get('Names', '')).decode('utf-8'))
+        results = [{
+            'Name': var_name,
+            'Success': True,
+            'Message': f"Environment variable '{var_name}' retrieved successfully",
+            'Value': variables.get(var_name, '')
+        } for var_name in names]
+        return {
+            'Success': True,
+            'Message': f'{len(results)} of {len(results)} environment variables retrieved',
+            'Results': results
+        }
+    if action == 'Broadcast':
+        return {
+            'Success': True,
+            'Message': 'Environment change broadcast sent'
+        }
+    if action == 'List':
+        return {
+            'Success': True,
+            'Message': 'Environment variables list retrieved successfully',
+            'Variables': variables,
+            'Count': len(variables)
+        }
+    return {
+        'Success': False,
+        'Message': f'Unknown action: {action}',
+        'Error': 'Invalid action'
+    }
+
+
+def handle(request):
+    """处理一个宿主请求"""
+    op = request.get('op')
+    if op == 'ping':
+        return {'ok': True}
+    if op != 'run':
+        return {'ok': False, 'error': f'Unknown op: {op}'}
+
+    if LATENCY:
+        time.sleep(LATENCY)
+    result = run_env_script(request.get('parameters') or {})
+    return {'ok': True, 'output': json.dumps(result, ensure_ascii=False)}
+
+
+def main():
+    """主循环"""
+    sys.stdin.reconfigure(encoding='utf-8')
+    sys.stdout.reconfigure(encoding='utf-8')
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            response = handle(request)
+        except Exception as e:
+            response = {'ok': False, 'error': str(e)}
+        response['id'] = request_id
+        sys.stdout.write(json.dumps(response, ensure_ascii=False) + '\n')
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
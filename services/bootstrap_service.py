@@ -0,0 +1,136 @@
+"""
+页面初始化服务
+把页面加载时需要的权限信息、环境变量访问测试、配置列表和当前环境变量并发计算，一次返回
+
+- 配置列表只读存储，直接在请求线程中计算，总是随响应返回
+- 其他部分需要执行脚本，在线程池中执行，最多等待 BOOTSTRAP_WAIT_SECONDS 秒；
+  每个部分同一时间只有一个任务，并发的页面加载共用它，不会因为排队占满线程池
+- 已完成的部分直接返回（status 为 'ready'），未完成的标记为 'pending'，失败的标记为 'error'
+- 未完成的部分继续在后台执行并写入各自的缓存，前端随后请求该部分自己的接口（url）即可取到结果
+"""
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from config.settings import BOOTSTRAP_WAIT_SECONDS
+from models.namespaces import DEFAULT_NAMESPACE
+from services.capability_service import CapabilityService
+from services.config_service import ConfigService
+from services.job_service import env_vars_result, env_access_result
+
+
+_bootstrap_pool = None
+_bootstrap_pool_lock = threading.Lock()
+
+# 部分名称 -> 正在执行的任务（单飞：同一时间每个部分最多一个任务）
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def get_bootstrap_pool():
+    """获取计算后台部分使用的线程池（首次使用时创建，每个部分一个线程即可）"""
+    global _bootstrap_pool
+    if _bootstrap_pool is None:
+        with _bootstrap_pool_lock:
+            if _bootstrap_pool is None:
+                _bootstrap_pool = ThreadPoolExecutor(
+                    max_workers=sum(1 for _, _, _, background in SECTIONS.values() if background),
+                    thread_name_prefix='bootstrap'
+                )
+    return _bootstrap_pool
+
+
+def privilege_result(refresh=False):
+    """GET /api/check-admin 的响应内容"""
+    privilege_info = CapabilityService.get_privilege_info(refresh=refresh)
+    return {
+        'isAdmin': privilege_info['is_admin'],
+        'canModifyEnv': privilege_info['can_modify_env'],
+        'level': privilege_info['level'],
+        'recommendations': privilege_info['recommendations'],
+        'probedAt': CapabilityService.get_probed_at('privilege')
+    }
+
+
+# 部分名称 -> (计算函数, 该部分自己的接口, 是否按命名空间划分, 是否在线程池中计算)
+SECTIONS = {
+    'privilege': (privilege_result, '/api/check-admin', False, True),
+    'envAccess': (env_access_result, '/api/test-env-access', False, True),
+    'configs': (ConfigService.get_all_configs, '/api/configs', True, False),
+    'envVars': (env_vars_result, '/api/env-vars', False, True)
+}
+
+
+def _section_url(name, namespace):
+    _, url, namespaced, _ = SECTIONS[name]
+    if namespaced and namespace != DEFAULT_NAMESPACE:
+        return f'/api/ns/{namespace}' + url[len('/api'):]
+    return url
+
+
+def _submit_section(name):
+    """返回该部分正在执行的任务，没有时提交一个"""
+    with _inflight_lock:
+        future = _inflight.get(name)
+        if future is None or future.done():
+            func = SECTIONS[name][0]
+            future = get_bootstrap_pool().submit(contextvars.copy_context().run, func)
+            _inflight[name] = future
+        return future
+
+
+def _section_result(future, url):
+    if not future.done():
+        return {'status': 'pending', 'url': url}
+    try:
+        return {'status': 'ready', 'url': url, 'data': future.result()}
+    except Exception as e:
+        return {'status': 'error', 'url': url, 'message': str(e)}
+
+
+class BootstrapService:
+    """页面初始化服务"""
+
+    @staticmethod
+    def get_bootstrap(wait_seconds=None, namespace=DEFAULT_NAMESPACE):
+        """
+        并发计算页面初始化需要的全部内容
+
+        Args:
+            wait_seconds (float): 最多等待后台部分的秒数，默认取 BOOTSTRAP_WAIT_SECONDS
+            namespace (str): 配置列表所属的命名空间（只用于生成 url，读取时使用调用方的上下文）
+
+        Returns:
+            dict: sections 中每个部分为 {'status', 'url', 'data' 或 'message'}，pending 列出未完成的部分
+        """
+        if wait_seconds is None:
+            wait_seconds = BOOTSTRAP_WAIT_SECONDS
+        started = time.perf_counter()
+
+        futures = {
+            name: _submit_section(name)
+            for name, (_, _, _, background) in SECTIONS.items() if background
+        }
+
+        sections = {}
+        for name, (func, _, _, background) in SECTIONS.items():
+            if background:
+                continue
+            url = _section_url(name, namespace)
+            try:
+                sections[name] = {'status': 'ready', 'url': url, 'data': func()}
+            except Exception as e:
+                sections[name] = {'status': 'error', 'url': url, 'message': str(e)}
+
+        wait(futures.values(), timeout=max(0.0, wait_seconds - (time.perf_counter() - started)))
+        for name, future in futures.items():
+            sections[name] = _section_result(future, _section_url(name, namespace))
+
+        # 按 SECTIONS 的顺序返回
+        sections = {name: sections[name] for name in SECTIONS}
+        return {
+            'success': True,
+            'sections': sections,
+            'pending': [name for name, section in sections.items() if section['status'] == 'pending'],
+            'elapsedMs': round((time.perf_counter() - started) * 1000, 2)
+        }
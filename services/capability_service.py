@@ -0,0 +1,124 @@
+"""
+系统能力探测服务
+权限检查和环境变量访问测试在启动时执行一次，结果在进程生命周期内缓存，
+只在显式刷新或应用配置失败后重新探测
+"""
+import threading
+import time
+from datetime import datetime
+from core.permissions import check_runtime_privilege
+
+
+class ProbeCache:
+    """单个探测的缓存结果"""
+
+    def __init__(self, name, probe):
+        self.name = name
+        self.probe = probe
+        self.result = None
+        self.probed_at = None
+        self.duration_ms = None
+        self.stale = True
+        self._lock = threading.Lock()
+
+    def get(self, refresh=False):
+        """获取探测结果，缓存缺失、过期或要求刷新时重新探测"""
+        with self._lock:
+            if refresh or self.stale or self.result is None:
+                started = time.perf_counter()
+                self.result = self.probe()
+                self.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+                self.probed_at = datetime.now().isoformat()
+                self.stale = False
+            return self.result
+
+    def invalidate(self):
+        """标记为过期，下次读取时重新探测"""
+        self.stale = True
+
+    def describe(self):
+        """缓存状态"""
+        return {
+            'result': self.result,
+            'probedAt': self.probed_at,
+            'durationMs': self.duration_ms,
+            'stale': self.stale
+        }
+
+
+def _probe_privilege():
+    """权限检查，环境变量修改权限由当前的环境变量后端判断"""
+    from services.env_service import get_env_backend
+    return check_runtime_privilege(get_env_backend().can_modify())
+
+
+def _probe_env_access():
+    """环境变量读写测试（延迟导入，避免启动时加载环境变量后端）"""
+    from services.env_service import EnvService
+    return EnvService.test_environment_variable_access()
+
+
+_probes = {
+    'privilege': ProbeCache('privilege', _probe_privilege),
+    'env_access': ProbeCache('env_access', _probe_env_access)
+}
+
+
+class CapabilityService:
+    """系统能力探测服务"""
+
+    @staticmethod
+    def get_privilege_info(refresh=False):
+        """获取权限信息（check_runtime_privilege 的缓存结果）"""
+        return _probes['privilege'].get(refresh)
+
+    @staticmethod
+    def get_env_access(refresh=False):
+        """获取环境变量访问测试结果（缓存）"""
+        return _probes['env_access'].get(refresh)
+
+    @staticmethod
+    def get_probed_at(name):
+        """获取某个探测最近一次执行的时间"""
+        return _probes[name].probed_at
+
+    @staticmethod
+    def probe_all(background=False, on_probe=None):
+        """
+        执行全部探测
+
+        Args:
+            background (bool): 为 True 时全部探测在后台线程中依次执行，立即返回
+            on_probe (callable): 每个探测完成后以 (名称, 结果) 调用，例如打印启动信息
+        """
+        def run():
+            for name in ('privilege', 'env_access'):
+                result = _probes[name].get(refresh=True)
+                if on_probe is not None:
+                    on_probe(name, result)
+
+        if background:
+            threading.Thread(target=run, name='capability-probe', daemon=True).start()
+        else:
+            run()
+
+    @staticmethod
+    def register_probe(name, probe):
+        """替换某个探测的实现（例如在基准测试中模拟权限），结果标记为过期"""
+        _probes[name] = ProbeCache(name, probe)
+
+    @staticmethod
+    def invalidate():
+        """标记全部探测结果过期（例如应用配置失败后）"""
+        for probe in _probes.values():
+            probe.invalidate()
+
+    @staticmethod
+    def get_status(refresh=False):
+        """获取全部探测的缓存结果及探测时间"""
+        if refresh:
+            CapabilityService.probe_all()
+        return {
+            'success': True,
+            'capabilities': {name: probe.describe() for name, probe in _probes.items()}
+        }
@@ -1,34 +1,20 @@
 """
 配置管理服务
 """
+import json
+from config.settings import EXPORT_CHUNK_SIZE, IMPORT_BATCH_SIZE
 from models.config import ConfigModel
+from services.import_service import ConfigImporter
+from services.validation_service import ValidationService
 
 
-def validate_config(config):
-    """验证配置参数，返回警告信息列表"""
-    warnings = []
-
-    token = config.get('ANTHROPIC_AUTH_TOKEN', '').strip()
-    if not token:
-        warnings.append('ANTHROPIC_AUTH_TOKEN 为空')
-    elif len(token) < 10:
-        warnings.append('ANTHROPIC_AUTH_TOKEN 看起来太短')
-
-    url = config.get('ANTHROPIC_BASE_URL', '').strip()
-    if not url:
-        warnings.append('ANTHROPIC_BASE_URL 为空')
-    elif not url.startswith('http'):
-        warnings.append('ANTHROPIC_BASE_URL 不是有效的URL格式')
+# GET /api/configs 支持的排序字段（前缀 '-' 表示倒序）
+SORT_FIELDS = ('createdAt', '-createdAt', 'name', '-name')
 
-    traffic = config.get('CLAUDE_CODE_DISABLE_NONESSENTIAL_TRAFFIC', '').strip().lower()
-    if traffic and traffic not in ['true', 'false']:
-        warnings.append('CLAUDE_CODE_DISABLE_NONESSENTIAL_TRAFFIC 应该是 true 或 false')
 
-    model = config.get('AI_model', '').strip()
-    if not model:
-        warnings.append('AI_model 为空')
-
-    return warnings
+def validate_config(config):
+    """验证配置参数，返回警告信息列表"""
+    return ValidationService.validate(config)
 
 
 class ConfigService:
@@ -44,18 +30,68 @@ class ConfigService:
             'configs': data.get('configs', [])
         }
 
+    @staticmethod
+    def query_configs(name=None, model=None, sort=None, offset=0, limit=None, fields=None):
+        """
+        分页、过滤并投影配置列表
+
+        Args:
+            name (str): 名称包含的子串（不区分大小写）
+            model (str): AI_model 精确匹配
+            sort (str): SORT_FIELDS 中的一个
+            offset (int): 跳过的条数
+            limit (int): 每页条数，None 表示不分页
+            fields (list): 只返回这些字段（始终包含 id），None 表示全部字段
+
+        Returns:
+            dict: 配置列表及分页信息
+        """
+        if sort and sort not in SORT_FIELDS:
+            return {'success': False, 'message': f"不支持的排序字段: {sort}"}
+        if offset < 0 or (limit is not None and limit < 0):
+            return {'success': False, 'message': 'offset 和 limit 不能为负数'}
+
+        configs, total = ConfigModel.query_configs(name, model, sort, offset, limit)
+        if fields:
+            keep = ['id'] + [field for field in fields if field != 'id']
+            configs = [{field: config[field] for field in keep if field in config} for config in configs]
+
+        next_offset = offset + len(configs)
+        return {
+            'success': True,
+            'defaultConfigId': ConfigModel.get_default_config_id(),
+            'configs': configs,
+            'total': total,
+            'offset': offset,
+            'limit': limit,
+            'next_offset': next_offset if next_offset < total else None
+        }
+
+    @staticmethod
+    def get_version():
+        """获取配置存储的版本标识"""
+        return ConfigModel.get_version()
+
+    @staticmethod
+    def get_config(config_id):
+        """按 id 获取单个配置"""
+        config = ConfigModel.get_config(config_id)
+        if config is None:
+            return {'success': False, 'message': '配置不存在'}
+        return {'success': True, 'config': config}
+
     @staticmethod
     def create_config(config_data):
         """创建新配置"""
         try:
-            data = ConfigModel.load_configs()
             new_config = ConfigModel.create_config(
                 config_data.get('name', '新配置'),
                 config_data
             )
-            data['configs'].append(new_config)
-            ConfigModel.save_configs(data)
-            return {'success': True, 'config': new_config}
+            saved_config = ConfigModel.add_config(new_config)
+            if saved_config is None:
+                return {'success': False, 'message': '保存配置失败'}
+            return {'success': True, 'config': saved_config}
         except Exception as e:
             return {'success': False, 'message': str(e)}
 
@@ -63,12 +99,9 @@ class ConfigService:
     def update_config(config_id, update_data):
         """更新配置"""
         try:
-            data = ConfigModel.load_configs()
-            for config in data['configs']:
-                if config['id'] == config_id:
-                    ConfigModel.update_config(config, update_data)
-                    ConfigModel.save_configs(data)
-                    return {'success': True, 'config': config}
+            config = ConfigModel.update_config(config_id, update_data)
+            if config is not None:
+                return {'success': True, 'config': config}
             return {'success': False, 'message': '配置不存在'}
         except Exception as e:
             return {'success': False, 'message': str(e)}
@@ -77,9 +110,7 @@ class ConfigService:
     def delete_config(config_id):
         """删除配置"""
         try:
-            data = ConfigModel.load_configs()
-            if ConfigModel.delete_config(data, config_id):
-                ConfigModel.save_configs(data)
+            if ConfigModel.delete_config(config_id):
                 return {'success': True}
             return {'success': False, 'message': '配置不存在'}
         except Exception as e:
@@ -89,9 +120,7 @@ class ConfigService:
     def set_default_config(config_id):
         """设置默认配置"""
         try:
-            data = ConfigModel.load_configs()
-            if ConfigModel.set_default_config(data, config_id):
-                ConfigModel.save_configs(data)
+            if ConfigModel.set_default_config(config_id):
                 return {'success': True}
             return {'success': False, 'message': '配置不存在'}
         except Exception as e:
@@ -107,17 +136,93 @@ class ConfigService:
         }
 
     @staticmethod
-    def import_configs(import_data):
-        """导入配置"""
+    def validate_configs(configs):
+        """批量验证配置，逐个产出结果，最后产出汇总"""
+        return ValidationService.validate_batch(configs)
+
+    @staticmethod
+    def import_configs(import_data, policy=None):
+        """
+        导入配置（按 id 和内容哈希去重合并）
+
+        Args:
+            import_data (dict): {'configs': [...]}，可带 'policy'
+            policy (str): 合并策略，优先于 import_data 中的 policy，默认 IMPORT_MERGE_POLICY
+
+        Returns:
+            dict: 新增、更新、跳过和冲突数量的摘要
+        """
         try:
-            data = ConfigModel.load_configs()
             imported_configs = import_data.get('configs', [])
-            data['configs'].extend(imported_configs)
-            ConfigModel.save_configs(data)
-            return {'success': True, 'imported_count': len(imported_configs)}
+            importer = ConfigImporter(policy or import_data.get('policy'))
+            importer.merge(imported_configs)
+            importer.flush()
+            return dict(importer.get_summary(), success=True)
         except Exception as e:
             return {'success': False, 'message': str(e)}
 
+    @staticmethod
+    def import_ndjson(lines, batch_size=IMPORT_BATCH_SIZE, policy=None):
+        """
+        逐行解析 NDJSON 并分批去重合并导入，每提交一批产出一次进度
+
+        Args:
+            lines: 可迭代的行（bytes 或 str），每行一个配置对象，空行忽略
+            batch_size (int): 每批提交的条数
+            policy (str): 合并策略，默认 IMPORT_MERGE_POLICY
+
+        Yields:
+            dict: 导入摘要加 {'success', 'lines', 'done'}，出错时带 message 并停止，
+                  之前已合并的配置保留（JSON 后端的合并结果可能在结束时才写入）
+        """
+        line_number = 0
+        batch = []
+        try:
+            importer = ConfigImporter(policy)
+        except ValueError as e:
+            yield {'success': False, 'message': str(e), 'imported_count': 0, 'lines': 0, 'done': True}
+            return
+        try:
+            for line_number, line in enumerate(lines, 1):
+                if isinstance(line, bytes):
+                    line = line.decode('utf-8')
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    config = json.loads(line)
+                except ValueError:
+                    config = None
+                if not isinstance(config, dict):
+                    raise ValueError(f'第 {line_number} 行不是有效的配置 JSON 对象')
+
+                batch.append(config)
+                if len(batch) >= batch_size:
+                    importer.merge(batch)
+                    batch = []
+                    yield dict(importer.get_summary(), success=True, lines=line_number, done=False)
+
+            if batch:
+                importer.merge(batch)
+            importer.flush()
+            yield dict(importer.get_summary(), success=True, lines=line_number, done=True)
+        except Exception as e:
+            try:
+                # 出错前已合并的配置照常写入
+                importer.flush()
+            except Exception:
+                pass
+            yield dict(importer.get_summary(), success=False, message=str(e), lines=line_number, done=True)
+
+    @staticmethod
+    def get_cache_stats():
+        """获取配置缓存统计"""
+        return {
+            'success': True,
+            'stats': ConfigModel.get_cache_stats(),
+            'namespaces': ConfigModel.get_namespace_stats()
+        }
+
     @staticmethod
     def export_configs():
         """导出配置"""
@@ -125,4 +230,30 @@ class ConfigService:
             data = ConfigModel.load_configs()
             return {'success': True, 'data': data}
         except Exception as e:
-            return {'success': False, 'message': str(e)}
\ No newline at end of file
+            return {'success': False, 'message': str(e)}
+
+    @staticmethod
+    def export_stream(export_format='json'):
+        """
+        流式导出配置，逐块产出文本，不在内存中构建完整文档
+
+        Args:
+            export_format (str): 'json' 产出与 configs.json 相同格式的文档；
+                                 'ndjson' 每行一个配置
+
+        Yields:
+            str: 文本块
+        """
+        configs = ConfigModel.iter_configs(EXPORT_CHUNK_SIZE)
+        if export_format == 'ndjson':
+            for config in configs:
+                yield json.dumps(config, ensure_ascii=False) + '\n'
+            return
+
+        default_id = json.dumps(ConfigModel.get_default_config_id(), ensure_ascii=False)
+        yield f'{{"defaultConfigId": {default_id}, "configs": ['
+        separator = '\n'
+        for config in configs:
+            yield separator + json.dumps(config, ensure_ascii=False)
+            separator = ',\n'
+        yield '\n]}\n'
\ No newline at end of file
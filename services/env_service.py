@@ -1,8 +1,46 @@
 """
 环境变量服务
 """
-from config.settings import ENV_VARS
-from core.script_executor import script_executor
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config.settings import ENV_VARS, APPLY_MODE, APPLY_MAX_WORKERS, APPLY_ONLY_CHANGED, ENV_SNAPSHOT_TTL
+from core.env_backend import create_env_backend
+
+
+# 应用配置的执行方式
+APPLY_MODES = ('batch', 'sequential', 'parallel')
+
+_apply_pool = None
+_apply_pool_lock = threading.Lock()
+
+# 环境变量后端在第一次使用时按 ENV_BACKEND 创建（基准测试会直接替换该变量）
+env_backend = None
+_env_backend_lock = threading.Lock()
+
+
+def get_env_backend():
+    """获取环境变量后端"""
+    global env_backend
+    if env_backend is None:
+        with _env_backend_lock:
+            if env_backend is None:
+                env_backend = create_env_backend()
+    return env_backend
+
+
+def get_apply_pool():
+    """获取并行应用配置使用的线程池（首次使用时创建）"""
+    global _apply_pool
+    if _apply_pool is None:
+        with _apply_pool_lock:
+            if _apply_pool is None:
+                _apply_pool = ThreadPoolExecutor(
+                    max_workers=APPLY_MAX_WORKERS,
+                    thread_name_prefix='env-apply'
+                )
+    return _apply_pool
 
 
 def get_env_var(var_name):
@@ -22,103 +60,372 @@ def get_all_current_env_vars(env_vars):
     return result
 
 
+class EnvSnapshotCache:
+    """
+    当前环境变量快照缓存
+
+    - 快照在 ttl 秒内直接返回，过期后重新查询
+    - 同一时间只有一次查询，并发的请求等待并共用它的结果；查询期间不持有 _lock，
+      peek、update 和 invalidate 不会被查询阻塞
+    - 应用配置成功后直接用写入的值刷新快照，不需要再次查询
+    - 应用配置部分失败时丢弃快照，下次读取重新查询
+    - 查询失败的变量值未知：get 返回备用值用于展示，peek 不包含这些变量，应用时总会写入
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._values = None
+        self._unknown = frozenset()
+        self._updated_at = 0.0
+        # 每次 update/invalidate 递增，查询期间快照被改写时不再用查询结果覆盖
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def _cached(self, newer_than=None):
+        """未过期（或在 newer_than 之后更新）的快照结果，没有时返回 None（调用方需持有 _lock）"""
+        if self._values is None:
+            return None
+        age = time.monotonic() - self._updated_at
+        if newer_than is not None:
+            if self._updated_at < newer_than:
+                return None
+        elif age >= self.ttl:
+            return None
+        return {'vars': dict(self._values), 'cached': True, 'age': round(age, 3)}
+
+    def get(self, loader, refresh=False):
+        """
+        获取快照
+
+        Args:
+            loader (callable): 快照缺失或过期时用于查询的函数，返回 (变量值, 查询失败的变量名集合)
+            refresh (bool): 是否忽略缓存强制查询
+
+        Returns:
+            dict: {'vars': ..., 'cached': bool, 'age': 秒}
+        """
+        requested_at = time.monotonic()
+        if not refresh:
+            with self._lock:
+                cached = self._cached()
+            if cached is not None:
+                return cached
+
+        with self._load_lock:
+            # 等待期间其他请求可能已经完成了一次查询，直接使用它的结果
+            with self._lock:
+                cached = self._cached(newer_than=requested_at if refresh else None)
+                generation = self._generation
+            if cached is not None:
+                return cached
+
+            values, unknown = loader()
+            with self._lock:
+                if self._generation == generation:
+                    self._values = dict(values)
+                    self._unknown = frozenset(unknown)
+                    self._updated_at = time.monotonic()
+            return {'vars': dict(values), 'cached': False, 'age': 0.0}
+
+    def peek(self):
+        """返回未过期快照中值已知的变量，没有快照或已过期时返回 None（不查询）"""
+        with self._lock:
+            cached = self._cached()
+            unknown = self._unknown
+        if cached is None:
+            return None
+        return {name: value for name, value in cached['vars'].items() if name not in unknown}
+
+    def update(self, values):
+        """用已确认写入的完整变量值刷新快照"""
+        with self._lock:
+            self._values = dict(values)
+            self._unknown = frozenset()
+            self._updated_at = time.monotonic()
+            self._generation += 1
+
+    def invalidate(self):
+        """丢弃快照"""
+        with self._lock:
+            self._values = None
+            self._generation += 1
+
+
+# 创建全局环境变量快照缓存
+env_snapshot_cache = EnvSnapshotCache(ENV_SNAPSHOT_TTL)
+
+
 class EnvService:
     """环境变量服务"""
 
     @staticmethod
-    def get_current_env_vars():
-        """获取当前系统环境变量"""
-        # 优先使用脚本方式获取（更准确）
+    def _read_env_vars():
+        """读取全部变量，返回 (变量值, 后端读取失败的变量名集合)"""
+        # 优先使用脚本方式获取（更准确），一次调用读取全部变量
         vars_data = {}
+        unknown = set()
+        batch_result = get_env_backend().get_environment_variables(ENV_VARS, 'User')
         for var_name in ENV_VARS:
-            result = script_executor.get_environment_variable(var_name, 'User')
+            result = batch_result['results'][var_name]
             if result.get('success'):
                 vars_data[var_name] = result.get('value', '')
             else:
-                # 备用方法：使用原来的注册表方式
+                # 备用方法：使用原来的注册表方式（只用于展示，不作为应用时比较的依据）
                 vars_data[var_name] = get_env_var(var_name)
+                unknown.add(var_name)
 
-        return vars_data
+        return vars_data, unknown
 
     @staticmethod
-    def apply_config(config):
-        """应用配置到系统环境变量"""
-        results = []
-        success_count = 0
-        errors = []
+    def get_current_env_vars():
+        """获取当前系统环境变量"""
+        return EnvService._read_env_vars()[0]
 
-        for var_name in ENV_VARS:
-            var_value = config.get(var_name, '')
+    @staticmethod
+    def get_env_snapshot(refresh=False):
+        """
+        获取当前系统环境变量（带缓存）
 
-            # 使用PowerShell脚本设置环境变量
-            result = script_executor.set_environment_variable(var_name, var_value, 'User')
+        Args:
+            refresh (bool): 是否忽略缓存重新查询
 
-            success = result.get('success', False)
-            message = result.get('message', 'Unknown error')
+        Returns:
+            dict: {'vars': 变量值, 'cached': 是否来自缓存, 'age': 快照已存在的秒数}
+        """
+        return env_snapshot_cache.get(EnvService._read_env_vars, refresh)
 
-            results.append({
-                'var_name': var_name,
-                'success': success,
-                'message': message,
-                'var_value': var_value
-            })
+    @staticmethod
+    def _set_variable_timed(var_name, var_value):
+        """设置单个环境变量（不广播，由调用方最后统一广播），返回 (结果, 耗时毫秒)"""
+        started = time.perf_counter()
+        result = get_env_backend().set_environment_variable(var_name, var_value, 'User', broadcast=False)
+        return result, (time.perf_counter() - started) * 1000
+
+    @staticmethod
+    def _apply_batch(variables):
+        """一次后端调用设置全部变量并广播一次，每个变量的耗时即整个批次的耗时"""
+        if not variables:
+            return
+        started = time.perf_counter()
+        batch_result = get_env_backend().set_environment_variables(variables, 'User')
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        for var_name in variables:
+            yield var_name, batch_result['results'][var_name], elapsed_ms
+
+    @staticmethod
+    def _apply_sequential(variables):
+        """逐个设置变量，停止迭代后不再设置剩余的变量"""
+        for var_name, var_value in variables.items():
+            yield (var_name,) + EnvService._set_variable_timed(var_name, var_value)
+
+    @staticmethod
+    def _apply_parallel(variables):
+        """在线程池中并发设置各个变量（脚本后端的并发度同时受脚本宿主进程数限制），按完成顺序产出"""
+        pool = get_apply_pool()
+        # 任务复制请求的上下文，脚本调用计入请求的剖析结果
+        futures = {
+            pool.submit(contextvars.copy_context().run, EnvService._set_variable_timed, var_name, var_value): var_name
+            for var_name, var_value in variables.items()
+        }
+        try:
+            for future in as_completed(futures):
+                try:
+                    result, elapsed_ms = future.result()
+                except Exception as e:
+                    result, elapsed_ms = {'success': False, 'message': str(e)}, 0.0
+                yield futures[future], result, elapsed_ms
+        finally:
+            # 提前停止时取消还没开始的调用（已经开始的调用无法中断）
+            for future in futures:
+                future.cancel()
+
+    @staticmethod
+    def iter_apply_config(config, mode=None, stop_on_failure=False, cancelled=None, force=False):
+        """
+        应用配置到系统环境变量，每个变量完成时产出一个事件，最后产出汇总
+
+        调用方停止迭代（例如客户端断开后生成器被关闭）、stop_on_failure 遇到第一个失败
+        或 cancelled() 返回 True 时，不再为剩余变量启动脚本调用；'batch' 方式只有一次脚本调用，全部变量同时完成。
+        'sequential' 和 'parallel' 方式逐个写入时不广播，结束时（包括提前停止）只要有变量写入成功就广播一次环境变更
 
-            if success:
-                success_count += 1
+        APPLY_ONLY_CHANGED 开启且有未过期的快照时，与快照中的值相同的变量不写入，直接产出成功结果
+        （unchanged 为 True），汇总的 unchanged 列出这些变量；全部相同时不调用后端、不广播
+
+        Args:
+            config (dict): 配置
+            mode (str): 执行方式，同 apply_config
+            stop_on_failure (bool): 第一个变量失败后是否跳过剩余变量
+            cancelled (callable): 每个变量完成后调用，返回 True 时跳过剩余变量（例如后台任务被取消）
+            force (bool): 是否忽略快照写入全部变量
+
+        Yields:
+            tuple: ('variable', 单个变量的结果)，最后是 ('summary', 与 apply_config 相同的汇总结果)
+        """
+        mode = mode or APPLY_MODE
+        if mode not in APPLY_MODES:
+            mode = 'batch'
+
+        # 统一为字符串：写入后端、与快照比较和刷新快照使用同一组值
+        variables = {
+            var_name: '' if config.get(var_name) is None else str(config.get(var_name))
+            for var_name in ENV_VARS
+        }
+        completed = {}
+        started = time.perf_counter()
+
+        # 与当前快照比较，只写入发生变化的变量（没有快照时不额外查询，全部写入）
+        current = None if force or not APPLY_ONLY_CHANGED else env_snapshot_cache.peek()
+        if current is None:
+            changed = variables
+        else:
+            changed = {
+                var_name: var_value for var_name, var_value in variables.items()
+                if var_value != current.get(var_name)
+            }
+
+        if mode == 'parallel':
+            outcomes = EnvService._apply_parallel(changed)
+        elif mode == 'sequential':
+            outcomes = EnvService._apply_sequential(changed)
+        else:
+            # 一次设置全部环境变量，只广播一次环境变更
+            outcomes = EnvService._apply_batch(changed)
+        # 'batch' 方式由批量调用自行广播，汇总中的 broadcast 只记录逐个写入后的统一广播
+        broadcast = None
+
+        try:
+            for var_name in variables:
+                if var_name in changed:
+                    continue
+                item = {
+                    'var_name': var_name,
+                    'success': True,
+                    'message': f"Environment variable '{var_name}' already set, skipped",
+                    'var_value': variables[var_name],
+                    'elapsed_ms': 0.0,
+                    'unchanged': True,
+                    'completed': len(completed) + 1,
+                    'total': len(variables)
+                }
+                completed[var_name] = item
+                yield 'variable', item
+
+            for var_name, result, elapsed_ms in outcomes:
+                item = {
+                    'var_name': var_name,
+                    'success': result.get('success', False),
+                    'message': result.get('message', 'Unknown error'),
+                    'var_value': variables[var_name],
+                    'elapsed_ms': round(elapsed_ms, 2),
+                    'unchanged': False,
+                    'completed': len(completed) + 1,
+                    'total': len(variables)
+                }
+                completed[var_name] = item
+                yield 'variable', item
+                if stop_on_failure and not item['success']:
+                    break
+                if cancelled is not None and cancelled():
+                    break
+        finally:
+            outcomes.close()
+            if mode != 'batch' and any(item['success'] and not item['unchanged'] for item in completed.values()):
+                broadcast = get_env_backend().broadcast_environment_change()
+            # 全部写入成功时直接用写入的值刷新快照，否则丢弃快照
+            if len(completed) == len(variables) and all(item['success'] for item in completed.values()):
+                env_snapshot_cache.update(variables)
             else:
-                errors.append(f"{var_name}: {message}")
+                env_snapshot_cache.invalidate()
+        total_elapsed_ms = (time.perf_counter() - started) * 1000
 
-        return {
+        results = []
+        errors = []
+        for var_name in variables:
+            item = completed.get(var_name)
+            if item is None:
+                continue
+            results.append({
+                key: item[key] for key in ('var_name', 'success', 'message', 'var_value', 'elapsed_ms', 'unchanged')
+            })
+            if not item['success']:
+                errors.append(f"{var_name}: {item['message']}")
+        success_count = sum(1 for item in results if item['success'])
+
+        yield 'summary', {
             'success': success_count == len(ENV_VARS),
             'success_count': success_count,
             'total_count': len(ENV_VARS),
             'results': results,
             'errors': errors,
-            'method': 'PowerShell Script'
+            'skipped': [var_name for var_name in variables if var_name not in completed],
+            'unchanged': [var_name for var_name in variables if var_name not in changed],
+            'method': get_env_backend().method,
+            'backend': get_env_backend().name,
+            'mode': mode,
+            'broadcast': broadcast,
+            'elapsed_ms': round(total_elapsed_ms, 2)
         }
 
+    @staticmethod
+    def apply_config(config, mode=None, force=False):
+        """
+        应用配置到系统环境变量
+
+        Args:
+            config (dict): 配置
+            mode (str): 执行方式，'batch'（一次脚本调用）、'sequential'（逐个调用）
+                        或 'parallel'（并发调用），默认取 APPLY_MODE
+            force (bool): 是否忽略快照写入全部变量
+        """
+        summary = None
+        for event, data in EnvService.iter_apply_config(config, mode, force=force):
+            if event == 'summary':
+                summary = data
+        return summary
+
     @staticmethod
     def test_environment_variable_access():
         """测试环境变量访问权限"""
         test_var = "__TEST_VAR__"
         test_value = "test_value_" + str(hash(test_var))
 
-        # 尝试设置测试变量
-        set_result = script_executor.set_environment_variable(test_var, test_value, 'User')
+        # 尝试设置测试变量（临时变量，不需要广播）
+        set_result = get_env_backend().set_environment_variable(test_var, test_value, 'User', broadcast=False)
 
         if not set_result.get('success'):
             return {
                 'can_modify': False,
-                'method': 'PowerShell Script',
+                'method': get_env_backend().method,
                 'error': set_result.get('message', 'Unknown error'),
                 'recommendation': 'Try running the application as administrator'
             }
 
         # 尝试获取测试变量
-        get_result = script_executor.get_environment_variable(test_var, 'User')
+        get_result = get_env_backend().get_environment_variable(test_var, 'User')
 
         if not get_result.get('success'):
             return {
                 'can_modify': False,
-                'method': 'PowerShell Script',
+                'method': get_env_backend().method,
                 'error': 'Cannot read environment variable',
                 'recommendation': 'Check PowerShell execution policy'
             }
 
         # 清理测试变量
-        script_executor.delete_environment_variable(test_var, 'User')
+        get_env_backend().delete_environment_variable(test_var, 'User')
 
         retrieved_value = get_result.get('value', '')
         if retrieved_value == test_value:
             return {
                 'can_modify': True,
-                'method': 'PowerShell Script',
+                'method': get_env_backend().method,
                 'test_result': 'Environment variable access test successful'
             }
         else:
             return {
                 'can_modify': False,
-                'method': 'PowerShell Script',
+                'method': get_env_backend().method,
                 'error': f'Value mismatch: expected {test_value}, got {retrieved_value}',
                 'recommendation': 'Check PowerShell execution permissions'
             }
\ No newline at end of file
@@ -0,0 +1,192 @@
+"""
+配置导入合并服务
+按 id 和环境变量内容哈希对导入的配置去重，并按合并策略处理 id 冲突
+"""
+import hashlib
+import json
+import uuid
+from config.settings import ENV_VARS, IMPORT_MERGE_POLICY
+from models.config import ConfigModel
+from services.validation_service import ValidationService
+
+
+# 导入时 id 与已有配置冲突（且内容不同）的处理策略
+# 'skip'：保留已有配置，跳过导入的配置
+# 'overwrite'：用导入的配置替换已有配置
+# 'rename'：分配新 id（名称重复时加序号）作为新配置导入
+# 'keep-newest'：保留 createdAt 较新的一方
+MERGE_POLICIES = ('skip', 'overwrite', 'rename', 'keep-newest')
+
+# 摘要中最多列出的冲突 id 和校验警告数量
+MAX_REPORTED_CONFLICTS = 100
+
+
+def content_hash(config):
+    """环境变量字段的内容哈希，字段值相同的配置视为重复"""
+    values = [str(config.get(name) or '') for name in ENV_VARS]
+    return hashlib.sha1(json.dumps(values, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class ConfigImporter:
+    """
+    配置导入合并器
+
+    第一次 merge 时遍历一次已有配置，建立 id、内容哈希和名称索引；
+    之后每条导入记录只做常数次字典查找，整个导入是线性的。
+    同一个合并器可以对多个批次调用 merge（例如 NDJSON 分批导入），索引在批次之间保持，
+    全部批次合并后调用 flush 写入剩余的配置。
+
+    JSON 后端每次写入都重写整个文件，合并结果先累积在内存中，累积数量不少于已写入的配置数时
+    才写入一次，写入次数是对数级的，总写入量与配置数成线性；其他后端每批写入一次
+    """
+
+    def __init__(self, policy=None):
+        policy = policy or IMPORT_MERGE_POLICY
+        if policy not in MERGE_POLICIES:
+            raise ValueError(f'不支持的合并策略: {policy}')
+        self.policy = policy
+        self._pending = []
+        self._rewrites_document = None
+        self._ids = None
+        self._hashes = None
+        self._names = None
+        self.summary = {
+            'policy': policy,
+            'inserted': 0,
+            'updated': 0,
+            'skipped': 0,
+            'duplicates': 0,
+            'conflicts': 0,
+            'conflict_ids': [],
+            'invalid': 0,
+            'invalid_samples': []
+        }
+
+    def _build_indexes(self):
+        """id -> (内容哈希, createdAt, isDefault)，内容哈希 -> 配置数量，名称集合"""
+        self._ids = {}
+        self._hashes = {}
+        self._names = set()
+        for config in ConfigModel.iter_configs():
+            self._index(config)
+
+    def _index(self, config, digest=None):
+        digest = digest or content_hash(config)
+        previous = self._ids.get(config['id'])
+        if previous is not None:
+            # 被覆盖的配置不再参与内容去重
+            self._hashes[previous[0]] -= 1
+            if not self._hashes[previous[0]]:
+                del self._hashes[previous[0]]
+        self._ids[config['id']] = (digest, config.get('createdAt') or '', bool(config.get('isDefault')))
+        self._hashes[digest] = self._hashes.get(digest, 0) + 1
+        self._names.add(config.get('name'))
+
+    def _new_id(self):
+        while True:
+            config_id = str(uuid.uuid4())[:8]
+            if config_id not in self._ids:
+                return config_id
+
+    def _unique_name(self, name):
+        if name not in self._names:
+            return name
+        counter = 2
+        while f'{name} ({counter})' in self._names:
+            counter += 1
+        return f'{name} ({counter})'
+
+    def _record_conflict(self, config_id):
+        self.summary['conflicts'] += 1
+        if len(self.summary['conflict_ids']) < MAX_REPORTED_CONFLICTS:
+            self.summary['conflict_ids'].append(config_id)
+
+    def _record_warnings(self, config, warnings):
+        self.summary['invalid'] += 1
+        if len(self.summary['invalid_samples']) < MAX_REPORTED_CONFLICTS:
+            self.summary['invalid_samples'].append({
+                'id': config.get('id'),
+                'name': config.get('name'),
+                'warnings': warnings
+            })
+
+    def merge(self, configs):
+        """
+        合并一批配置，按需写入存储（剩余部分由 flush 写入）
+
+        Args:
+            configs (list): 导入的配置
+
+        Returns:
+            int: 本批次合并（新增 + 更新）的数量
+        """
+        if self._ids is None:
+            self._build_indexes()
+            self._rewrites_document = ConfigModel.rewrites_document()
+
+        writes = []
+        for config in configs:
+            if not isinstance(config, dict):
+                self.summary['skipped'] += 1
+                continue
+            config = dict(config)
+            digest = content_hash(config)
+            config_id = config.get('id')
+            existing = self._ids.get(config_id) if config_id is not None else None
+
+            if digest in self._hashes and (existing is None or existing[0] == digest):
+                # 内容与已有配置（或本次已导入的配置）相同
+                self.summary['duplicates'] += 1
+                self.summary['skipped'] += 1
+                continue
+
+            if existing is None:
+                if config_id is None:
+                    config['id'] = self._new_id()
+                # 新导入的配置不作为默认配置，避免出现多个默认配置
+                config['isDefault'] = False
+                self.summary['inserted'] += 1
+            else:
+                self._record_conflict(config_id)
+                policy = self.policy
+                if policy == 'keep-newest':
+                    policy = 'overwrite' if (config.get('createdAt') or '') > existing[1] else 'skip'
+
+                if policy == 'skip':
+                    self.summary['skipped'] += 1
+                    continue
+                if policy == 'overwrite':
+                    # 默认配置标记以已有配置为准，避免出现多个默认配置
+                    config['isDefault'] = existing[2]
+                    self.summary['updated'] += 1
+                else:
+                    config['id'] = self._new_id()
+                    config['name'] = self._unique_name(config.get('name'))
+                    config['isDefault'] = False
+                    self.summary['inserted'] += 1
+
+            # 校验只产生警告，不阻止导入
+            warnings = ValidationService.validate(config)
+            if warnings:
+                self._record_warnings(config, warnings)
+
+            self._index(config, digest)
+            writes.append(config)
+
+        self._pending.extend(writes)
+        # 累积的配置数不少于已写入的配置数时写入，每次重写整个文件时文件至少翻倍
+        if not self._rewrites_document or len(self._pending) * 2 >= len(self._ids):
+            self.flush()
+        return len(writes)
+
+    def flush(self):
+        """写入已合并但尚未写入的配置"""
+        if not self._pending:
+            return
+        if ConfigModel.upsert_configs(self._pending) != len(self._pending):
+            raise RuntimeError('写入导入的配置失败')
+        self._pending = []
+
+    def get_summary(self):
+        """导入摘要，imported_count 为新增与更新数量之和"""
+        return dict(self.summary, imported_count=self.summary['inserted'] + self.summary['updated'])
@@ -0,0 +1,123 @@
+"""
+后台任务服务
+把应用配置、环境变量读取和访问测试提交到后台任务队列，结果与同步接口的响应相同
+"""
+from core.jobs import get_job_queue, JobQueueFull
+from models.namespaces import current_namespace
+from services.capability_service import CapabilityService
+from services.env_service import EnvService
+
+
+def env_vars_result(refresh=False):
+    """GET /api/env-vars 的响应内容"""
+    snapshot = EnvService.get_env_snapshot(refresh=refresh)
+    return {
+        'success': True,
+        'vars': snapshot['vars'],
+        'cached': snapshot['cached'],
+        'age': snapshot['age']
+    }
+
+
+def env_access_result(refresh=False):
+    """GET /api/test-env-access 的响应内容"""
+    try:
+        test_result = CapabilityService.get_env_access(refresh=refresh)
+        return {
+            'success': True,
+            'test_result': test_result,
+            'probed_at': CapabilityService.get_probed_at('env_access')
+        }
+    except Exception as e:
+        return {
+            'success': False,
+            'message': f'Environment variable access test failed: {str(e)}'
+        }
+
+
+def apply_result(config, mode=None, progress=None, cancelled=None, force=False):
+    """
+    应用配置并返回汇总结果，失败时标记能力探测结果过期
+
+    Args:
+        progress (callable): 每个变量完成时以该变量的结果调用
+        cancelled (callable): 返回 True 时跳过剩余变量
+        force (bool): 是否忽略快照写入全部变量
+    """
+    summary = None
+    for event, data in EnvService.iter_apply_config(config, mode, cancelled=cancelled, force=force):
+        if event == 'variable':
+            if progress is not None:
+                progress(data)
+        else:
+            summary = data
+    if not summary['success']:
+        # 应用失败可能是权限发生了变化，下次访问时重新探测
+        CapabilityService.invalidate()
+    return summary
+
+
+class JobService:
+    """后台任务服务"""
+
+    @staticmethod
+    def _submit(kind, key, func):
+        try:
+            job, created = get_job_queue().submit(kind, key, func)
+        except JobQueueFull:
+            return {'success': False, 'message': '任务队列已满，请稍后重试'}
+        return {'success': True, 'deduplicated': not created, 'job': job.to_dict()}
+
+    @staticmethod
+    def submit_apply(config, mode=None, force=False):
+        """提交应用配置任务，进度中记录已完成的变量；取消后跳过剩余变量"""
+        def run(job):
+            def progress(item):
+                job.progress = {
+                    'completed': item['completed'],
+                    'total': item['total'],
+                    'var_name': item['var_name'],
+                    'success': item['success']
+                }
+            return apply_result(config, mode, progress, lambda: job.cancel_requested, force)
+
+        return JobService._submit('apply', ('apply', current_namespace(), config.get('id'), mode, force), run)
+
+    @staticmethod
+    def submit_env_vars(refresh=False):
+        """提交读取当前环境变量的任务"""
+        return JobService._submit('env-vars', ('env-vars', refresh), lambda job: env_vars_result(refresh))
+
+    @staticmethod
+    def submit_env_access_test(refresh=False):
+        """提交环境变量访问测试任务"""
+        return JobService._submit(
+            'test-env-access', ('test-env-access', refresh), lambda job: env_access_result(refresh)
+        )
+
+    @staticmethod
+    def get_job(job_id):
+        """获取任务状态和结果"""
+        job = get_job_queue().get(job_id)
+        if job is None:
+            return {'success': False, 'message': '任务不存在'}
+        return {'success': True, 'job': job.to_dict()}
+
+    @staticmethod
+    def cancel_job(job_id):
+        """取消任务（执行中的任务在下一个检查点停止）"""
+        job = get_job_queue().cancel(job_id)
+        if job is None:
+            return {'success': False, 'message': '任务不存在'}
+        return {'success': True, 'job': job.to_dict()}
+
+    @staticmethod
+    def list_jobs(limit=50):
+        """最近的任务（不含结果内容）和队列统计"""
+        queue = get_job_queue()
+        jobs = []
+        for job in queue.list(limit):
+            item = job.to_dict()
+            item.pop('result')
+            jobs.append(item)
+        return {'success': True, 'jobs': jobs, 'stats': queue.get_stats()}
@@ -0,0 +1,125 @@
+"""
+配置校验服务
+校验规则在模块加载时编译一次（正则、允许值集合、模型白名单），
+单条校验、批量校验和导入都使用同一个规则注册表
+"""
+import re
+from config.settings import VALIDATION_MODEL_ALLOWLIST, VALIDATION_TRAFFIC_VALUES
+
+
+URL_PATTERN = re.compile(r'^https?://[^\s/?#]+[^\s]*$', re.IGNORECASE)
+TOKEN_PATTERN = re.compile(r'^\S+$')
+
+
+class ValidationRule:
+    """单条校验规则：check(value) 返回 False 时产生 message 警告"""
+
+    __slots__ = ('field', 'message', 'check')
+
+    def __init__(self, field, message, check):
+        self.field = field
+        self.message = message
+        self.check = check
+
+
+class RuleRegistry:
+    """
+    校验规则注册表
+
+    规则按字段分组，同一字段的规则按注册顺序执行，只报告第一条不通过的规则
+    （例如字段为空时不再报告格式错误）
+    """
+
+    def __init__(self):
+        self._rules = {}
+
+    def register(self, field, message, check):
+        """注册一条规则"""
+        self._rules.setdefault(field, []).append(ValidationRule(field, message, check))
+
+    def validate(self, config):
+        """校验一个配置，返回警告信息列表"""
+        warnings = []
+        for field, rules in self._rules.items():
+            value = config.get(field)
+            value = value.strip() if isinstance(value, str) else ('' if value is None else str(value))
+            for rule in rules:
+                if not rule.check(value):
+                    warnings.append(rule.message)
+                    break
+        return warnings
+
+    def describe(self):
+        """已注册的规则"""
+        return {field: [rule.message for rule in rules] for field, rules in self._rules.items()}
+
+
+def build_default_registry(model_allowlist=VALIDATION_MODEL_ALLOWLIST, traffic_values=VALIDATION_TRAFFIC_VALUES):
+    """按 settings 构建默认规则注册表"""
+    registry = RuleRegistry()
+    allowed_traffic = frozenset(value.lower() for value in traffic_values)
+    allowed_models = frozenset(model_allowlist or ())
+
+    registry.register('ANTHROPIC_AUTH_TOKEN', 'ANTHROPIC_AUTH_TOKEN 为空', bool)
+    registry.register('ANTHROPIC_AUTH_TOKEN', 'ANTHROPIC_AUTH_TOKEN 看起来太短', lambda value: len(value) >= 10)
+    registry.register('ANTHROPIC_AUTH_TOKEN', 'ANTHROPIC_AUTH_TOKEN 包含空白字符',
+                      lambda value: TOKEN_PATTERN.match(value) is not None)
+
+    registry.register('ANTHROPIC_BASE_URL', 'ANTHROPIC_BASE_URL 为空', bool)
+    registry.register('ANTHROPIC_BASE_URL', 'ANTHROPIC_BASE_URL 不是有效的URL格式',
+                      lambda value: URL_PATTERN.match(value) is not None)
+
+    registry.register('CLAUDE_CODE_DISABLE_NONESSENTIAL_TRAFFIC',
+                      'CLAUDE_CODE_DISABLE_NONESSENTIAL_TRAFFIC 应该是 ' + ' 或 '.join(traffic_values),
+                      lambda value: not value or value.lower() in allowed_traffic)
+
+    registry.register('AI_model', 'AI_model 为空', bool)
+    if allowed_models:
+        registry.register('AI_model', 'AI_model 不在允许的模型列表中', lambda value: value in allowed_models)
+
+    return registry
+
+
+# 全局规则注册表，启动时编译一次
+rule_registry = build_default_registry()
+
+
+class ValidationService:
+    """配置校验服务"""
+
+    @staticmethod
+    def validate(config):
+        """校验单个配置，返回警告信息列表"""
+        return rule_registry.validate(config)
+
+    @staticmethod
+    def validate_batch(configs):
+        """
+        逐个校验配置，每个配置产出一条结果，最后产出汇总
+
+        Args:
+            configs: 可迭代的配置
+
+        Yields:
+            dict: {'index', 'id', 'name', 'valid', 'warnings'}，
+                  最后一条为 {'done': True, 'total', 'valid', 'invalid'}
+        """
+        total = 0
+        invalid = 0
+        for index, config in enumerate(configs):
+            total += 1
+            if not isinstance(config, dict):
+                invalid += 1
+                yield {'index': index, 'id': None, 'name': None, 'valid': False, 'warnings': ['不是有效的配置对象']}
+                continue
+            warnings = rule_registry.validate(config)
+            if warnings:
+                invalid += 1
+            yield {
+                'index': index,
+                'id': config.get('id'),
+                'name': config.get('name'),
+                'valid': not warnings,
+                'warnings': warnings
+            }
+        yield {'done': True, 'total': total, 'valid': total - invalid, 'invalid': invalid}
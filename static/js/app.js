@@ -0,0 +1,955 @@
+// 页面地址为 /ns/<namespace>/ 时读写该命名空间的配置
+const namespaceMatch = window.location.pathname.match(/^\/ns\/([A-Za-z0-9_-]+)/);
+const CONFIG_API = namespaceMatch ? `/api/ns/${namespaceMatch[1]}` : '/api';
+
+let currentConfigId = null;
+let configsData = {};
+let countdownInterval = null;
+let toastQueue = [];
+let isProcessingToast = false;
+let inputDialogState = {
+    resolve: null,
+    validator: null,
+    required: true
+};
+const inputModalElement = document.getElementById('inputModal');
+const inputModalTitle = document.getElementById('inputModalTitle');
+const inputModalMessage = document.getElementById('inputModalMessage');
+const inputModalInput = document.getElementById('inputModalInput');
+const inputModalError = document.getElementById('inputModalError');
+const inputModalConfirmBtn = document.getElementById('inputModalConfirmBtn');
+const inputModalCancelBtn = document.getElementById('inputModalCancelBtn');
+
+// Toast提示系统
+class ToastManager {
+    constructor() {
+        this.container = document.getElementById('toastContainer');
+    }
+
+    show(title, message, type = 'info', duration = 2000) {
+        const toast = {
+            id: Date.now() + Math.random(),
+            title,
+            message,
+            type,
+            duration
+        };
+
+        toastQueue.push(toast);
+        this.processQueue();
+    }
+
+    processQueue() {
+        if (isProcessingToast || toastQueue.length === 0) return;
+
+        isProcessingToast = true;
+        const toast = toastQueue.shift();
+        this.showToast(toast);
+    }
+
+    showToast(toast) {
+        const toastElement = document.createElement('div');
+        toastElement.className = `toast ${toast.type}`;
+        toastElement.innerHTML = `
+            <div class="toast-header">
+                <div class="toast-title">${this.getTitleByType(toast.type)}</div>
+                <button class="toast-close" onclick="toastManager.close('${toast.id}')">×</button>
+            </div>
+            <div class="toast-message">${toast.message}</div>
+            <div class="toast-progress" style="width: 100%; transition-duration: ${toast.duration}ms;"></div>
+        `;
+
+        toastElement.id = `toast-${toast.id}`;
+        this.container.appendChild(toastElement);
+
+        // 触发动画
+        setTimeout(() => {
+            toastElement.classList.add('show');
+        }, 10);
+
+        // 设置进度条动画
+        setTimeout(() => {
+            const progressBar = toastElement.querySelector('.toast-progress');
+            progressBar.style.width = '0%';
+        }, 100);
+
+        // 自动关闭
+        setTimeout(() => {
+            this.close(toast.id);
+        }, toast.duration);
+    }
+
+    close(toastId) {
+        const toastElement = document.getElementById(`toast-${toastId}`);
+        if (!toastElement) return;
+
+        toastElement.classList.add('hide');
+        setTimeout(() => {
+            if (toastElement.parentNode) {
+                toastElement.parentNode.removeChild(toastElement);
+            }
+            isProcessingToast = false;
+            this.processQueue();
+        }, 300);
+    }
+
+    getTitleByType(type) {
+        const titles = {
+            'success': '成功',
+            'error': '错误',
+            'warning': '警告',
+            'info': '提示'
+        };
+        return titles[type] || '提示';
+    }
+
+    // 便捷方法
+    success(message, duration = 2000) {
+        this.show('成功', message, 'success', duration);
+    }
+
+    error(message, duration = 3000) {
+        this.show('错误', message, 'error', duration);
+    }
+
+    warning(message, duration = 2500) {
+        this.show('警告', message, 'warning', duration);
+    }
+
+    info(message, duration = 2000) {
+        this.show('提示', message, 'info', duration);
+    }
+}
+
+// 创建全局Toast管理器
+const toastManager = new ToastManager();
+
+// 确认对话框管理
+let confirmCallback = null;
+
+function showConfirmDialog(title, message, onConfirm) {
+    console.log('显示确认对话框 - 开始');
+    console.log('标题:', title);
+    console.log('消息:', message);
+    console.log('回调函数类型:', typeof onConfirm);
+
+    const modal = document.getElementById('confirmModal');
+    const titleElement = document.getElementById('confirmTitle');
+    const messageElement = document.getElementById('confirmMessage');
+    const confirmBtn = document.getElementById('confirmBtn');
+
+    if (!modal || !titleElement || !messageElement || !confirmBtn) {
+        console.error('确认对话框元素未找到:', {
+            modal: !!modal,
+            titleElement: !!titleElement,
+            messageElement: !!messageElement,
+            confirmBtn: !!confirmBtn
+        });
+        return;
+    }
+
+    titleElement.textContent = title;
+    messageElement.textContent = message;
+
+    // 确保回调函数被正确保存
+    confirmCallback = onConfirm;
+    console.log('回调函数已保存到全局变量confirmCallback');
+
+    // 显示模态框
+    modal.classList.add('active');
+    console.log('模态框已显示');
+
+    // 清除之前的事件监听器
+    confirmBtn.onclick = null;
+    confirmBtn.removeEventListener('click', confirmBtn.onclick);
+
+    // 绑定确认按钮事件
+    const clickHandler = async function(event) {
+        console.log('=== 确认按钮被点击 ===');
+        console.log('event对象:', event);
+        console.log('confirmCallback存在:', !!confirmCallback);
+        console.log('confirmCallback类型:', typeof confirmCallback);
+
+        event.preventDefault();
+        event.stopPropagation();
+
+        console.log('关闭模态框');
+        const callbackToRun = confirmCallback;
+        closeConfirmModal();
+
+        if (callbackToRun && typeof callbackToRun === 'function') {
+            console.log('开始执行回调函数');
+            try {
+                await callbackToRun();
+                console.log('回调函数执行完成');
+            } catch (error) {
+                console.error('执行确认回调时出错:', error);
+                toastManager.error('执行操作时发生错误: ' + (error.message || '未知错误'));
+            }
+        } else {
+            console.error('confirmCallback不存在或不是函数');
+            console.log('confirmCallback值:', confirmCallback);
+        }
+    };
+
+    confirmBtn.onclick = clickHandler;
+    console.log('确认按钮事件已绑定');
+
+    // 额外调试：直接测试回调函数
+    console.log('直接测试回调函数:');
+    if (confirmCallback) {
+        console.log('回调函数可用');
+    } else {
+        console.error('回调函数不可用');
+    }
+}
+
+function closeConfirmModal() {
+    const modal = document.getElementById('confirmModal');
+    modal.classList.remove('active');
+    confirmCallback = null;
+}
+
+function closeInputModal(result = null) {
+    inputModalElement.classList.remove('active');
+    const resolver = inputDialogState.resolve;
+    inputDialogState = {
+        resolve: null,
+        validator: null,
+        required: true
+    };
+    inputModalInput.value = '';
+    inputModalError.textContent = '';
+    if (resolver) {
+        resolver(result);
+    }
+}
+
+function submitInputDialog() {
+    if (!inputDialogState.resolve) return;
+    const value = inputModalInput.value.trim();
+
+    if (inputDialogState.required && !value) {
+        inputModalError.textContent = '输入不能为空';
+        return;
+    }
+
+    if (inputDialogState.validator) {
+        const validationMessage = inputDialogState.validator(value);
+        if (validationMessage) {
+            inputModalError.textContent = validationMessage;
+            return;
+        }
+    }
+
+    inputModalError.textContent = '';
+    closeInputModal(value);
+}
+
+function showInputDialog(options = {}) {
+    const {
+        title = '输入',
+        message = '',
+        defaultValue = '',
+        placeholder = '',
+        required = true,
+        validator = null
+    } = options;
+
+    if (inputDialogState.resolve) {
+        closeInputModal(null);
+    }
+
+    inputDialogState.required = required;
+    inputDialogState.validator = validator;
+    inputModalTitle.textContent = title;
+    inputModalMessage.textContent = message;
+    inputModalInput.value = defaultValue || '';
+    inputModalInput.placeholder = placeholder || '';
+    inputModalError.textContent = '';
+
+    inputModalElement.classList.add('active');
+
+    setTimeout(() => {
+        inputModalInput.focus();
+        inputModalInput.select();
+    }, 50);
+
+    return new Promise((resolve) => {
+        inputDialogState.resolve = resolve;
+    });
+}
+
+inputModalConfirmBtn.addEventListener('click', submitInputDialog);
+inputModalCancelBtn.addEventListener('click', () => closeInputModal(null));
+inputModalInput.addEventListener('keydown', (event) => {
+    if (event.key === 'Enter') {
+        event.preventDefault();
+        submitInputDialog();
+    }
+    if (event.key === 'Escape') {
+        event.preventDefault();
+        closeInputModal(null);
+    }
+});
+
+// 初始化
+document.addEventListener('DOMContentLoaded', function() {
+    bootstrap();
+
+    // 开发模式下测试功能（生产环境可删除）
+    if (window.location.hostname === 'localhost' || window.location.hostname === '127.0.0.1') {
+        // 添加测试快捷键 Ctrl+Shift+T - 测试Toast
+        document.addEventListener('keydown', function(e) {
+            if (e.ctrlKey && e.shiftKey && e.key === 'T') {
+                testToastSystem();
+            }
+        });
+
+        // 添加测试快捷键 Ctrl+Shift+C - 测试确认对话框
+        document.addEventListener('keydown', function(e) {
+            if (e.ctrlKey && e.shiftKey && e.key === 'C') {
+                testConfirmDialog();
+            }
+        });
+
+        // 在控制台添加测试函数
+        window.testToast = testToastSystem;
+        window.testConfirm = testConfirmDialog;
+        console.log('测试功能已添加：');
+        console.log('- 按 Ctrl+Shift+T 测试Toast系统');
+        console.log('- 按 Ctrl+Shift+C 测试确认对话框');
+        console.log('- 或在控制台运行 testToast() / testConfirm()');
+    }
+});
+
+// 测试Toast系统
+function testToastSystem() {
+    console.log('Testing Toast system...');
+
+    // 测试各种类型的Toast
+    toastManager.success('这是一个成功消息测试');
+
+    setTimeout(() => {
+        toastManager.error('这是一个错误消息测试');
+    }, 500);
+
+    setTimeout(() => {
+        toastManager.warning('这是一个警告消息测试');
+    }, 1000);
+
+    setTimeout(() => {
+        toastManager.info('这是一个信息消息测试');
+    }, 1500);
+
+    setTimeout(() => {
+        toastManager.show('自定义标题', '这是一个自定义标题的消息', 'info', 3000);
+    }, 2000);
+}
+
+// 测试确认对话框功能
+function testConfirmDialog() {
+    console.log('Testing Confirm Dialog...');
+
+    const testCallback = async function() {
+        console.log('测试回调函数被执行');
+        toastManager.success('测试回调执行成功！');
+    };
+
+    showConfirmDialog('测试确认对话框', '这是一个测试确认对话框，点击确定会执行回调函数。', testCallback);
+}
+
+// 页面初始化：一次请求并发获取配置列表、当前环境变量和权限状态，
+// 服务端未在等待时间内完成的部分（pending）再单独请求该部分的接口
+async function bootstrap() {
+    let sections;
+    try {
+        const response = await fetch(`${CONFIG_API}/bootstrap`);
+        sections = (await response.json()).sections;
+    } catch (error) {
+        console.error('Bootstrap failed, loading sections separately:', error);
+        loadConfigs();
+        refreshEnvVars();
+        checkAdmin();
+        return;
+    }
+
+    bootstrapSection(sections.configs)
+        .then(showConfigs)
+        .catch(error => console.error('加载配置失败:', error));
+    bootstrapSection(sections.envVars)
+        .then(showEnvVars)
+        .catch(error => toastManager.error('刷新失败: ' + error));
+    Promise.all([bootstrapSection(sections.privilege), bootstrapSection(sections.envAccess)])
+        .then(([data, envTestData]) => showPrivilegeStatus(data, envTestData))
+        .catch(error => {
+            console.error('Failed to check privileges:', error);
+            toastManager.error('权限检查失败');
+        });
+}
+
+// 返回 bootstrap 中一个部分的数据，未就绪或出错时请求该部分自己的接口
+async function bootstrapSection(section) {
+    if (section.status === 'ready') {
+        return section.data;
+    }
+    console.log(`${section.url} 未在初始化时完成（${section.status}），单独请求`);
+    const response = await fetch(section.url);
+    return await response.json();
+}
+
+// 检查权限状态
+async function checkAdmin() {
+    try {
+        const response = await fetch('/api/check-admin');
+        const data = await response.json();
+
+        // 测试环境变量访问权限
+        const envTestResponse = await fetch('/api/test-env-access');
+        const envTestData = await envTestResponse.json();
+
+        showPrivilegeStatus(data, envTestData);
+    } catch (error) {
+        console.error('Failed to check privileges:', error);
+        toastManager.error('权限检查失败');
+    }
+}
+
+// 显示权限检查和环境变量访问测试的结果
+function showPrivilegeStatus(data, envTestData) {
+    console.log('权限检查结果:', data);
+    console.log('环境变量访问测试结果:', envTestData);
+
+    // 显示权限状态
+    if (!envTestData.success) {
+        toastManager.error('环境变量访问测试失败: ' + envTestData.message, 5000);
+    } else if (!envTestData.test_result.can_modify) {
+        const testResult = envTestData.test_result;
+        toastManager.error(`无法修改环境变量: ${testResult.error}`, 5000);
+
+        if (testResult.recommendation) {
+            setTimeout(() => {
+                toastManager.info('建议: ' + testResult.recommendation, 6000);
+            }, 1000);
+        }
+    } else {
+        toastManager.success('环境变量访问权限正常', 3000);
+    }
+
+    // 显示传统权限建议
+    if (!data.canModifyEnv) {
+        if (data.recommendations && data.recommendations.length > 0) {
+            const recommendation = data.recommendations[0];
+            if (recommendation.type === 'error') {
+                toastManager.warning(recommendation.message, 4000);
+            } else if (recommendation.type === 'warning') {
+                toastManager.info(recommendation.message, 3000);
+            }
+        }
+    }
+}
+
+// 显示权限提升模态框
+function showAdminModal() {
+    const modal = document.getElementById('adminModal');
+    modal.classList.add('active');
+
+    let countdown = 6;
+    document.getElementById('countdown').textContent = countdown;
+
+    countdownInterval = setInterval(function() {
+        countdown--;
+        document.getElementById('countdown').textContent = countdown;
+        if (countdown <= 0) {
+            clearInterval(countdownInterval);
+            requestAdminPrivilege();
+        }
+    }, 1000);
+}
+
+// 关闭权限提升模态框
+function closeAdminModal() {
+    const modal = document.getElementById('adminModal');
+    modal.classList.remove('active');
+    if (countdownInterval) {
+        clearInterval(countdownInterval);
+    }
+}
+
+// 请求管理员权限
+function requestAdminPrivilege() {
+    toastManager.info('请在弹出的Windows对话框中点击"是"以获得管理员权限', 3000);
+    // 实际的权限提升由后端处理
+}
+
+// 加载配置列表
+async function loadConfigs() {
+    try {
+        const response = await fetch(`${CONFIG_API}/configs`);
+        showConfigs(await response.json());
+    } catch (error) {
+        console.error('加载配置失败:', error);
+    }
+}
+
+// 保存并显示配置列表
+function showConfigs(data) {
+    configsData = data;
+    renderConfigList();
+}
+
+// 渲染配置列表
+function renderConfigList() {
+    const list = document.getElementById('configList');
+    list.innerHTML = '';
+
+    if (configsData.configs.length === 0) {
+        list.innerHTML = '<div style="padding: 24px; color: #86868b; text-align: center; font-size: 16px;">暂无配置<br><small>点击左下角"+ 新建"创建第一个配置</small></div>';
+        return;
+    }
+
+    configsData.configs.forEach(config => {
+        const item = document.createElement('div');
+        item.className = 'config-item' + (config.id === currentConfigId ? ' active' : '');
+        item.innerHTML = `
+            <div class="config-item-name">
+                <span class="config-item-star">${config.isDefault || config.id === configsData.defaultConfigId ? '⭐' : ''}</span>
+                <span>${config.name}</span>
+            </div>
+            <div class="config-item-actions">
+                <button class="btn-small" onclick="setAsDefault('${config.id}', event)" title="设为默认">✓</button>
+                <button class="btn-small" onclick="editConfigName('${config.id}', event)" title="编辑名称">✎</button>
+                <button class="btn-small" onclick="deleteConfig('${config.id}', event)" title="删除">✕</button>
+            </div>
+        `;
+        item.addEventListener('click', () => selectConfig(config.id));
+        list.appendChild(item);
+    });
+}
+
+// 选择配置
+function selectConfig(configId) {
+    currentConfigId = configId;
+    renderConfigList();
+    renderEditor();
+}
+
+// 渲染编辑器
+function renderEditor() {
+    const panel = document.getElementById('editorPanel');
+
+    if (!currentConfigId) {
+        panel.classList.add('empty');
+        panel.innerHTML = `
+            <div style="text-align: center;">
+                <div style="font-size: 64px; margin-bottom: 16px;">📝</div>
+                <div style="font-size: 18px; color: #86868b;">选择一个配置开始编辑</div>
+            </div>
+        `;
+        return;
+    }
+
+    const config = configsData.configs.find(c => c.id === currentConfigId);
+    if (!config) return;
+
+    panel.classList.remove('empty');
+    panel.innerHTML = `
+        <div class="editor-heading">
+            <div class="editor-title">${config.name}</div>
+            <div class="current-config-chip">当前配置</div>
+        </div>
+    `;
+
+    const envVars = ['ANTHROPIC_AUTH_TOKEN', 'ANTHROPIC_BASE_URL', 'CLAUDE_CODE_DISABLE_NONESSENTIAL_TRAFFIC', 'AI_model'];
+    envVars.forEach(varName => {
+        const value = config[varName] || '';
+        const group = document.createElement('div');
+        group.className = 'form-group';
+        group.innerHTML = `
+            <label class="form-label">${varName}</label>
+            <input type="text" class="form-input" id="input_${varName}" value="${value}" placeholder="输入${varName}的值">
+            <div class="validation-warning" id="warning_${varName}"></div>
+        `;
+        panel.appendChild(group);
+    });
+}
+
+// 创建新配置
+async function createNewConfig() {
+    const name = await showInputDialog({
+        title: '创建新配置',
+        message: '请输入配置名称',
+        defaultValue: '新配置',
+        placeholder: '例如：开发环境配置'
+    });
+    if (!name) return;
+
+    try {
+        const response = await fetch(`${CONFIG_API}/configs`, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({name: name})
+        });
+        const data = await response.json();
+        await loadConfigs();
+        selectConfig(data.config.id);
+        toastManager.success('配置创建成功');
+    } catch (error) {
+        toastManager.error('创建失败: ' + error);
+    }
+}
+
+// 保存配置
+async function saveCurrentConfig() {
+    if (!currentConfigId) {
+        toastManager.warning('请先选择一个配置');
+        return false;
+    }
+
+    const config = configsData.configs.find(c => c.id === currentConfigId);
+    const envVars = ['ANTHROPIC_AUTH_TOKEN', 'ANTHROPIC_BASE_URL', 'CLAUDE_CODE_DISABLE_NONESSENTIAL_TRAFFIC', 'AI_model'];
+
+    const updateData = {};
+    let hasWarnings = false;
+
+    envVars.forEach(varName => {
+        const input = document.getElementById(`input_${varName}`);
+        updateData[varName] = input.value;
+    });
+
+    // 验证配置
+    try {
+        const validResponse = await fetch('/api/validate', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify(updateData)
+        });
+        const validData = await validResponse.json();
+
+        // 显示警告
+        envVars.forEach(varName => {
+            const warningElement = document.getElementById(`warning_${varName}`);
+            const warnings = validData.warnings.filter(w => w.includes(varName));
+            warningElement.textContent = warnings.join('; ');
+            if (warnings.length > 0) hasWarnings = true;
+        });
+
+        if (hasWarnings) {
+            // 这里不使用confirm，而是让用户决定是否继续
+            // 应用配置时会自动保存，所以这里只做验证
+        }
+    } catch (error) {
+        console.error('验证失败:', error);
+    }
+
+    try {
+        const response = await fetch(`${CONFIG_API}/configs/${currentConfigId}`, {
+            method: 'PUT',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify(updateData)
+        });
+        if (response.ok) {
+            await loadConfigs();
+            selectConfig(currentConfigId);
+            return true;
+        } else {
+            toastManager.error('保存失败');
+            return false;
+        }
+    } catch (error) {
+        toastManager.error('保存失败: ' + error);
+        return false;
+    }
+}
+
+// 应用配置
+async function applyCurrentConfig() {
+    console.log('applyCurrentConfig被调用，currentConfigId:', currentConfigId);
+
+    if (!currentConfigId) {
+        console.log('没有选择配置，显示警告');
+        toastManager.warning('请先选择一个配置');
+        return;
+    }
+
+    // 定义回调函数
+    const callback = async function() {
+        console.log('回调函数开始执行');
+        await executeApplyConfig();
+        console.log('回调函数执行完成');
+    };
+
+    console.log('准备显示确认对话框');
+    // 显示确认对话框
+    showConfirmDialog('应用配置', '确定要应用此配置到系统环境变量吗？', callback);
+}
+
+// 执行应用配置的实际操作
+async function executeApplyConfig() {
+    console.log('开始执行应用配置，当前配置ID:', currentConfigId);
+
+    try {
+        // 先保存配置
+        console.log('正在保存配置...');
+        const saveSuccess = await saveCurrentConfig();
+        console.log('保存配置结果:', saveSuccess);
+
+        if (!saveSuccess) {
+            toastManager.error('保存配置失败，无法应用配置');
+            return;
+        }
+
+        console.log('准备应用配置到系统环境变量...');
+        toastManager.info('正在应用配置到系统环境变量...');
+
+        console.log('发送API请求:', `${CONFIG_API}/configs/${currentConfigId}/apply`);
+        // 以 SSE 接收每个变量的结果，第一个变量失败时立即提示并中止，不再等待剩余变量
+        const controller = new AbortController();
+        const response = await fetch(`${CONFIG_API}/configs/${currentConfigId}/apply`, {
+            method: 'POST',
+            headers: {'Accept': 'text/event-stream'},
+            signal: controller.signal
+        });
+
+        console.log('API响应状态:', response.status);
+        let failed = null;
+        const data = await readApplyEvents(response, function(item) {
+            console.log(`变量 ${item.completed}/${item.total}:`, item.var_name, item.success,
+                item.unchanged ? '未变化，跳过' : item.elapsed_ms + 'ms');
+            if (!item.success && !failed) {
+                failed = item;
+                controller.abort();
+            }
+        });
+        console.log('API响应数据:', data);
+
+        if (failed) {
+            toastManager.error(`${failed.var_name}: ${failed.message}`, 5000);
+            return;
+        }
+
+        if (!data || !data.success) {
+            console.log('应用配置失败:', data && data.message);
+            toastManager.error((data && data.message) || '应用配置失败', 5000);
+            return;
+        }
+
+        console.log('配置应用成功，准备刷新环境变量...');
+        const unchanged = data.unchanged || [];
+        if (unchanged.length === data.total_count) {
+            toastManager.success('系统环境变量已是该配置，无需修改');
+        } else if (unchanged.length > 0) {
+            toastManager.success(`配置已成功应用到系统环境变量（${unchanged.length} 个变量未变化，已跳过）`);
+        } else {
+            toastManager.success('配置已成功应用到系统环境变量');
+        }
+        await refreshEnvVars();
+
+    } catch (error) {
+        console.error('Apply config error:', error);
+        toastManager.error('应用配置时发生错误: ' + (error.message || '未知错误'), 5000);
+    }
+}
+
+// 读取应用配置的 SSE 响应，每个 variable 事件调用 onVariable，返回 summary 事件的数据
+// （中止请求后返回 null；响应不是事件流时按普通 JSON 处理）
+async function readApplyEvents(response, onVariable) {
+    if (!(response.headers.get('Content-Type') || '').startsWith('text/event-stream')) {
+        return await response.json();
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let summary = null;
+    try {
+        while (true) {
+            const {done, value} = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, {stream: true});
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const block = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let event = 'message';
+                const dataLines = [];
+                block.split('\n').forEach(line => {
+                    if (line.startsWith('event:')) event = line.slice(6).trim();
+                    else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+                });
+                if (!dataLines.length) continue;
+
+                const payload = JSON.parse(dataLines.join('\n'));
+                if (event === 'variable') onVariable(payload);
+                else if (event === 'summary') summary = payload;
+            }
+        }
+    } catch (error) {
+        if (error.name !== 'AbortError') throw error;
+    }
+    return summary;
+}
+
+// 刷新环境变量显示
+async function refreshEnvVars() {
+    try {
+        const response = await fetch('/api/env-vars');
+        showEnvVars(await response.json());
+    } catch (error) {
+        toastManager.error('刷新失败: ' + error);
+    }
+}
+
+// 显示当前环境变量
+function showEnvVars(data) {
+    const panel = document.getElementById('statusContent');
+    panel.innerHTML = '';
+
+    Object.entries(data.vars).forEach(([key, value]) => {
+        const displayValue = value || '(未设置)';
+        const item = document.createElement('div');
+        item.className = 'status-item';
+        item.innerHTML = `
+            <div class="status-item-label" title="${key}">${key}</div>
+            <div class="status-item-value" title="${displayValue}">${displayValue}</div>
+        `;
+        panel.appendChild(item);
+    });
+    toastManager.info('环境变量状态已刷新');
+}
+
+// 设为默认配置
+async function setAsDefault(configId, event) {
+    event.stopPropagation();
+    try {
+        await fetch(`${CONFIG_API}/configs/${configId}/set-default`, {method: 'POST'});
+        await loadConfigs();
+        toastManager.success('已设置为默认配置');
+    } catch (error) {
+        toastManager.error('设置失败: ' + error);
+    }
+}
+
+// 编辑配置名称
+async function editConfigName(configId, event) {
+    event.stopPropagation();
+    const config = configsData.configs.find(c => c.id === configId);
+    if (!config) {
+        toastManager.error('配置不存在');
+        return;
+    }
+
+    const newName = await showInputDialog({
+        title: '修改配置名称',
+        message: '请输入新的配置名称',
+        defaultValue: config.name || '',
+        placeholder: '请输入配置名称'
+    });
+    if (!newName || newName === config.name) return;
+
+    try {
+        await fetch(`${CONFIG_API}/configs/${configId}`, {
+            method: 'PUT',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({...config, name: newName})
+        });
+        await loadConfigs();
+        selectConfig(configId);
+        toastManager.success('名称修改成功');
+    } catch (error) {
+        toastManager.error('修改失败: ' + error);
+    }
+}
+
+// 删除配置
+async function deleteConfig(configId, event) {
+    event.stopPropagation();
+
+    showConfirmDialog('删除配置', '确认删除此配置吗？该操作不可撤销。', async () => {
+        try {
+            await fetch(`${CONFIG_API}/configs/${configId}`, {method: 'DELETE'});
+            if (currentConfigId === configId) {
+                currentConfigId = null;
+                renderEditor();
+            }
+            await loadConfigs();
+            toastManager.success('配置删除成功');
+        } catch (error) {
+            toastManager.error('删除失败: ' + error);
+        }
+    });
+}
+
+// 导出配置
+async function exportConfigs() {
+    try {
+        const response = await fetch(`${CONFIG_API}/export`);
+        const data = await response.json();
+
+        const json = JSON.stringify(data, null, 2);
+        const blob = new Blob([json], {type: 'application/json'});
+        const url = URL.createObjectURL(blob);
+        const a = document.createElement('a');
+        a.href = url;
+        a.download = `env-configs-${new Date().getTime()}.json`;
+        a.click();
+        URL.revokeObjectURL(url);
+        toastManager.success('配置导出成功');
+    } catch (error) {
+        toastManager.error('导出失败: ' + error);
+    }
+}
+
+// 导入配置
+function importConfigs() {
+    const input = document.createElement('input');
+    input.type = 'file';
+    input.accept = '.json,.ndjson,.jsonl';
+    input.onchange = async function(e) {
+        const file = e.target.files[0];
+        if (/\.(ndjson|jsonl)$/i.test(file.name)) {
+            // NDJSON 文件直接作为请求体上传，由服务端逐行分批导入
+            try {
+                const response = await fetch(`${CONFIG_API}/import`, {
+                    method: 'POST',
+                    headers: {'Content-Type': 'application/x-ndjson'},
+                    body: file
+                });
+                const result = await response.json();
+                if (result.success) {
+                    toastManager.success(`导入成功：新增 ${result.inserted}，更新 ${result.updated}，跳过 ${result.skipped}`);
+                    await loadConfigs();
+                } else {
+                    toastManager.error('导入失败: ' + result.message);
+                }
+            } catch (error) {
+                toastManager.error('导入失败: ' + error);
+            }
+            return;
+        }
+        const reader = new FileReader();
+        reader.onload = async function(event) {
+            try {
+                const data = JSON.parse(event.target.result);
+                const response = await fetch(`${CONFIG_API}/import`, {
+                    method: 'POST',
+                    headers: {'Content-Type': 'application/json'},
+                    body: JSON.stringify(data)
+                });
+                const result = await response.json();
+                if (result.success) {
+                    toastManager.success(`导入成功：新增 ${result.inserted}，更新 ${result.updated}，跳过 ${result.skipped}`);
+                    await loadConfigs();
+                } else {
+                    toastManager.error('导入失败: ' + result.message);
+                }
+            } catch (error) {
+                toastManager.error('文件格式错误: ' + error);
+            }
+        };
+        reader.readAsText(file);
+    };
+    input.click();
+}
@@ -0,0 +1,289 @@
+"""
+配置存储测试
+同一组用例分别在 json、journal 和 sqlite 三个后端上运行，保证它们的行为一致
+"""
+import pytest
+from models.config_store import JsonConfigStore, JournaledConfigStore, thaw
+from models.sqlite_store import SqliteConfigStore
+
+
+BACKENDS = {
+    'json': lambda tmp_path: JsonConfigStore(tmp_path / 'configs.json'),
+    'journal': lambda tmp_path: JournaledConfigStore(tmp_path / 'configs.json', compact_interval=0),
+    'sqlite': lambda tmp_path: SqliteConfigStore(tmp_path / 'configs.db')
+}
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def make_store(request, tmp_path):
+    """创建指定后端的存储；同一个测试中再次调用会打开同一个文件（模拟重启）"""
+    stores = []
+
+    def make():
+        store = BACKENDS[request.param](tmp_path)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store.close()
+
+
+@pytest.fixture
+def store(make_store):
+    return make_store()
+
+
+def make_config(name, **fields):
+    return dict({'name': name, 'AI_model': 'claude', 'createdAt': f'2024-01-01T00:00:{name[-1:]}'}, **fields)
+
+
+def insert_all(store, names):
+    return [store.insert(make_config(name))['id'] for name in names]
+
+
+def names_of(configs):
+    return [config['name'] for config in configs]
+
+
+def test_empty_store(store):
+    document = store.load()
+    assert document['configs'] == ()
+    assert document['defaultConfigId'] is None
+    assert store.list_configs() == ([], 0)
+    assert store.get('missing') is None
+    assert store.find_by_name('missing') == []
+
+
+def test_save_and_load(store):
+    document = {
+        'defaultConfigId': 'b',
+        'configs': [
+            {'id': 'a', 'name': 'first', 'isDefault': False},
+            {'id': 'b', 'name': 'second', 'isDefault': True}
+        ]
+    }
+    assert store.save(document)
+
+    loaded = store.load()
+    assert loaded['defaultConfigId'] == 'b'
+    assert thaw(loaded['configs']) == document['configs']
+
+
+def test_load_returns_read_only_view(store):
+    insert_all(store, ['a'])
+    with pytest.raises(TypeError):
+        store.load()['configs'][0]['name'] = 'changed'
+
+
+def test_save_assigns_new_ids_to_duplicates(store):
+    store.save({'defaultConfigId': None, 'configs': [{'id': 'x', 'name': 'a'}, {'id': 'x', 'name': 'b'}]})
+    ids = [config['id'] for config in store.load()['configs']]
+    assert ids[0] == 'x'
+    assert len(set(ids)) == 2
+
+
+def test_data_survives_reopen(make_store):
+    store = make_store()
+    ids = insert_all(store, ['a', 'b', 'c'])
+    store.delete(ids[1])
+    store.set_default(ids[2])
+    store.close()
+
+    reopened = make_store()
+    assert [config['id'] for config in reopened.load()['configs']] == [ids[0], ids[2]]
+    assert reopened.get_default_id() == ids[2]
+
+
+def test_list_configs_pages_in_insertion_order(store):
+    insert_all(store, ['c', 'a', 'b', 'e', 'd'])
+
+    page, total = store.list_configs(0, 2)
+    assert names_of(page) == ['c', 'a']
+    assert total == 5
+
+    page, total = store.list_configs(2, 2)
+    assert names_of(page) == ['b', 'e']
+
+    page, total = store.list_configs(4, 2)
+    assert names_of(page) == ['d']
+
+    page, total = store.list_configs(10, 2)
+    assert page == []
+    assert total == 5
+
+    assert names_of(store.list_configs(1)[0]) == ['a', 'b', 'e', 'd']
+
+
+def test_iter_configs_yields_all_in_order(store):
+    insert_all(store, ['a', 'b', 'c'])
+    assert names_of(store.iter_configs(batch_size=2)) == ['a', 'b', 'c']
+
+
+def test_get(store):
+    config_id = store.insert(make_config('a', baseUrl='https://example.com'))['id']
+    config = store.get(config_id)
+    assert config['id'] == config_id
+    assert config['baseUrl'] == 'https://example.com'
+
+
+def test_find_by_name(store):
+    ids = insert_all(store, ['a', 'b', 'a'])
+    assert sorted(config['id'] for config in store.find_by_name('a')) == sorted([ids[0], ids[2]])
+    assert [config['id'] for config in store.find_by_name('b')] == [ids[1]]
+    assert store.find_by_name('c') == []
+
+
+def test_insert_keeps_free_id_and_replaces_taken_id(store):
+    assert store.insert(make_config('a', id='fixed'))['id'] == 'fixed'
+    second = store.insert(make_config('b', id='fixed'))
+    assert second['id'] != 'fixed'
+    assert store.get('fixed')['name'] == 'a'
+
+
+def test_update(store):
+    ids = insert_all(store, ['a', 'b'])
+    updated = store.update(ids[0], {'name': 'renamed', 'id': 'ignored'})
+    assert updated['id'] == ids[0]
+    assert updated['name'] == 'renamed'
+    assert updated['AI_model'] == 'claude'
+    assert store.find_by_name('a') == []
+    assert [config['id'] for config in store.find_by_name('renamed')] == [ids[0]]
+    # 更新不改变位置
+    assert names_of(store.list_configs()[0]) == ['renamed', 'b']
+
+
+def test_delete(store):
+    ids = insert_all(store, ['a', 'b'])
+    store.set_default(ids[0])
+    assert store.delete(ids[0]) is True
+    assert store.get(ids[0]) is None
+    assert store.get_default_id() is None
+    assert names_of(store.list_configs()[0]) == ['b']
+
+
+def test_update_and_delete_of_missing_id_do_not_change_version(store):
+    insert_all(store, ['a'])
+    version = store.get_version()
+    document = store.load()
+
+    assert store.update('missing', {'name': 'x'}) is None
+    assert store.delete('missing') is False
+    assert store.set_default('missing') is False
+
+    assert store.get_version() == version
+    assert store.load() is document
+
+
+def test_writes_change_version(store):
+    versions = {store.get_version()}
+    config_id = store.insert(make_config('a'))['id']
+    versions.add(store.get_version())
+    store.update(config_id, {'name': 'b'})
+    versions.add(store.get_version())
+    store.set_default(config_id)
+    versions.add(store.get_version())
+    store.delete(config_id)
+    versions.add(store.get_version())
+    assert len(versions) == 5
+
+
+def test_set_default(store):
+    ids = insert_all(store, ['a', 'b'])
+
+    assert store.set_default(ids[0]) is True
+    assert store.get_default_id() == ids[0]
+    assert store.get(ids[0])['isDefault'] is True
+
+    assert store.set_default(ids[1]) is True
+    assert store.get_default_id() == ids[1]
+    assert store.get(ids[0])['isDefault'] is False
+    assert store.get(ids[1])['isDefault'] is True
+
+
+def test_import_records(store):
+    existing = store.insert(make_config('a', id='taken'))['id']
+    count = store.import_records([
+        make_config('b', id='taken'),
+        make_config('c', id='new'),
+        make_config('d', id='new'),
+        make_config('e'),
+        'not a config'
+    ])
+
+    assert count == 4
+    configs = store.list_configs()[0]
+    assert names_of(configs) == ['a', 'b', 'c', 'd', 'e']
+    ids = [config['id'] for config in configs]
+    assert len(set(ids)) == 5
+    assert ids[0] == existing
+    assert ids[2] == 'new'
+    assert store.get('taken')['name'] == 'a'
+
+
+def test_upsert_records(store):
+    ids = insert_all(store, ['a', 'b'])
+    count = store.upsert_records([
+        dict(make_config('changed'), id=ids[0]),
+        make_config('c', id='added')
+    ])
+
+    assert count == 2
+    assert names_of(store.list_configs()[0]) == ['changed', 'b', 'c']
+
+
+def test_query_configs_filters_and_pages(store):
+    store.import_records([
+        make_config('alpha1', AI_model='claude'),
+        make_config('beta2', AI_model='gpt'),
+        make_config('Alpha3', AI_model='gpt')
+    ])
+
+    configs, total = store.query_configs(name_contains='ALPHA')
+    assert names_of(configs) == ['alpha1', 'Alpha3']
+    assert total == 2
+
+    configs, total = store.query_configs(model='gpt', limit=1)
+    assert names_of(configs) == ['beta2']
+    assert total == 2
+
+    configs, _ = store.query_configs(sort='-name')
+    assert names_of(configs) == ['beta2', 'alpha1', 'Alpha3']
+
+
+def test_query_configs_breaks_sort_ties_by_insertion_order(store):
+    store.import_records([
+        {'name': 'a', 'createdAt': '2024-01-02'},
+        {'name': 'b', 'createdAt': '2024-01-01'},
+        {'name': 'c', 'createdAt': '2024-01-02'},
+        {'name': 'd', 'createdAt': '2024-01-01'}
+    ])
+
+    configs, _ = store.query_configs(sort='createdAt')
+    assert names_of(configs) == ['b', 'd', 'a', 'c']
+
+    configs, _ = store.query_configs(sort='-createdAt')
+    assert names_of(configs) == ['c', 'a', 'd', 'b']
+
+    pages = [store.query_configs(sort='-createdAt', offset=offset, limit=1)[0] for offset in range(4)]
+    assert [names_of(page) for page in pages] == [['c'], ['a'], ['d'], ['b']]
+
+
+def test_journal_import_reports_failed_fsync(tmp_path, monkeypatch):
+    store = JournaledConfigStore(tmp_path / 'configs.json', compact_interval=0)
+    store.insert(make_config('a'))
+
+    def failing_fsync(fd):
+        raise OSError('disk full')
+    monkeypatch.setattr('models.config_store.os.fsync', failing_fsync)
+
+    assert store.import_records([make_config('b'), make_config('c')]) == 0
+    assert store.upsert_records([make_config('d', id='d')]) == 0
+    monkeypatch.undo()
+    store.close()
+
+
+def test_json_import_reports_failed_write(tmp_path):
+    store = JsonConfigStore(tmp_path / 'missing-dir' / 'configs.json')
+    assert store.import_records([make_config('a')]) == 0
+    assert store.upsert_records([make_config('b', id='b')]) == 0
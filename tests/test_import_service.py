@@ -0,0 +1,220 @@
+"""
+导入合并测试
+ConfigImporter 通过 ConfigModel 读写当前命名空间的存储，测试时把命名空间分片放在临时目录中
+"""
+import pytest
+import models.namespaces as namespaces
+from models.config import ConfigModel
+from models.namespaces import NamespaceStores, use_namespace
+from services.import_service import ConfigImporter, content_hash
+
+
+def make_config(config_id, name, token='token', created_at='2024-01-01T00:00:00', **fields):
+    return dict({
+        'id': config_id,
+        'name': name,
+        'isDefault': False,
+        'ANTHROPIC_AUTH_TOKEN': token,
+        'ANTHROPIC_BASE_URL': 'https://api.example.com',
+        'CLAUDE_CODE_DISABLE_NONESSENTIAL_TRAFFIC': '1',
+        'AI_model': 'claude',
+        'createdAt': created_at
+    }, **fields)
+
+
+def use_backend(monkeypatch, tmp_path, backend):
+    stores = NamespaceStores(tmp_path, backend, max_open=4)
+    monkeypatch.setattr(namespaces, '_namespace_stores', stores)
+    return stores
+
+
+@pytest.fixture(params=['json', 'journal', 'sqlite'])
+def backend(request, monkeypatch, tmp_path):
+    """在临时目录的 'test' 命名空间中运行"""
+    stores = use_backend(monkeypatch, tmp_path, request.param)
+    with use_namespace('test'):
+        yield request.param
+    stores.close_all()
+
+
+def existing(*configs):
+    ConfigModel.upsert_configs([dict(config) for config in configs])
+
+
+def merge(policy, configs):
+    importer = ConfigImporter(policy)
+    importer.merge(configs)
+    importer.flush()
+    return importer.get_summary()
+
+
+def stored():
+    return {config['id']: config for config in ConfigModel.iter_configs()}
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        ConfigImporter('replace-all')
+
+
+def test_inserts_new_configs(backend):
+    summary = merge('skip', [make_config('a', 'A', token='1'), make_config(None, 'B', token='2')])
+    assert summary['inserted'] == 2
+    assert summary['imported_count'] == 2
+    configs = stored()
+    assert 'a' in configs
+    assert len(configs) == 2
+    assert all(config['id'] for config in configs.values())
+
+
+def test_inserted_configs_are_not_default(backend):
+    existing(make_config('a', 'A', token='1', isDefault=True))
+    merge('skip', [make_config('b', 'B', token='2', isDefault=True)])
+    configs = stored()
+    assert configs['a']['isDefault'] is True
+    assert configs['b']['isDefault'] is False
+
+
+def test_skip_keeps_existing_config(backend):
+    existing(make_config('a', 'Old', token='old'))
+    summary = merge('skip', [make_config('a', 'New', token='new')])
+    assert summary['skipped'] == 1
+    assert summary['conflicts'] == 1
+    assert summary['conflict_ids'] == ['a']
+    assert stored()['a']['name'] == 'Old'
+
+
+def test_overwrite_replaces_existing_config_and_keeps_default_flag(backend):
+    existing(make_config('a', 'Old', token='old', isDefault=True))
+    summary = merge('overwrite', [make_config('a', 'New', token='new', isDefault=False)])
+    assert summary['updated'] == 1
+    assert summary['conflicts'] == 1
+    config = stored()['a']
+    assert config['name'] == 'New'
+    assert config['ANTHROPIC_AUTH_TOKEN'] == 'new'
+    assert config['isDefault'] is True
+
+
+def test_rename_imports_conflict_as_new_config(backend):
+    existing(make_config('a', 'Same', token='old', isDefault=True))
+    summary = merge('rename', [make_config('a', 'Same', token='new', isDefault=True)])
+    assert summary['inserted'] == 1
+    assert summary['conflicts'] == 1
+    configs = stored()
+    assert len(configs) == 2
+    assert configs['a']['ANTHROPIC_AUTH_TOKEN'] == 'old'
+    renamed = next(config for config_id, config in configs.items() if config_id != 'a')
+    assert renamed['name'] == 'Same (2)'
+    assert renamed['ANTHROPIC_AUTH_TOKEN'] == 'new'
+    assert renamed['isDefault'] is False
+
+
+def test_keep_newest_overwrites_only_with_newer_config(backend):
+    existing(
+        make_config('a', 'A', token='a-old', created_at='2024-01-02'),
+        make_config('b', 'B', token='b-old', created_at='2024-01-02')
+    )
+    summary = merge('keep-newest', [
+        make_config('a', 'A', token='a-new', created_at='2024-01-03'),
+        make_config('b', 'B', token='b-new', created_at='2024-01-01')
+    ])
+    assert summary['updated'] == 1
+    assert summary['skipped'] == 1
+    assert summary['conflicts'] == 2
+    configs = stored()
+    assert configs['a']['ANTHROPIC_AUTH_TOKEN'] == 'a-new'
+    assert configs['b']['ANTHROPIC_AUTH_TOKEN'] == 'b-old'
+
+
+def test_same_content_under_new_id_is_duplicate(backend):
+    existing(make_config('a', 'A', token='same'))
+    summary = merge('overwrite', [make_config('other', 'Copy', token='same')])
+    assert summary['duplicates'] == 1
+    assert summary['skipped'] == 1
+    assert summary['inserted'] == 0
+    assert list(stored()) == ['a']
+
+
+def test_repeats_within_one_batch_are_duplicates(backend):
+    summary = merge('skip', [
+        make_config('a', 'A', token='same'),
+        make_config('b', 'B', token='same'),
+        make_config(None, 'C', token='same')
+    ])
+    assert summary['inserted'] == 1
+    assert summary['duplicates'] == 2
+    assert list(stored()) == ['a']
+
+
+def test_same_id_and_content_is_duplicate_not_conflict(backend):
+    existing(make_config('a', 'A', token='same'))
+    summary = merge('overwrite', [make_config('a', 'Renamed', token='same')])
+    assert summary['duplicates'] == 1
+    assert summary['conflicts'] == 0
+    assert stored()['a']['name'] == 'A'
+
+
+def test_content_hash_only_uses_env_fields():
+    assert content_hash(make_config('a', 'A')) == content_hash(make_config('b', 'B', created_at='2025'))
+    assert content_hash(make_config('a', 'A')) != content_hash(make_config('a', 'A', token='other'))
+
+
+def count_writes(monkeypatch):
+    writes = []
+    upsert = ConfigModel.upsert_configs
+
+    def recording_upsert(configs):
+        writes.append(len(configs))
+        return upsert(configs)
+    monkeypatch.setattr(ConfigModel, 'upsert_configs', staticmethod(recording_upsert))
+    return writes
+
+
+def test_json_backend_buffers_until_pending_doubles_the_store(monkeypatch, tmp_path):
+    stores = use_backend(monkeypatch, tmp_path, 'json')
+    writes = count_writes(monkeypatch)
+    with use_namespace('test'):
+        importer = ConfigImporter('skip')
+
+        # 空存储：4 条待写入 * 2 >= 4 条配置，写入
+        importer.merge([make_config(f'a{i}', 'A', token=f'a{i}') for i in range(4)])
+        assert writes == [4]
+
+        # 2 * 2 < 6，4 条已写入的配置还没有翻倍，继续累积
+        importer.merge([make_config(f'b{i}', 'B', token=f'b{i}') for i in range(2)])
+        assert writes == [4]
+        assert len(stored()) == 4
+
+        # 3 * 2 < 7
+        importer.merge([make_config('c0', 'C', token='c0')])
+        assert writes == [4]
+
+        # 4 * 2 >= 8，写入累积的 4 条
+        importer.merge([make_config('d0', 'D', token='d0')])
+        assert writes == [4, 4]
+        assert len(stored()) == 8
+
+        importer.merge([make_config('e0', 'E', token='e0')])
+        assert writes == [4, 4]
+        importer.flush()
+        assert writes == [4, 4, 1]
+        assert len(stored()) == 9
+
+        # 没有待写入的配置时 flush 不写入
+        importer.flush()
+        assert writes == [4, 4, 1]
+    stores.close_all()
+
+
+@pytest.mark.parametrize('backend_name', ['journal', 'sqlite'])
+def test_other_backends_write_every_batch(monkeypatch, tmp_path, backend_name):
+    stores = use_backend(monkeypatch, tmp_path, backend_name)
+    writes = count_writes(monkeypatch)
+    with use_namespace('test'):
+        existing(*[make_config(f'x{i}', 'X', token=f'x{i}') for i in range(10)])
+        writes.clear()
+        importer = ConfigImporter('skip')
+        importer.merge([make_config('a', 'A', token='a')])
+        importer.merge([make_config('b', 'B', token='b')])
+        assert writes == [1, 1]
+    stores.close_all()